@@ -40,8 +40,13 @@ setup(
         'json5',
         'matplotlib',
         'rtree',
+        'scipy',
         'click'
     ],
+    extras_require={
+        'zarr': ['zarr'],
+        'parquet': ['pyarrow'],
+    },
     entry_points={
         'console_scripts': [
             'easymore = easymore.scripts.main:main',
@@ -16,15 +16,21 @@ aggregation).
 """
 
 import multiprocessing
+import threading
+import queue
+import functools
+import socket
 import glob
 import time
 import sys
 import os
 import warnings
 import re
+import ast
+import inspect
 import json
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import (
     List,
     Dict,
@@ -41,6 +47,24 @@ from easymore import __version__
 
 VERSION = __version__
 
+# the netCDF and HDF5 libraries are not thread safe; every access to a netCDF
+# file while the prefetch or writer threads are running goes through this lock
+NC_LOCK = threading.Lock()
+
+# the functions, constants and operators allowed in the expressions of derived_vars;
+# the expressions are evaluated node by node and nothing else is evaluated
+DERIVED_VAR_FUNCTIONS = {name: getattr(np, name) for name in
+                         ['abs', 'absolute', 'sqrt', 'square', 'exp', 'expm1', 'log', 'log10', 'log2',
+                          'log1p', 'power', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2',
+                          'sinh', 'cosh', 'tanh', 'hypot', 'deg2rad', 'rad2deg', 'sign', 'floor', 'ceil',
+                          'maximum', 'minimum', 'fmax', 'fmin', 'clip', 'where', 'isnan']}
+DERIVED_VAR_CONSTANTS = {'pi': np.pi}
+DERIVED_VAR_OPERATORS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+                         ast.Div: np.true_divide, ast.FloorDiv: np.floor_divide, ast.Mod: np.mod,
+                         ast.Pow: np.power, ast.USub: np.negative, ast.UAdd: np.positive,
+                         ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+                         ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}
+
 
 class Easymore:
     """
@@ -156,6 +180,52 @@ class Easymore:
         is provided, it is assume that it is assigned to all the variables.
         It can be also assigned differently to each varibale for remapping
         such as `[-9999,-1,-9999]`
+    significant_digits : List[int], defaults to `None`
+        number of significant decimal digits that are kept in the remapped
+        values of each variable; the rest of the mantissa is set to zero
+        (BitGroom quantization of netCDF4, BitRound for zarr) so that the
+        remapped files compress much better. If one value is provided it is
+        used for all the variables; `None` for a variable keeps its full
+        precision such as `[3, None]`.
+    least_significant_digit : List[int], defaults to `None`
+        power of ten of the smallest decimal place that is kept in the
+        remapped values of each variable, e.g. `2` keeps 0.01 K of a
+        temperature. Provided as `significant_digits`; a variable cannot have
+        both. The quantization is recorded in the attributes of the variables.
+        The reduction of each remapped netCDF file is reported against the
+        same values encoded without quantization; the time series and Zarr
+        outputs report their size against their uncompressed values.
+    derived_vars : Dict[str, str], defaults to `None`
+        variables of `var_names` that are derived from other variables of
+        the source netcdf files such as `{'wind': 'sqrt(u**2 + v**2)',
+        'precip': 'rain + snow'}`. A derivation is an expression of the
+        source variables, numbers, arithmetic operators, comparisons and
+        the numpy functions of `DERIVED_VAR_FUNCTIONS` (such as sqrt, exp,
+        log, maximum and where, also as `np.sqrt`), or a function with the source
+        variables as its arguments, that is evaluated on the source values
+        of the remapped cells of every block of time steps before they are
+        averaged over the target shapes. As a dictionary such as
+        `{'expression': 'q / qs', 'stage': 'after', 'units': '1',
+        'long_name': 'relative humidity'}` the stage `'after'` evaluates it
+        on the remapped values of the source variables, only for the mean.
+        The source variables are read once whether they are in `var_names`
+        or not, and no gridded derived variable is written. A function
+        should be defined at module level for the parallel remapping.
+    output_units : Dict[str, str], defaults to `None`
+        units of the remapped variables by the name of the variables in the
+        source netcdf files such as `{'t2m': 'degC', 'tp': 'mm'}`. The
+        conversion from the units attribute of the source variable is
+        resolved once with pint and applied to the remapped values of the
+        target shapes while they are remapped, as `Utility.convert_units`
+        without another pass over the remapped files. The standard
+        deviation is only scaled and the valid fraction is not converted.
+    target_ids : List[float], defaults to `None`
+        IDs of the target shapes, `target_shp_ID`, that are remapped such as
+        a subset of basins for calibration. The remapping file is sliced to
+        these shapes, so it is reused as is, and only the window of the
+        source netcdf files that their source cells touch is read. The
+        remapped files have the same layout as for all the target shapes
+        with only the selected shapes in the order of the remapping file.
     remap_nc : str
         Name of the remapped file. `nc_remapper` created this file before
         remapping the source to remapped netcdf file(s), however if provided
@@ -194,9 +264,48 @@ class Easymore:
         entire length of time the values are missing or outside the
         boarder of netcdf file. The weight is then corrected to make sure
         the wieghts are adding up to 1 so the remapped values are comparable
+    weight_nc : str, defaults to `None`
+        name of a netcdf file with a field on the grid of the source netcdf
+        files, such as population or land fraction, that weights the source
+        cells in addition to their area of intersection. The field is read
+        once when the remapping file is loaded, multiplied into the weights
+        of the remapping and the weights of every target shape are scaled
+        to add up to 1 again, so there is no cost for every time step. The
+        missing values of the field are taken as zero; a target shape with
+        a zero field over all its cells has no remapped values.
+    weight_var : str, defaults to `None`
+        name of the variable of `weight_nc`, with the dimensions of the
+        source grid.
+    statistics : List[str], defaults to `['mean']`
+        statistics of the source values over each target shape that are
+        computed from the same read of the source values and saved as
+        variables of the remapped files; `'mean'` is the area weighted
+        average under the remapped variable name while `'max'`, `'min'`,
+        `'std'` (area weighted standard deviation) and `'valid_frac'`
+        (fraction of the area of the target shape with source values) are
+        saved with the statistic as suffix such as `temperature_max`. The
+        max, min and standard deviation use the source values with a weight.
     skip_outside_shape : bool, defaults to `False`
         if set to True it will not carry the nan values for shapes that
         are outside the source netCDF geographical domain
+    point_method : str, defaults to `None`
+        for a target shapefile of points or multipoints only; with `'cell'` each point
+        takes the value of the source grid or Voronoi region that contains
+        it, located directly from the lat and lon of the source netcdf file
+        without the small buffer around the points, the source shapefile
+        and the intersection. With `'bilinear'` each point is interpolated
+        from the four surrounding grid centers of regular or rotated lat/lon
+        (case 1 and 2). With `'idw'` each point is interpolated by inverse
+        distance weighting of its `idw_neighbours` nearest source elements,
+        e.g. stations of irregular lat/lon (case 3). The weights are saved
+        in the remapping file and rescaled for missing values as for shapes.
+        The parts of a multipoint are located one by one and weigh equally
+        in its remapped value. With `None` the points are buffered and
+        intersected with the source shapefile.
+    idw_neighbours : int, defaults to `4`
+        number of the nearest source elements of `point_method='idw'`.
+    idw_power : float, defaults to `2`
+        power of the distance of `point_method='idw'`.
     author_name : str
         name of the user
     license : str
@@ -205,7 +314,8 @@ class Easymore:
         tolerance
     save_csv : bool, defaults to `False`
         if set to True, nc_remapper will save a copy of remapped values in
-        csv format for each varibales.
+        csv format for each varibales. The ID, lat, lon of the target shapes
+        are saved once in `Mapping_<case_name>_remapped.csv`.
     sort_ID : bool, defaults to `False`
         The remapped values are sorted based on the order of the
         `target_shp_ID`. If this flag is set to `True`, the order of
@@ -214,6 +324,136 @@ class Easymore:
     complevel : int, defaults to `4`
         The compression level for remapped netcdf file(s).
         Should be between 1 and 9. 1 is least comress and 9 most compressed
+    schedule_by_cost : bool, defaults to `True`
+        if set to True, in parallel remapping the source netcdf files are
+        dispatched to the workers from the largest to the smallest estimated
+        cost (length of time x remapped cells x variables) so that large
+        files do not end up at the tail of the run.
+    pack_cost_fraction : float, defaults to `0.25`
+        source netcdf files with an estimated cost lower than this fraction
+        of the median cost of the source netcdf files are packed together
+        into tasks of about the median cost in parallel remapping; files of
+        similar sizes are not packed. Set to 0 to disable packing.
+    resume : bool, defaults to `False`
+        if set to True, the source netcdf files that are recorded as
+        complete in the manifest of the output directory (same source
+        file, remapping file, variables and output checksum) are skipped
+        and only missing or partial outputs are remapped. The manifest
+        is written as `<case_name>_manifest.jsonl` in `output_dir`. The
+        hash of a remapping file that is created from the shapefiles is
+        derived from its inputs, so a resumed run without `remap_nc`
+        matches the manifest of the earlier run.
+    work_dir : str, defaults to `None`
+        a shared directory through which several easymore processes, on
+        one or several nodes, claim the source netcdf files to remap. The
+        claims, the completed files and the shared remapping file are kept
+        in a subdirectory named by the case name and a hash of the settings,
+        so a run with other settings in the same `work_dir` starts afresh.
+    claim_timeout : float, defaults to `600`
+        seconds after which a claim in `work_dir`, or the lock of the process
+        creating the remapping file, that is not refreshed is considered
+        stale (e.g. a killed or preempted process) and can be taken over by
+        another process. The claims are refreshed while they are held and a
+        process waits for the files claimed by the other processes until
+        they are done or their claims are stale. Set to `None` to never take
+        over a claim; a process then returns after one pass over the files.
+    shard_index : int, defaults to `None`
+        index of the shard of source netcdf files remapped by this process,
+        between 0 and `shard_count`-1 (e.g. a SLURM array task ID).
+    shard_count : int, defaults to `None`
+        number of shards the source netcdf files are split into.
+    prefetch_depth : int, defaults to `1`
+        number of source netcdf files that are read ahead by a background
+        thread while the current file is remapped. Each prefetched file
+        holds the needed variables in memory; set to 0 to read the files
+        one after the other without prefetching.
+    write_queue_depth : int, defaults to `2`
+        number of remapped variables that wait in the queue of a background
+        writer thread, which writes and compresses the remapped netcdf files
+        while the next variable or file is remapped. Set to 0 to write on
+        the remapping thread.
+    chunk_access : str, defaults to `None`
+        the access pattern the chunks of the remapped variables are shaped
+        for; `'time_series'` for reading the whole time series of a few
+        target shapes, `'map'` for reading all the target shapes at a few
+        time steps or `'balanced'` for both. The chunks are sized to about
+        `chunk_bytes`. If `None`, `remapped_chunk_size` is used.
+    chunk_bytes : int, defaults to `1048576`
+        target size of a chunk in bytes when `chunk_access` is provided.
+    shuffle : bool, defaults to `True`
+        if set to True, the shuffle filter is applied before compression
+        of the remapped variables.
+    compression : str, defaults to `'zlib'`
+        compression codec of the remapped variables; `'zlib'`, `'zstd'`,
+        `'bzip2'`, `'szip'` or one of the `'blosc_*'` codecs of netCDF4. If
+        the codec is not supported by the installed netCDF/HDF5 libraries
+        zlib is used.
+    merge_output : bool, defaults to `False`
+        if set to True, the remapped values of all the source netcdf files
+        are appended in the order of time into one remapped netcdf file,
+        `<case_name>_remapped.nc`, along the unlimited time dimension
+        instead of one remapped file per source file. The time of the
+        source files should not overlap. Cannot be used with `work_dir`,
+        `shard_count` or `resume`.
+    output_period : str, defaults to `None`
+        `'day'`, `'month'` or `'year'`; the remapped values of the source
+        netcdf files are routed, in the order of time, into one remapped
+        netcdf file per period, `<case_name>_remapped_<period>.nc` such as
+        `ERA5_remapped_2000-01.nc`, regardless of the time covered by each
+        source file. A period that spans several source files is appended
+        across their boundaries. The periods follow the calendar of the
+        time variable, including non-standard calendars, and every time
+        step goes to the period of its time value. Cannot be used with
+        `merge_output`, `work_dir`, `shard_count` or `resume`.
+    time_aggregation : str, defaults to `None`
+        `'day'`, `'month'` or `'year'`; the remapped values are aggregated
+        in time by `time_aggregation_stat` while they are remapped, as
+        `Utility.agg_hourl_to_daily`, and only the aggregated values are
+        written, into `<case_name>_remapped.nc` or the files of
+        `output_period` or `output_format='time_series'`, or yielded by
+        `iter_remapped`. A period that spans several source netcdf files is
+        accumulated across their boundaries; the first and last periods may
+        be partial. The time of a period is its start and its time bounds
+        are saved if `var_time_bound` is given. Cannot be used with zarr
+        `output_format`, `work_dir`, `shard_count` or `resume`.
+    time_aggregation_stat : str, defaults to `'mean'`
+        `'mean'`, `'sum'`, `'max'` or `'min'` of the remapped values of a
+        period of `time_aggregation`; the missing values are skipped.
+    time_aggregation_offset : int, defaults to `0`
+        hours added to the time of the remapped values to find their period
+        of `time_aggregation`, e.g. `1` for a daily sum of hourly values
+        recorded at the end of each hour or `-6` for the days of UTC-6.
+    output_format : str, defaults to `'netcdf'`
+        format of the remapped output; `'netcdf'`, `'zarr'` or
+        `'time_series'`. With `'time_series'` the remapped values of all the
+        source netcdf files are written in the order of time into one
+        ID-major netcdf file, `<case_name>_remapped_time_series.nc`, with
+        the variables along (ID, time) for reading whole time series. With
+        `'zarr'` the remapped values of all the source netcdf files are
+        written in the order of time into one Zarr store,
+        `<case_name>_remapped.zarr`, with the same variables and attributes
+        as the netcdf files; parallel workers write their own time regions
+        of the store. Needs the zarr package. `'zarr'` and `'time_series'`
+        cannot be used with `work_dir`, `shard_count` or `resume`.
+    time_series_memory : int, defaults to `1073741824`
+        bytes of remapped values that are held in memory before a slab of
+        time steps is transposed and written to the ID-major netcdf file of
+        `output_format='time_series'` or `remapped_to_time_series`.
+    save_parquet : bool, defaults to `False`
+        if set to True, the remapped values of every source netcdf file are
+        also saved in parquet format, with typed time and ID columns and
+        the fill values as null, and the ID, lat, lon of the target shapes
+        in `Mapping_<case_name>_remapped.parquet`. Needs the pyarrow
+        package.
+    parquet_layout : str, defaults to `'long'`
+        `'long'` saves one table per source file with the columns time, ID
+        and one column per variable; `'wide'` saves one table per variable
+        and source file with the columns time and one column per ID, like
+        the csv files of `save_csv`.
+    parquet_compression : List[str], defaults to `['zstd']`
+        parquet compression codec for each variable, such as `'zstd'`,
+        `'snappy'`, `'gzip'`, `'brotli'`, `'lz4'` or `'none'`. A single
+        codec is used for all the variables.
     """
 
     def __init__(
@@ -265,6 +505,40 @@ class Easymore:
         save_csv: bool = False,
         sort_ID: bool = False,
         complevel: int = 4,
+        schedule_by_cost: bool = True,
+        pack_cost_fraction: float = 0.25,
+        resume: bool = False,
+        work_dir: str = None,
+        claim_timeout: float = 600,
+        shard_index: int = None,
+        shard_count: int = None,
+        prefetch_depth: int = 1,
+        write_queue_depth: int = 2,
+        chunk_access: str = None,
+        chunk_bytes: int = 1048576,
+        shuffle: bool = True,
+        compression: str = 'zlib',
+        merge_output: bool = False,
+        output_period: str = None,
+        output_format: str = 'netcdf',
+        time_series_memory: int = 1073741824,
+        save_parquet: bool = False,
+        parquet_layout: str = 'long',
+        parquet_compression: List[str] = ['zstd'],
+        significant_digits: List[int] = None,
+        least_significant_digit: List[int] = None,
+        point_method: str = None,
+        idw_neighbours: int = 4,
+        idw_power: float = 2,
+        statistics: List[str] = ['mean'],
+        time_aggregation: str = None,
+        time_aggregation_stat: str = 'mean',
+        time_aggregation_offset: int = 0,
+        output_units: Dict[str, str] = None,
+        derived_vars: Dict[str, str] = None,
+        target_ids: List[float] = None,
+        weight_nc: str = None,
+        weight_var: str = None,
     ) -> None:
         """
         Main constructor
@@ -317,6 +591,45 @@ class Easymore:
         self.save_csv = save_csv
         self.sort_ID = sort_ID
         self.complevel = complevel
+        self.schedule_by_cost = schedule_by_cost
+        self.pack_cost_fraction = pack_cost_fraction
+        self.resume = resume
+        self.work_dir = work_dir
+        self.claim_timeout = claim_timeout
+        self.work_dir_case = None # subdirectory of work_dir for the settings
+        self.remap_loaded = None # the remapping of load_remap, loaded once
+        self.remap_lock_heartbeat = None # refreshes the lock of the remapping file
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.prefetch_depth = prefetch_depth
+        self.write_queue_depth = write_queue_depth
+        self.chunk_access = chunk_access
+        self.chunk_bytes = chunk_bytes
+        self.shuffle = shuffle
+        self.compression = compression
+        self.merge_output = merge_output
+        self.output_period = output_period
+        self.output_format = output_format
+        self.time_series_memory = time_series_memory
+        self.save_parquet = save_parquet
+        self.parquet_layout = parquet_layout
+        self.parquet_compression = parquet_compression
+        self.significant_digits = significant_digits
+        self.least_significant_digit = least_significant_digit
+        self.point_method = point_method
+        self.idw_neighbours = idw_neighbours
+        self.idw_power = idw_power
+        self.statistics = statistics
+        self.time_aggregation = time_aggregation
+        self.time_aggregation_stat = time_aggregation_stat
+        self.time_aggregation_offset = time_aggregation_offset
+        self.output_units = output_units
+        self.unit_conversions = {} # resolved from the source netCDF files
+        self.derived_vars = derived_vars
+        self.target_ids = target_ids
+        self.source_window = None # of the remapping file, from load_remap
+        self.weight_nc = weight_nc
+        self.weight_var = weight_var
 
         self.version = VERSION
 
@@ -436,11 +749,17 @@ class Easymore:
         self.check_easymore_input()
         # check the source nc file
         self.check_source_nc()
-        # if remap is not provided then create the remapping file
-        if self.remap_nc is None:
+        # if remap is not provided then create the remapping file; with a shared
+        # work directory only the first process creates the remapping file
+        create_remap_nc = self.remap_nc is None
+        if self.work_dir is not None:
+            self.work_dir_case = self.get_work_dir_case()
+        if create_remap_nc and (self.work_dir is not None):
+            create_remap_nc = self.claim_work_dir_remap()
+        if create_remap_nc:
             import geopandas as gpd
             print('--CREATING-REMAPPING-FILE--')
-            self.easymore_hash = hashlib.sha256(secrets.token_hex(8).encode()).hexdigest()
+            self.easymore_hash = self.get_remap_hash()
             time_start = datetime.now()
             print('Started at date and time ' + str(time_start))
             # read and check the target shapefile
@@ -451,75 +770,79 @@ class Easymore:
                 target_shp_gpd.to_file(self.temp_dir+self.case_name+'_target_shapefile.gpkg', driver='GPKG')
                 print('EASYMORE saved target shapefile for EASYMORE claculation as:')
                 print(self.temp_dir+self.case_name+'_target_shapefile.gpkg')
-            # create source shapefile
-            source_shp_gpd = self.create_source_shp()
-            if self.save_temp_shp:
-                source_shp_gpd.to_file(self.temp_dir+self.case_name+'_source_shapefile.gpkg', driver='GPKG')
-                print(self.temp_dir+self.case_name+'_source_shapefile.gpkg')
-                print('EASYMORE created the shapefile from the netCDF file and saved it here:')
-            # intersection of the source and sink/target shapefile
-            if self.save_temp_shp:
-                shp_1 = gpd.read_file(self.temp_dir+self.case_name+'_target_shapefile.gpkg')
-                shp_2 = gpd.read_file(self.temp_dir+self.case_name+'_source_shapefile.gpkg')
-            else:
-                shp_1 = target_shp_gpd
-                shp_2 = source_shp_gpd
-            # correction of the source and target shapefile to frame of -180 to 180
-            min_lon_t, min_lat_t, max_lon_t, max_lat_t = shp_1.total_bounds # target
-            min_lon_s, min_lat_s, max_lon_s, max_lat_s = shp_2.total_bounds # source
-            if not ((min_lon_s<min_lon_t) and (max_lon_s>max_lon_t) and \
-                    (min_lat_s<min_lat_t) and (max_lat_s>max_lat_t)): # heck if taret is not in source
-                print('EASMORE detects that target shapefile is outside the boundary of source netCDF file ',
-                      'and therefore correction for longitude values -180 to 180 or 0 to 360 if correction_shp_lon ',
-                      'flag is set to True [default is True]')
-                if self.correction_shp_lon:
-                    print('correcting target shapefile')
-                    shp_1 = self.shp_lon_correction(shp_1)
-                    print('correcting source shapefile')
-                    shp_2 = self.shp_lon_correction(shp_2)
-            else: # it target is in source
-                print('EASMORE detects that target shapefile is inside the boundary of source netCDF file ',
-                      'and therefore correction for longitude values -180 to 180 or 0 to 360 is not performed even if ',
-                      'the correction_shp_lon flag is set to True [default is True]')
-            if self.save_temp_shp:
-                shp_1.to_file(self.temp_dir+self.case_name+'_target_shapefile_corrected_frame.gpkg', driver='GPKG')
-                shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_corrected_frame.gpkg', driver='GPKG')
-            # # clip to the region of the target shapefile to speed up the intersection
-            # if self.clip_source_shp:
-            #     min_lon, min_lat, max_lon, max_lat = shp_1.total_bounds
-            #     min_lon, min_lat, max_lon, max_lat = min_lon - self.buffer_clip_source_shp, min_lat - self.buffer_clip_source_shp,\
-            #                                          max_lon + self.buffer_clip_source_shp, max_lat + self.buffer_clip_source_shp
-            #     shp_2 = shp_2[(shp_2['lat_s']<max_lat) & (shp_2['lat_s']>min_lat) & (shp_2['lon_s']<max_lon) & (shp_2['lon_s']>min_lon)]
-            #     shp_2.reset_index(drop=True, inplace=True)
-            #     if self.save_temp_shp:
-            #         if self.correction_shp_lon:
-            #             shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_corrected_frame_clipped.shp')
-            #         else:
-            #             shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_clipped.shp')
-            # reprojections to equal area
-            if self.check_shp_crs(shp_1) and self.check_shp_crs(shp_2): #(str(shp_1.crs).lower() == str(shp_2.crs).lower()) and ('epsg:4326' in str(shp_1.crs).lower()):
-                shp_1 = shp_1.to_crs ("EPSG:6933") # project to equal area
-                shp_2 = shp_2.to_crs ("EPSG:6933") # project to equal area
+            if self.point_method is None:
+                # create source shapefile
+                source_shp_gpd = self.create_source_shp()
+                if self.save_temp_shp:
+                    source_shp_gpd.to_file(self.temp_dir+self.case_name+'_source_shapefile.gpkg', driver='GPKG')
+                    print(self.temp_dir+self.case_name+'_source_shapefile.gpkg')
+                    print('EASYMORE created the shapefile from the netCDF file and saved it here:')
+                # intersection of the source and sink/target shapefile
+                if self.save_temp_shp:
+                    shp_1 = gpd.read_file(self.temp_dir+self.case_name+'_target_shapefile.gpkg')
+                    shp_2 = gpd.read_file(self.temp_dir+self.case_name+'_source_shapefile.gpkg')
+                else:
+                    shp_1 = target_shp_gpd
+                    shp_2 = source_shp_gpd
+                # correction of the source and target shapefile to frame of -180 to 180
+                min_lon_t, min_lat_t, max_lon_t, max_lat_t = shp_1.total_bounds # target
+                min_lon_s, min_lat_s, max_lon_s, max_lat_s = shp_2.total_bounds # source
+                if not ((min_lon_s<min_lon_t) and (max_lon_s>max_lon_t) and \
+                        (min_lat_s<min_lat_t) and (max_lat_s>max_lat_t)): # heck if taret is not in source
+                    print('EASMORE detects that target shapefile is outside the boundary of source netCDF file ',
+                          'and therefore correction for longitude values -180 to 180 or 0 to 360 if correction_shp_lon ',
+                          'flag is set to True [default is True]')
+                    if self.correction_shp_lon:
+                        print('correcting target shapefile')
+                        shp_1 = self.shp_lon_correction(shp_1)
+                        print('correcting source shapefile')
+                        shp_2 = self.shp_lon_correction(shp_2)
+                else: # it target is in source
+                    print('EASMORE detects that target shapefile is inside the boundary of source netCDF file ',
+                          'and therefore correction for longitude values -180 to 180 or 0 to 360 is not performed even if ',
+                          'the correction_shp_lon flag is set to True [default is True]')
+                if self.save_temp_shp:
+                    shp_1.to_file(self.temp_dir+self.case_name+'_target_shapefile_corrected_frame.gpkg', driver='GPKG')
+                    shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_corrected_frame.gpkg', driver='GPKG')
+                # # clip to the region of the target shapefile to speed up the intersection
+                # if self.clip_source_shp:
+                #     min_lon, min_lat, max_lon, max_lat = shp_1.total_bounds
+                #     min_lon, min_lat, max_lon, max_lat = min_lon - self.buffer_clip_source_shp, min_lat - self.buffer_clip_source_shp,\
+                #                                          max_lon + self.buffer_clip_source_shp, max_lat + self.buffer_clip_source_shp
+                #     shp_2 = shp_2[(shp_2['lat_s']<max_lat) & (shp_2['lat_s']>min_lat) & (shp_2['lon_s']<max_lon) & (shp_2['lon_s']>min_lon)]
+                #     shp_2.reset_index(drop=True, inplace=True)
+                #     if self.save_temp_shp:
+                #         if self.correction_shp_lon:
+                #             shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_corrected_frame_clipped.shp')
+                #         else:
+                #             shp_2.to_file(self.temp_dir+self.case_name+'_source_shapefile_clipped.shp')
+                # reprojections to equal area
+                if self.check_shp_crs(shp_1) and self.check_shp_crs(shp_2): #(str(shp_1.crs).lower() == str(shp_2.crs).lower()) and ('epsg:4326' in str(shp_1.crs).lower()):
+                    shp_1 = shp_1.to_crs ("EPSG:6933") # project to equal area
+                    shp_2 = shp_2.to_crs ("EPSG:6933") # project to equal area
+                    if self.save_temp_shp:
+                        shp_1.to_file(self.temp_dir+self.case_name+'test.gpkg', driver='GPKG')
+                        shp_1 = gpd.read_file(self.temp_dir+self.case_name+'test.gpkg')
+                        shp_2.to_file(self.temp_dir+self.case_name+'test.gpkg', driver='GPKG')
+                        shp_2 = gpd.read_file(self.temp_dir+self.case_name+'test.gpkg')
+                    # remove test files
+                    removeThese = glob.glob(self.temp_dir+self.case_name+'test.gpkg')
+                    for file in removeThese:
+                        os.remove(file)
+                else:
+                    sys.exit('The projection for source and target shapefile are not WGS84, please revise, assign')
+                # intersection
+                warnings.simplefilter('ignore')
+                shp_int = self.intersection_shp(shp_1, shp_2)
+                warnings.simplefilter('default')
+                shp_int = shp_int.sort_values(by=['S_1_ID_t']) # sort based on ID_t
+                shp_int = shp_int.to_crs ("EPSG:4326") # project back to WGS84
                 if self.save_temp_shp:
-                    shp_1.to_file(self.temp_dir+self.case_name+'test.gpkg', driver='GPKG')
-                    shp_1 = gpd.read_file(self.temp_dir+self.case_name+'test.gpkg')
-                    shp_2.to_file(self.temp_dir+self.case_name+'test.gpkg', driver='GPKG')
-                    shp_2 = gpd.read_file(self.temp_dir+self.case_name+'test.gpkg')
-                # remove test files
-                removeThese = glob.glob(self.temp_dir+self.case_name+'test.gpkg')
-                for file in removeThese:
-                    os.remove(file)
+                    shp_int.to_file(self.temp_dir+self.case_name+'_intersected_shapefile.gpkg', driver='GPKG') # save the intersected files
+                shp_int = shp_int.drop(columns=['geometry']) # remove the geometry
             else:
-                sys.exit('The projection for source and target shapefile are not WGS84, please revise, assign')
-            # intersection
-            warnings.simplefilter('ignore')
-            shp_int = self.intersection_shp(shp_1, shp_2)
-            warnings.simplefilter('default')
-            shp_int = shp_int.sort_values(by=['S_1_ID_t']) # sort based on ID_t
-            shp_int = shp_int.to_crs ("EPSG:4326") # project back to WGS84
-            if self.save_temp_shp:
-                shp_int.to_file(self.temp_dir+self.case_name+'_intersected_shapefile.gpkg', driver='GPKG') # save the intersected files
-            shp_int = shp_int.drop(columns=['geometry']) # remove the geometry
+                # locate the target points in the source netCDF file directly
+                shp_1, shp_int = self.create_remap_points(target_shp_gpd)
             # compare shp_1 or target shapefile with intersection to see if all the shape exists in intersection
             order_values_shp_1   = np.unique(np.array(shp_1['S_1_order']))
             order_values_shp_int = np.unique(np.array(shp_int['S_1_order']))
@@ -591,6 +914,8 @@ class Easymore:
             print('Ended at date and time ' + str(time_end))
             print('It took '+ str(time_diff.total_seconds())+' seconds to finish creating of the remapping file')
             print('---------------------------')
+            if self.work_dir is not None:
+                self.publish_work_dir_remap()
         else:
             # check the remap file if provided
             self.check_easymore_remap(self.remap_nc, attr_nc_name=self.attr_nc)
@@ -601,12 +926,9 @@ class Easymore:
             print('The remapping Located here: ', self.remap_nc)
         else:
             # prepare the remapping temporary file
-            ds_remap = xr.open_dataset(self.remap_nc)
-            remapping = ds_remap.to_dataframe()
-            ds_remap.close()
-            self.easymore_hash = ds_remap.attrs['easymore_hash']
-            self.remap_csv_temp = self.temp_dir+self.case_name+"_remapping_file_"+self.easymore_hash+".csv"
-            remapping.to_csv(self.remap_csv_temp)
+            remapping = self.prepare_remap_csv()
+            # load the remapping once, sliced and weighted, for this process and the workers
+            self.load_remap()
             # # slice attribute based on ID_t and save as temporary file
             # if self.attr_nc:
             #     ds_attr = xr.open_dataset(self.attr_nc)
@@ -618,6 +940,21 @@ class Easymore:
             #     ds_attr_sub.to_netcdf(self.attr_nc_temp)
             # get the nc file names
             nc_names = self.get_source_nc_file_names(self.source_nc) #sorted(glob.glob(self.source_nc, recursive=True))
+            # select the shard of nc files, e.g. for a task of a job array
+            if self.shard_count is not None:
+                nc_names = self.get_source_nc_shard(nc_names, len(remapping))
+                print('EASYMORE remaps shard ', self.shard_index, ' of ', self.shard_count, ' shards with ', len(nc_names), ' source nc file(s)')
+                if not nc_names:
+                    return
+            # skip the nc files that are already remapped if resume
+            if self.resume:
+                manifest = self.read_manifest()
+                nc_names_complete = [nc_name for nc_name in nc_names if self.check_manifest(nc_name, manifest)]
+                nc_names = [nc_name for nc_name in nc_names if nc_name not in nc_names_complete]
+                print('EASYMORE detects ', len(nc_names_complete), ' source nc file(s) that are already remapped based on the manifest: ',
+                      self.get_manifest_name(), '; remapping ', len(nc_names), ' remaining source nc file(s)')
+                if not nc_names:
+                    return
             # set the number of CPUs for possible parallel computing
             num_processes = multiprocessing.cpu_count()  # Use the number of available CPU cores
             num_processes = max (num_processes-1, 1) # reserve one cpu outside
@@ -641,7 +978,54 @@ class Easymore:
                     self.parallel = True # set the parallel flag to true in case if false
                     num_processes = min (len(nc_names), len(os.sched_getaffinity(0))) # assume the workers on one node, refer to job example
                     num_processes = max (num_processes, 1) # make sure max is 1
-            if self.parallel and (num_processes>1):
+            if self.save_csv:
+                self.save_remapped_csv_mapping()
+            if self.save_parquet:
+                self.save_remapped_parquet_mapping()
+            if self.output_format == 'zarr':
+                # remap the nc files, in parallel if possible, into the regions of one zarr store
+                if self.parallel and (num_processes>1):
+                    print('parallel remapping for nc files on ', num_processes, ' CPUs/workers into one zarr store')
+                else:
+                    num_processes = 1
+                self.target_zarr_creation(nc_names, num_processes)
+            elif self.output_format == 'time_series':
+                # remap the nc files, in parallel if possible, into one ID-major file
+                if self.parallel and (num_processes>1):
+                    print('parallel remapping for nc files on ', num_processes, ' CPUs/workers into one time series file')
+                else:
+                    num_processes = 1
+                self.target_time_series_creation(nc_names, num_processes)
+            elif self.merge_output or (self.output_period is not None) or (self.time_aggregation is not None):
+                # remap the nc files, in parallel if possible, and append them in order of time
+                if self.parallel and (num_processes>1):
+                    print('parallel remapping for nc files on ', num_processes, ' CPUs/workers appended to one file')
+                else:
+                    num_processes = 1
+                self.target_nc_merge(nc_names, num_processes)
+            elif self.work_dir is not None:
+                # claim the nc files through the shared work directory, largest first
+                if self.schedule_by_cost:
+                    costs = self.get_source_nc_cost(nc_names, len(remapping))
+                    nc_names = sorted(nc_names, key=lambda nc_name: -costs[nc_name])
+                if self.parallel and (num_processes>1):
+                    print('remapping nc files claimed from ', self.work_dir, ' on ', num_processes, ' CPUs/workers')
+                    import concurrent.futures
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+                        futures = [executor.submit(self.remap_work_dir, nc_names) for _ in range(num_processes)]
+                        concurrent.futures.wait(futures)
+                        for future in futures:
+                            future.result() # raise the error of the worker if any
+                else:
+                    print('remapping nc files claimed from ', self.work_dir)
+                    self.remap_work_dir(nc_names)
+            elif self.parallel and (num_processes>1):
+                # tasks of one or more nc files, largest first if scheduled by cost
+                if self.schedule_by_cost:
+                    tasks = self.schedule_source_nc(nc_names, num_processes, len(remapping))
+                else:
+                    tasks = [[nc_name] for nc_name in nc_names]
+                num_processes = min (len(tasks), num_processes)
                 print('parallel remapping for nc files on ', num_processes, ' CPUs/workers')
 
                 # # with multiprocessing tool
@@ -652,24 +1036,128 @@ class Easymore:
                 # pool.close()
                 # pool.join()
 
-                # Define chunking once outside
-                chunks = [nc_names[i:i + num_processes] for i in range(0, len(nc_names), num_processes)]
-                # print(chunks)
-                for chunk in chunks:
-                    import concurrent.futures
-                    with concurrent.futures.ProcessPoolExecutor(max_workers=len(chunk)) as executor:
-                        futures = [executor.submit(self.target_nc_creation, name) for name in chunk]
-                        concurrent.futures.wait(futures)
-
-                # # with concurrent
-                # import concurrent.futures
-                # with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
-                #     futures = [executor.submit(self.target_nc_creation, name) for name in nc_names]
-                #     concurrent.futures.wait(futures)
+                # the executor hands the next task to the first idle worker, so
+                # submitting the tasks largest first gives longest processing time
+                # first scheduling and avoids a straggler file at the tail of the run
+                import concurrent.futures
+                with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+                    futures = [executor.submit(self.target_nc_creation, task) for task in tasks]
+                    concurrent.futures.wait(futures)
+                    for future in futures:
+                        future.result() # raise the error of the worker if any
 
             else:
                 self.target_nc_creation(nc_names)
 
+    def iter_remapped(self,
+                      blocks=None,
+                      num_processes=1):
+        """
+        Yields the remapped variables of the source netcdf files in blocks of time steps
+        without writing the remapped files, e.g. to feed a model in the same Python process.
+
+        The remapping file is created if remap_nc is not given. The source netcdf files
+        are remapped in the order of their time; the next source netcdf files are read
+        ahead by prefetch_depth and, with more than one process, remapped in parallel.
+        Only the remapped values of a few source netcdf files and one block are held in
+        memory at any time.
+
+        Parameters
+        ----------
+        blocks : int, defaults to `None`
+            number of time steps of each yielded block; with `None` one block is
+            yielded per source netcdf file. The blocks run over the boundaries of
+            the source netcdf files, the last block may be shorter.
+        num_processes : int, defaults to `1`
+            number of processes that remap the source netcdf files.
+
+        Yields
+        ------
+        time : numpy array of datetime, the time steps of the block
+        ID : numpy array, the IDs of the target shapes in the order of the remapped values
+        values : dict of numpy arrays along (time, ID) with var_names_remapped, with
+            the suffix of the statistics other than mean, as keys; missing values are
+            given as fill_value_list
+
+        Examples
+        --------
+        >>> from easymore import Easymore
+        >>> esmr = Easymore()
+        >>> # set source_nc, var_names, target_shp or remap_nc etc. as for nc_remapper
+        >>> for time, ID, values in esmr.iter_remapped(blocks=24):
+        ...     model.step(time, ID, values['temperature'])
+        """
+        if self.remap_nc is None:
+            # create the remapping file only
+            only_create_remap_nc = self.only_create_remap_nc
+            self.only_create_remap_nc = True
+            try:
+                self.nc_remapper()
+            finally:
+                self.only_create_remap_nc = only_create_remap_nc
+        else:
+            # check EASYMORE input, the source nc file and the remap file
+            self.check_easymore_input()
+            self.check_source_nc()
+            self.check_easymore_remap(self.remap_nc, attr_nc_name=self.attr_nc)
+        self.prepare_remap_csv()
+        if (blocks is not None) and (int(blocks) < 1):
+            sys.exit('blocks should be a positive number of time steps or None')
+        nc_names = self.sort_source_nc_by_time(self.get_source_nc_file_names(self.source_nc))
+        hruID_var = self.load_remap()[1]
+        time_previous = None
+        var_names = [var_name for i, var_name, statistic in self.get_output_variables()]
+        buffer = {'time': [], 'values': {var_name: [] for var_name in var_names}}
+        def take_block(length):
+            # the first length time steps of the buffer
+            time_var = np.concatenate(buffer['time'])
+            buffer['time'] = [time_var[length:]]
+            values = {}
+            for var_name in var_names:
+                var_value = np.concatenate(buffer['values'][var_name])
+                values[var_name], buffer['values'][var_name] = var_value[:length], [var_value[length:]]
+            time_var = nc4.num2date(time_var[:length], time_previous['time_unit'], calendar=time_previous['time_cal'],
+                                    only_use_cftime_datetimes=False)
+            return np.atleast_1d(time_var), hruID_var, values
+        for source in self.aggregate_remapped_nc(self.iter_remapped_nc(nc_names, max(int(num_processes), 1))):
+            # time in the units of the first file
+            time_previous = self.check_source_time(source, time_previous)
+            buffer['time'].append(source['time'])
+            for var_name in var_names:
+                buffer['values'][var_name].append(source['values'][var_name])
+            del source
+            length = sum(len(t) for t in buffer['time'])
+            if blocks is None:
+                yield take_block(length)
+            else:
+                while length >= int(blocks):
+                    yield take_block(int(blocks))
+                    length -= int(blocks)
+        # the rest of the buffer
+        if (blocks is not None) and sum(len(t) for t in buffer['time']) > 0:
+            yield take_block(sum(len(t) for t in buffer['time']))
+
+    def prepare_remap_csv(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves the remapping file as the temporary remapping csv file that is
+        read by the remapping of the source netCDF files
+        """
+        ds_remap = xr.open_dataset(self.remap_nc)
+        remapping = ds_remap.to_dataframe()
+        ds_remap.close()
+        self.easymore_hash = ds_remap.attrs['easymore_hash']
+        self.remap_csv_temp = self.temp_dir+self.case_name+"_remapping_file_"+self.easymore_hash+".csv"
+        # write into a file of this process and rename it once complete, the processes
+        # that share the work_dir and temp_dir read the same remapping csv file
+        remap_csv_process = self.remap_csv_temp+'.'+str(os.getpid())+'.tmp'
+        remapping.to_csv(remap_csv_process)
+        os.replace(remap_csv_process, self.remap_csv_temp)
+        return remapping
+
     def get_source_nc_file_names(self,
                                  input_files):
 
@@ -694,6 +1182,87 @@ class Easymore:
         # return
         return nc_names
 
+    def get_source_nc_cost(self,
+                           nc_names,
+                           number_of_cells = 1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function estimates the cost of remapping each source netCDF file as the
+        length of time x number of remapped cells x number of variables; only the
+        metadata of the source netCDF files are read
+        Arguments
+        ---------
+        nc_names: list of nc file names
+        number_of_cells: int, number of source cells in the remapping file (rows of remapping file)
+        Returns
+        -------
+        costs: dictionary of nc file name and its estimated cost
+        """
+        costs = {}
+        for nc_name in nc_names:
+            ncid = nc4.Dataset(nc_name)
+            length_time = len(ncid.dimensions[self.var_time])
+            number_of_vars = len([var_name for var_name in self.get_source_var_names() if var_name in ncid.variables])
+            ncid.close()
+            costs[nc_name] = length_time * max(number_of_cells, 1) * max(number_of_vars, 1)
+        return costs
+
+    def schedule_source_nc(self,
+                           nc_names,
+                           num_processes,
+                           number_of_cells = 1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function groups the source netCDF files into tasks for parallel remapping.
+        Files with an estimated cost lower than pack_cost_fraction of the median cost of
+        the files are packed together into tasks of about the median cost, so a set of
+        files of similar sizes is not packed; the tasks are returned from the largest to
+        the smallest estimated cost (longest processing time first)
+        Arguments
+        ---------
+        nc_names: list of nc file names
+        num_processes: int, number of workers
+        number_of_cells: int, number of source cells in the remapping file (rows of remapping file)
+        Returns
+        -------
+        tasks: list of list of nc file names, sorted from the largest to the smallest cost
+        """
+        costs = self.get_source_nc_cost(nc_names, number_of_cells)
+        threshold = 0.0
+        capacity = 0.0
+        if self.pack_cost_fraction and costs:
+            capacity = float(np.median(list(costs.values()))) # cost of a typical file
+            threshold = self.pack_cost_fraction * capacity
+        tasks = []
+        task_costs = []
+        pack = []
+        pack_cost = 0
+        for nc_name in nc_names: # keep the time order of the files inside a pack
+            if costs[nc_name] >= threshold:
+                tasks.append([nc_name])
+                task_costs.append(costs[nc_name])
+                continue
+            if pack and (pack_cost + costs[nc_name] > capacity):
+                tasks.append(pack)
+                task_costs.append(pack_cost)
+                pack = []
+                pack_cost = 0
+            pack.append(nc_name)
+            pack_cost = pack_cost + costs[nc_name]
+        if pack:
+            tasks.append(pack)
+            task_costs.append(pack_cost)
+        # sort the tasks from the largest to the smallest cost; stable for equal costs
+        order = sorted(range(len(tasks)), key=lambda i: -task_costs[i])
+        tasks = [tasks[i] for i in order]
+        return tasks
+
     def create_source_shp(self):
         """
         @ author:                  Shervan Gharari
@@ -807,6 +1376,86 @@ class Easymore:
                 sys.exit('the number of provided variables from the source file and names to be remapped are not the same length')
         else:
             self.var_names_remapped = self.var_names
+        if self.output_format not in ('netcdf', 'zarr', 'time_series'):
+            sys.exit('output_format should be netcdf, zarr or time_series')
+        if self.point_method not in (None, 'cell', 'bilinear', 'idw'):
+            sys.exit('point_method should be None, cell, bilinear or idw')
+        if (self.point_method == 'idw') and (int(self.idw_neighbours) < 1):
+            sys.exit('idw_neighbours should be at least one')
+        if self.output_period not in (None, 'day', 'month', 'year'):
+            sys.exit('output_period should be None, day, month or year')
+        if (self.output_period is not None) and (self.merge_output or self.output_format != 'netcdf'):
+            sys.exit('output_period cannot be used with merge_output or zarr and time_series output_format')
+        if self.time_aggregation not in (None, 'day', 'month', 'year'):
+            sys.exit('time_aggregation should be None, day, month or year')
+        if self.time_aggregation_stat not in ('mean', 'sum', 'max', 'min'):
+            sys.exit('time_aggregation_stat should be mean, sum, max or min')
+        if (self.time_aggregation is not None) and (self.output_format == 'zarr'):
+            sys.exit('time_aggregation cannot be used with zarr output_format')
+        if (self.merge_output or (self.output_period is not None) or (self.time_aggregation is not None) or \
+            self.output_format != 'netcdf') and \
+           ((self.work_dir is not None) or (self.shard_count is not None) or self.resume):
+            sys.exit('merge_output, output_period, time_aggregation or zarr and time_series output_format '+\
+                     'cannot be used with work_dir, shard_count or resume')
+        if self.parquet_layout not in ('long', 'wide'):
+            sys.exit('parquet_layout should be either long or wide')
+        for quantization in ['significant_digits', 'least_significant_digit']:
+            digits = getattr(self, quantization)
+            if digits is None:
+                digits = [None]
+            elif not isinstance(digits, (list, tuple)):
+                digits = [digits]
+            if len(digits) == 1:
+                digits = list(digits) * len(self.var_names)
+            elif len(digits) != len(self.var_names):
+                sys.exit('number of variables and '+quantization+' do not match')
+            setattr(self, quantization, [None if digit is None else int(digit) for digit in digits])
+        for i in np.arange(len(self.var_names)):
+            if (self.significant_digits[i] is not None) and (self.least_significant_digit[i] is not None):
+                sys.exit('significant_digits and least_significant_digit cannot be both given for variable '+self.var_names[i])
+            if (self.significant_digits[i] is not None) and (self.significant_digits[i] < 1):
+                sys.exit('significant_digits should be at least one for variable '+self.var_names[i])
+        if any(digit is not None for digit in self.significant_digits) and not nc4.__has_quantization_support__:
+            sys.exit('significant_digits needs netCDF4 built with netCDF-C 4.9.0 or later')
+        self.derived_vars = self.get_derived_vars()
+        if isinstance(self.statistics, str):
+            self.statistics = [self.statistics]
+        if not self.statistics:
+            sys.exit('statistics should include at least one of mean, max, min, std or valid_frac')
+        for statistic in self.statistics:
+            if statistic not in ('mean', 'max', 'min', 'std', 'valid_frac'):
+                sys.exit('statistics should be mean, max, min, std or valid_frac, not '+str(statistic))
+        output_names = [var_name for i, var_name, statistic in self.get_output_variables()]
+        if len(output_names) != len(set(output_names)):
+            sys.exit('the remapped variables with the suffix of the statistics are not unique: '+\
+                     ', '.join(output_names))
+        if (self.weight_nc is None) != (self.weight_var is None):
+            sys.exit('weight_nc and weight_var should be given together')
+        if (self.weight_nc is not None) and not os.path.isfile(self.weight_nc):
+            sys.exit('weight_nc does not exist: '+str(self.weight_nc))
+        if (self.target_ids is not None) and (len(self.target_ids) == 0):
+            self.target_ids = None # all the target shapes
+        if self.target_ids is not None:
+            self.target_ids = np.unique(np.array(self.target_ids, dtype=float))
+        if self.output_units is None:
+            self.output_units = {}
+        if not isinstance(self.output_units, dict):
+            sys.exit('output_units should be a dictionary of the variables and their units such as {"t2m": "degC"}')
+        for var_name in self.output_units:
+            if var_name not in self.var_names:
+                sys.exit('variable '+str(var_name)+' of output_units is not in var_names')
+        if isinstance(self.parquet_compression, str):
+            self.parquet_compression = [self.parquet_compression]
+        if len(self.parquet_compression) == 1:
+            self.parquet_compression = self.parquet_compression * len(self.var_names)
+        elif len(self.parquet_compression) != len(self.var_names):
+            sys.exit('number of variables and parquet compression codecs do not match')
+        if self.chunk_access not in (None, 'time_series', 'map', 'balanced'):
+            sys.exit('chunk_access should be one of time_series, map or balanced')
+        if self.compression not in ('zlib', 'zstd', 'bzip2', 'szip', 'blosc_lz', 'blosc_lz4',
+                                    'blosc_lz4hc', 'blosc_zlib', 'blosc_zstd'):
+            sys.exit('compression should be one of zlib, zstd, bzip2, szip, blosc_lz, blosc_lz4, '+\
+                     'blosc_lz4hc, blosc_zlib or blosc_zstd')
         for i in np.arange(len(self.var_names)):
             print('EASYMORE will remap variable ',self.var_names[i],\
                   ' from source file to variable ',self.var_names_remapped[i],' in remapped netCDF file')
@@ -868,17 +1517,17 @@ class Easymore:
         else:
             print('EASYMORE detects that the field longitude is provided in sink/target shapefile')
             shp['lon_t'] = shp[self.target_shp_lon]
-        # check other geometries and add buffer if needed
+        # check other geometries and add buffer if needed; points are kept for point_method
         detected_points = False
         detected_multipoints = False
         detected_lines = False
         for index, _ in shp.iterrows():
             polys = shp.geometry.iloc[index] # get the shape
-            if polys.geom_type.lower() == "point"      or polys.geom_type.lower() == "points":
+            if (polys.geom_type.lower() == "point"      or polys.geom_type.lower() == "points") and (self.point_method is None):
                 detected_points = True
                 polys = polys.buffer(10**-5).simplify(10**-5)
                 shp.geometry.iloc[index] = polys
-            if polys.geom_type.lower() == "multipoint" or polys.geom_type.lower() == "multipoints":
+            if (polys.geom_type.lower() == "multipoint" or polys.geom_type.lower() == "multipoints") and (self.point_method is None):
                 detected_multipoints = True
                 polys = polys.buffer(10**-5).simplify(10**-5)
                 shp.geometry.iloc[index] = polys
@@ -943,7 +1592,7 @@ class Easymore:
                       'and assumes other netcdf source files are consistent with the first file: ', nc_names[0])
             # continue checking
             ncid      = nc4.Dataset(nc_names[0])
-            var_dim   = list(ncid.variables[self.var_names[0]].dimensions)
+            var_dim   = list(ncid.variables[self.get_source_var_names()[0]].dimensions)
             lat_dim   = list(ncid.variables[self.var_lat].dimensions)
             lon_dim   = list(ncid.variables[self.var_lon].dimensions)
             lat_value = np.array(ncid.variables[self.var_lat])
@@ -991,7 +1640,7 @@ class Easymore:
                     flag_do_not_match = True
                 ncid.close()
             # dimension check consistancy for variables to be remapped
-            for var_name in self.var_names:
+            for var_name in self.get_source_var_names():
                 # get the variable information of lat, lon and dimensions of the variable.
                 for nc_name in nc_names:
                     ncid = nc4.Dataset(nc_name)
@@ -1026,6 +1675,55 @@ in dimensions of the variables and latitude and longitude')
             print(lon_dim)
             print('EASYMORE detects that the latitude variables has dimensions of:')
             print(lat_dim)
+        # conversion of the units of the remapped variables
+        self.unit_conversions = self.get_unit_conversions(nc_names[0])
+
+    def get_unit_conversions(self,
+                             nc_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function resolves the conversion of the variables of output_units from their
+        units in the source netCDF file to their output units with pint; the conversion is
+        linear, a scale and an offset such as from K to degC
+        Arguments
+        ---------
+        nc_name: string, name of a source netCDF file
+        Returns
+        -------
+        unit_conversions: dict, scale, offset and output units of the variables of output_units
+        """
+        unit_conversions = {}
+        if not self.output_units:
+            return unit_conversions
+        import pint
+        ureg = pint.get_application_registry()
+        with nc4.Dataset(nc_name) as ncid:
+            for var_name, units in self.output_units.items():
+                if var_name in self.derived_vars:
+                    if 'units' not in self.derived_vars[var_name]:
+                        sys.exit('units is not provided for the derived variable '+var_name+' to be converted to '+str(units))
+                    source_units = str(self.derived_vars[var_name]['units'])
+                elif 'units' not in ncid.variables[var_name].ncattrs():
+                    sys.exit('units is not provided for the variable '+var_name+' in the source netCDF file '+\
+                             nc_name+' to be converted to '+str(units))
+                else:
+                    source_units = str(ncid.variables[var_name].units)
+                try:
+                    offset = ureg.Quantity(0.0, source_units).to(units).magnitude
+                    scale = ureg.Quantity(1.0, source_units).to(units).magnitude - offset
+                    linear = np.isclose(ureg.Quantity(2.0, source_units).to(units).magnitude, 2 * scale + offset)
+                except pint.PintError as error:
+                    sys.exit('EASYMORE cannot convert the units of the variable '+var_name+' from '+source_units+\
+                             ' to '+str(units)+': '+str(error))
+                if not linear:
+                    sys.exit('EASYMORE can only convert the units of the variable '+var_name+' from '+source_units+\
+                             ' to '+str(units)+' by a scale and an offset')
+                unit_conversions[var_name] = (float(scale), float(offset), str(units))
+                print('EASYMORE converts the units of the variable '+var_name+' from '+source_units+' to '+str(units))
+        return unit_conversions
 
     def check_source_nc_shp (self):
         """
@@ -1259,18 +1957,18 @@ in dimensions of the variables and latitude and longitude')
 
         #
         nc_names = self.get_source_nc_file_names(self.source_nc) # glob.glob(self.source_nc, recursive=True)
-        var_name = self.var_names[0]
+        var_name = self.get_source_var_names()[0]
         # open the nc file to read
         ncid = nc4.Dataset(nc_names[0])
         # deciding which case
         # case #1 regular latitude/longitude
         if (len(ncid.variables[self.var_lat].dimensions)==1) and\
         (len(ncid.variables[self.var_lon].dimensions)==1) and\
-        (len(ncid.variables[self.var_names[0]].dimensions)==3):
+        (len(ncid.variables[var_name].dimensions)==3):
             print('EASYMORE detects case 1 - regular lat/lon')
             self.case = 1
             # get the list of dimensions for the ncid sample variable
-            list_dim_name = list(ncid.variables[self.var_names[0]].dimensions)
+            list_dim_name = list(ncid.variables[var_name].dimensions)
             # get the location of lat dimensions
             location_of_lat = list_dim_name.index(list(ncid.variables[self.var_lat].dimensions)[0])
             locaiton_of_lon = list_dim_name.index(list(ncid.variables[self.var_lon].dimensions)[0])
@@ -1309,7 +2007,7 @@ in dimensions of the variables and latitude and longitude')
             self.lon = lon
         # case #3 1-D lat/lon and 2 data for irregulat shapes
         elif (len(ncid.variables[self.var_lat].dimensions)==1) and (len(ncid.variables[self.var_lon].dimensions)==1) and\
-           (len(ncid.variables[self.var_names[0]].dimensions)==2):
+           (len(ncid.variables[var_name].dimensions)==2):
             print('EASYMORE detects case 3 - irregular lat/lon; shapefile should be provided')
             self.case = 3
             lat = ncid.variables[self.var_lat][:]
@@ -1554,6 +2252,299 @@ in dimensions of the variables and latitude and longitude')
         result = gpd.read_file(temp_dir+case_name+'_source_shapefile_expanded.gpkg')
         return result
 
+    def create_remap_points(self,
+                            shp):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function finds the source grid or Voronoi region that contains each point of the
+        target shapefile directly from the lat and lon of the source netCDF file, without the
+        creation of the source shapefile and intersection; each point gets the source element
+        with a weight of one, or the weights of point_method bilinear or idw. The source
+        elements are located by the cell edges of the lat and lon axes for regular lat/lon
+        (case 1) and by the nearest center for rotated lat/lon (case 2) and irregular lat/lon
+        (case 3); with a source shapefile the points are located in its polygons. The parts of
+        a multipoint are located as points and weigh equally in the multipoint; the weights are
+        rescaled over the parts that are inside of the source domain
+        Arguments
+        ---------
+        shp: geopandas dataframe, target shapefile of points or multipoints from check_target_shp
+        Returns
+        -------
+        shp_1: geopandas dataframe, target shapefile with the fields prefixed by S_1_
+        shp_int: pandas dataframe, the points with the fields prefixed by S_1_, the ID, lat, lon,
+        rows and cols of the source elements and the weight AP1N; points outside of the source
+        domain are not included
+        """
+        import geopandas as gpd
+        if not all(geom_type.lower() in ('point', 'multipoint') for geom_type in shp.geometry.geom_type):
+            sys.exit('point_method needs a target shapefile of points or multipoints only')
+        # find the case and the lat and lon of the source nc file
+        self.NetCDF_SHP_lat_lon()
+        if (self.point_method == 'bilinear') and (self.case == 3):
+            sys.exit('bilinear point_method needs a regular or rotated lat/lon source netCDF file; use idw for irregular lat/lon')
+        lat = np.array(self.lat).astype(float)
+        lon = np.array(self.lon).astype(float)
+        # the parts of the multipoints as points and their target point
+        parts = shp.geometry.reset_index(drop=True).explode(index_parts=False)
+        part_index = np.array(parts.index).astype(int)
+        part_weight = 1.0 / np.bincount(part_index, minlength=len(shp))[part_index]
+        lat_p = np.array(parts.y).astype(float)
+        lon_p = np.array(parts.x).astype(float)
+        # correction of the longitude of the points to the frame of the source nc file
+        if self.correction_shp_lon:
+            lon_center = (np.nanmin(lon) + np.nanmax(lon)) / 2
+            lon_p = np.mod(lon_p - lon_center + 180, 360) - 180 + lon_center
+        if self.source_shp is not None:
+            # locate the points in the polygons of the source shapefile
+            source_shp_gpd = gpd.read_file(self.source_shp)
+            source_shp_gpd = self.add_lat_lon_source_SHP(source_shp_gpd, self.source_shp_lat,\
+                                                         self.source_shp_lon, self.source_shp_ID)
+            points = gpd.GeoDataFrame({'index_p': np.arange(len(lat_p))},
+                                      geometry=gpd.points_from_xy(lon_p, lat_p), crs=source_shp_gpd.crs)
+            joined = gpd.sjoin(points, source_shp_gpd[['lat_s', 'lon_s', 'geometry']], how='left', predicate='within')
+            joined = joined[~joined.index.duplicated(keep='first')].sort_values(by='index_p')
+            inside = np.array(~joined['lat_s'].isna())
+            lat_s = np.array(joined['lat_s'])[inside]
+            lon_s = np.array(joined['lon_s'])[inside]
+            rows = np.zeros(len(lat_s), dtype=int)
+            cols = np.zeros(len(lat_s), dtype=int)
+            # rows and cols of the source polygons that contain points
+            lat_lon_s, index_s = np.unique(np.stack([lat_s, lon_s], axis=1), axis=0, return_inverse=True)
+            rows_s, cols_s = self.create_row_col_df(lat, lon, lat_lon_s[:, 0], lat_lon_s[:, 1])
+            rows, cols = rows_s[np.ravel(index_s)].astype(int), cols_s[np.ravel(index_s)].astype(int)
+        elif self.case == 1:
+            # the lat and lon axes of the regular grid and the rows or columns along them
+            if np.all(lat == lat[:, :1]):
+                lat_axis, lon_axis, lat_along_rows = lat[:, 0], lon[0, :], True
+            else:
+                lat_axis, lon_axis, lat_along_rows = lat[0, :], lon[:, 0], False
+            def locate(axis, values):
+                # index of the cell with the edges half way between the centers along the axis
+                order = np.argsort(axis)
+                axis_sorted = axis[order]
+                if len(axis_sorted) > 1:
+                    edges = (axis_sorted[1:] + axis_sorted[:-1]) / 2
+                    lower = axis_sorted[0] - (axis_sorted[1] - axis_sorted[0]) / 2
+                    upper = axis_sorted[-1] + (axis_sorted[-1] - axis_sorted[-2]) / 2
+                elif self.source_nc_resolution is not None:
+                    edges = np.array([])
+                    lower = axis_sorted[0] - self.source_nc_resolution / 2
+                    upper = axis_sorted[0] + self.source_nc_resolution / 2
+                else:
+                    sys.exit("it seems the source netcdf file has 1 grid only or a row or column of grids;"+
+                             "user must specify source_nc_resolution in order to locate the points")
+                index = order[np.searchsorted(edges, values)]
+                return index, (values >= lower) & (values <= upper)
+            index_lat, inside_lat = locate(lat_axis, lat_p)
+            index_lon, inside_lon = locate(lon_axis, lon_p)
+            inside = inside_lat & inside_lon
+            if lat_along_rows:
+                rows, cols = index_lat[inside], index_lon[inside]
+            else:
+                rows, cols = index_lon[inside], index_lat[inside]
+        else:
+            # the nearest center of rotated lat/lon or irregular lat/lon (Voronoi region)
+            import shapely
+            centers = shapely.points(lon.flatten(), lat.flatten())
+            tree = shapely.STRtree(centers)
+            points = shapely.points(lon_p, lat_p)
+            index = tree.query_nearest(points, return_distance=False, all_matches=False)[1]
+            distance = shapely.distance(points, centers[index])
+            if self.case == 2:
+                # points farther than half of the diagonal of the nearest grid are outside of the domain
+                rows, cols = np.unravel_index(index, lat.shape)
+                spacing = np.zeros(len(index))
+                for row_shift, col_shift in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    rows_n = np.clip(rows + row_shift, 0, lat.shape[0]-1)
+                    cols_n = np.clip(cols + col_shift, 0, lat.shape[1]-1)
+                    spacing = np.maximum(spacing, np.hypot(lat[rows_n, cols_n]-lat[rows, cols], lon[rows_n, cols_n]-lon[rows, cols]))
+                inside = distance <= spacing * np.sqrt(2) / 2
+            else:
+                # the Voronoi diagram extends buffer_clip_source_shp beyond the stations
+                inside = (lat_p >= np.nanmin(lat) - self.buffer_clip_source_shp) & (lat_p <= np.nanmax(lat) + self.buffer_clip_source_shp) &\
+                         (lon_p >= np.nanmin(lon) - self.buffer_clip_source_shp) & (lon_p <= np.nanmax(lon) + self.buffer_clip_source_shp)
+                rows = cols = index
+            rows, cols = np.array(rows)[inside], np.array(cols)[inside]
+        # the points inside of the source domain and their weights
+        point_index = np.where(inside)[0]
+        weights = np.ones(len(point_index))
+        if self.point_method == 'bilinear':
+            rows, cols, weights = self.get_bilinear_weights(lat, lon, lat_p[inside], lon_p[inside], rows, cols)
+        if self.point_method == 'idw':
+            index, weights = self.get_idw_weights(lat, lon, lat_p[inside], lon_p[inside])
+            if self.case == 3:
+                rows = cols = index
+            else:
+                rows, cols = np.unravel_index(index, lat.shape)
+        if self.point_method in ('bilinear', 'idw'):
+            # one row per point and source element with a weight
+            point_index = np.repeat(point_index, weights.shape[1])
+            rows, cols, weights = np.ravel(rows), np.ravel(cols), np.ravel(weights)
+            keep = weights > 0
+            point_index, rows, cols, weights = point_index[keep], rows[keep], cols[keep], weights[keep]
+        # the parts of a multipoint weigh equally and those in the same source element are one row
+        located = pd.DataFrame({'point': part_index[point_index], 'rows': rows, 'cols': cols,
+                                'weight': weights * part_weight[point_index]})
+        located = located.groupby(['point', 'rows', 'cols'], as_index=False, sort=True)['weight'].sum()
+        located['weight'] = located['weight'] / located.groupby('point')['weight'].transform('sum')
+        point_index = np.array(located['point']).astype(int)
+        rows = np.array(located['rows']).astype(int)
+        cols = np.array(located['cols']).astype(int)
+        weights = np.array(located['weight'])
+        # the target shapefile with the fields prefixed by S_1_ as from intersection
+        shp_1 = shp.copy()
+        shp_1.columns = ['S_1_' + column if column != 'geometry' else column for column in shp_1.columns]
+        shp_int = pd.DataFrame(shp_1.drop(columns=['geometry'])).iloc[point_index].reset_index(drop=True)
+        if self.case == 3:
+            shp_int['S_2_ID_s'] = np.array(self.ID)[rows]
+            shp_int['S_2_lat_s'] = lat[rows]
+            shp_int['S_2_lon_s'] = lon[rows]
+        else:
+            shp_int['S_2_ID_s'] = np.ravel_multi_index((rows, cols), lat.shape) + 1
+            shp_int['S_2_lat_s'] = lat[rows, cols]
+            shp_int['S_2_lon_s'] = lon[rows, cols]
+        shp_int['rows'] = rows
+        shp_int['cols'] = cols
+        shp_int['AP1N'] = weights
+        print('EASYMORE located ', len(np.unique(point_index)), ' of ', len(shp), ' target point(s) in the source netCDF file')
+        return shp_1, shp_int
+
+    def get_bilinear_weights(self,
+                             lat,
+                             lon,
+                             lat_p,
+                             lon_p,
+                             rows,
+                             cols):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function calculates the bilinear interpolation weights of the four grid centers
+        around each point for regular lat/lon (case 1) and rotated lat/lon (case 2). The
+        fractions are found along the lat and lon axes for regular lat/lon and by inverting
+        the bilinear mapping of the quadrilaterals of the grid centers around the nearest grid
+        for rotated lat/lon. Points between the outer grid centers and the edge of the domain
+        take the value of the nearest grid
+        Arguments
+        ---------
+        lat: numpy array, 2D lat of the source grid centers
+        lon: numpy array, 2D lon of the source grid centers
+        lat_p: numpy array, lat of the points
+        lon_p: numpy array, lon of the points
+        rows: numpy array, row of the grid that contains each point
+        cols: numpy array, column of the grid that contains each point
+        Returns
+        -------
+        rows: numpy array, rows of the four grids of each point along (point, 4)
+        cols: numpy array, columns of the four grids of each point along (point, 4)
+        weights: numpy array, weights of the four grids of each point along (point, 4)
+        """
+        if self.case == 1:
+            def bracket(axis, values):
+                # the two centers along the axis around the values and the fraction between them
+                order = np.argsort(axis)
+                axis_sorted = axis[order]
+                if len(axis_sorted) == 1:
+                    return order[np.zeros(len(values), dtype=int)], order[np.zeros(len(values), dtype=int)], np.zeros(len(values))
+                position = np.clip(np.searchsorted(axis_sorted, values), 1, len(axis_sorted)-1)
+                fraction = (values - axis_sorted[position-1]) / (axis_sorted[position] - axis_sorted[position-1])
+                return order[position-1], order[position], np.clip(fraction, 0, 1)
+            if np.all(lat == lat[:, :1]):
+                index_0, index_1, fraction_0 = bracket(lat[:, 0], lat_p)
+                index_2, index_3, fraction_1 = bracket(lon[0, :], lon_p)
+            else:
+                index_0, index_1, fraction_0 = bracket(lon[:, 0], lon_p)
+                index_2, index_3, fraction_1 = bracket(lat[0, :], lat_p)
+            rows = np.stack([index_0, index_1, index_0, index_1], axis=1)
+            cols = np.stack([index_2, index_2, index_3, index_3], axis=1)
+            s, t = fraction_0, fraction_1
+        else:
+            # inverse of the bilinear mapping for the quadrilaterals around the nearest grid
+            n_row, n_col = lat.shape
+            s = np.full(len(lat_p), np.nan)
+            t = np.full(len(lat_p), np.nan)
+            row_0 = np.array(rows)
+            col_0 = np.array(cols)
+            for row_shift, col_shift in [(0, 0), (-1, 0), (0, -1), (-1, -1)]:
+                rows_q = np.clip(np.array(rows) + row_shift, 0, max(n_row-2, 0))
+                cols_q = np.clip(np.array(cols) + col_shift, 0, max(n_col-2, 0))
+                rows_q1 = np.minimum(rows_q + 1, n_row-1)
+                cols_q1 = np.minimum(cols_q + 1, n_col-1)
+                corners = [np.stack([lon[r, c], lat[r, c]], axis=1) for r, c in
+                           [(rows_q, cols_q), (rows_q1, cols_q), (rows_q, cols_q1), (rows_q1, cols_q1)]]
+                point = np.stack([lon_p, lat_p], axis=1)
+                s_q = np.full(len(lat_p), 0.5)
+                t_q = np.full(len(lat_p), 0.5)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    for _ in range(20):
+                        residual = (1-s_q)[:,None]*(1-t_q)[:,None]*corners[0] + s_q[:,None]*(1-t_q)[:,None]*corners[1] +\
+                                   (1-s_q)[:,None]*t_q[:,None]*corners[2] + s_q[:,None]*t_q[:,None]*corners[3] - point
+                        d_s = (1-t_q)[:,None]*(corners[1]-corners[0]) + t_q[:,None]*(corners[3]-corners[2])
+                        d_t = (1-s_q)[:,None]*(corners[2]-corners[0]) + s_q[:,None]*(corners[3]-corners[1])
+                        determinant = d_s[:,0]*d_t[:,1] - d_s[:,1]*d_t[:,0]
+                        s_q = s_q - ( d_t[:,1]*residual[:,0] - d_t[:,0]*residual[:,1]) / determinant
+                        t_q = t_q - (-d_s[:,1]*residual[:,0] + d_s[:,0]*residual[:,1]) / determinant
+                found = np.isnan(s) & (s_q >= -1e-6) & (s_q <= 1+1e-6) & (t_q >= -1e-6) & (t_q <= 1+1e-6) &\
+                        (rows_q1 > rows_q) & (cols_q1 > cols_q)
+                s[found], t[found] = s_q[found], t_q[found]
+                row_0[found], col_0[found] = rows_q[found], cols_q[found]
+            # the nearest grid for the points outside of the quadrilaterals
+            outside = np.isnan(s)
+            s[outside], t[outside] = 0.0, 0.0
+            row_0[outside], col_0[outside] = np.array(rows)[outside], np.array(cols)[outside]
+            s, t = np.clip(s, 0, 1), np.clip(t, 0, 1)
+            rows = np.stack([row_0, np.minimum(row_0+1, n_row-1), row_0, np.minimum(row_0+1, n_row-1)], axis=1)
+            cols = np.stack([col_0, col_0, np.minimum(col_0+1, n_col-1), np.minimum(col_0+1, n_col-1)], axis=1)
+        weights = np.stack([(1-s)*(1-t), s*(1-t), (1-s)*t, s*t], axis=1)
+        return rows, cols, weights
+
+    def get_idw_weights(self,
+                        lat,
+                        lon,
+                        lat_p,
+                        lon_p):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function calculates the inverse distance weights of the idw_neighbours nearest
+        source elements of each point; the nearest elements are found by a k-d tree of the
+        source elements on the unit sphere. A point on a source element takes its value only
+        Arguments
+        ---------
+        lat: numpy array, lat of the source elements
+        lon: numpy array, lon of the source elements
+        lat_p: numpy array, lat of the points
+        lon_p: numpy array, lon of the points
+        Returns
+        -------
+        index: numpy array, flat index of the nearest source elements along (point, neighbour)
+        weights: numpy array, weights of the nearest source elements along (point, neighbour)
+        """
+        from scipy.spatial import cKDTree
+        def unit_vector(lat, lon):
+            lat, lon = np.radians(np.ravel(lat)), np.radians(np.ravel(lon))
+            return np.stack([np.cos(lat)*np.cos(lon), np.cos(lat)*np.sin(lon), np.sin(lat)], axis=1)
+        tree = cKDTree(unit_vector(lat, lon))
+        neighbours = min(int(self.idw_neighbours), tree.n)
+        distance, index = tree.query(unit_vector(lat_p, lon_p), k=neighbours)
+        distance = distance.reshape(len(lat_p), neighbours)
+        index = index.reshape(len(lat_p), neighbours)
+        with np.errstate(divide='ignore'):
+            weights = 1 / np.power(distance, self.idw_power)
+        # points on a source element
+        on_element = distance[:, 0] < 1e-12
+        weights[on_element, :] = 0.0
+        weights[on_element, 0] = 1.0
+        weights = weights / np.sum(weights, axis=1, keepdims=True)
+        return index, weights
+
     def create_remap(   self,
                         int_df,
                         lat_source,
@@ -1576,8 +2567,17 @@ in dimensions of the variables and latitude and longitude')
         # the lat lon from the intersection/remap
         lat_source_int = np.array(int_df['lat_s'])
         lon_source_int = np.array(int_df['lon_s'])
-        # call get row and col function
-        rows, cols = self.create_row_col_df (lat_source, lon_source, lat_source_int, lon_source_int)
+        if ('rows' in int_df.columns) and ('cols' in int_df.columns):
+            # rows and columns that are already located, such as for point_method
+            missing = np.array(int_df['rows'].isna() | int_df['cols'].isna())
+            rows = np.array(int_df['rows']).astype(float)
+            cols = np.array(int_df['cols']).astype(float)
+            if missing.any():
+                rows[missing], cols[missing] = self.create_row_col_df (lat_source, lon_source,
+                                                                       lat_source_int[missing], lon_source_int[missing])
+        else:
+            # call get row and col function
+            rows, cols = self.create_row_col_df (lat_source, lon_source, lat_source_int, lon_source_int)
         # add rows and columns
         int_df['rows'] = rows
         int_df['cols'] = cols
@@ -1626,6 +2626,249 @@ in dimensions of the variables and latitude and longitude')
         # pass to class
         return rows, cols
 
+    def aggregate_remap(self,
+                        membership,
+                        remap_nc = None,
+                        aggregated_remap_nc = None):
+        """
+        Creates the remapping file of coarser target shapes from an existing remapping file of
+        finer target shapes and a table of the fine shapes in each coarse shape, without any
+        intersection of shapefiles.
+
+        The weights of the source grids for a coarse shape are the weights of the source grids
+        for its fine shapes multiplied by the weights of the fine shapes in the coarse shape,
+        which are normalized to add up to one for every coarse shape over its fine shapes inside
+        of the source domain. The created remapping
+        file can be given as remap_nc to nc_remapper to remap the source netcdf files to the
+        coarse shapes.
+
+        Parameters
+        ----------
+        membership : str or pandas.DataFrame
+            csv file or dataframe with the fields `ID_t`, ID of the fine shapes in the
+            remapping file, and `ID_c`, ID of the coarse shapes. The optional field `weight`,
+            such as the area of the fine shapes or of their overlap with the coarse shapes,
+            weights the fine shapes in a coarse shape; equal weights if not provided. The
+            optional fields `lat_c` and `lon_c` are the lat and lon of the coarse shapes;
+            the weighted lat and lon of the fine shapes if not provided.
+        remap_nc : str, defaults to `None`
+            the remapping file of the fine shapes; remap_nc of the object if `None`.
+        aggregated_remap_nc : str, defaults to `None`
+            name of the created remapping file;
+            `temp_dir + case_name + '_remapping.nc'` if `None`.
+
+        Returns
+        -------
+        aggregated_remap_nc : str, name of the created remapping file that is also set as
+            remap_nc of the object
+        """
+        if remap_nc is None:
+            remap_nc = self.remap_nc
+        if remap_nc is None:
+            sys.exit('remap_nc of the fine shapes should be provided for aggregate_remap')
+        if isinstance(membership, str):
+            membership = pd.read_csv(membership)
+        membership = pd.DataFrame(membership).copy()
+        if not set(['ID_t', 'ID_c']) <= set(membership.columns):
+            sys.exit('the membership table should have the fields ID_t and ID_c')
+        if 'weight' not in membership.columns:
+            membership['weight'] = 1.0
+        ds_remap = xr.open_dataset(remap_nc)
+        remap = ds_remap.to_dataframe().reset_index(drop=True)
+        ds_remap.close()
+        remapping = self.propagate_remap_weights(remap, membership)
+        if aggregated_remap_nc is None:
+            aggregated_remap_nc = self.temp_dir+self.case_name+'_remapping.nc'
+        self.save_remap(remapping, aggregated_remap_nc, 'Created by EASYMORE aggregate_remap from '+remap_nc)
+        print('EASYMORE created the remapping file of ', remapping['order_t'].max(), ' coarse shapes from the remapping file of ',
+              len(np.unique(remap['ID_t'])), ' shapes: ', aggregated_remap_nc)
+        return aggregated_remap_nc
+
+    def compose_remap(self,
+                      remap_nc_1,
+                      remap_nc_2,
+                      composed_remap_nc = None):
+        """
+        Composes two remapping files, from A to B and from B to C, into the remapping file from
+        A to C without any intersection of shapefiles.
+
+        The weight of a source grid of A for a target shape of C is the sum over the shapes of B
+        of the weight of the shape of B for the shape of C and of the grid of A for the shape
+        of B; a sparse product of the two remappings. The shapes of B are matched by their ID,
+        the target ID_t of the first and the source ID_s of the second remapping file, and
+        their lat and lon should agree within tolerance. The order_t, ID_t, lat_t and lon_t of
+        the shapes of C are taken from the second remapping file and the rows, cols, lat_s and
+        lon_s of the grids of A from the first. The created remapping file can be given as
+        remap_nc to nc_remapper to remap the source netcdf files of A to C; the values are the
+        same as remapping A to B and B to C unless values are missing, as the weights are then
+        rescaled over the grids of A instead of the shapes of B. The shapes of B outside of the
+        domain of A are left out and the weights of the shapes of C are rescaled over the other
+        shapes of B. The hashes of the two remapping files are saved as the attributes
+        easymore_hash_1 and easymore_hash_2 of the created remapping file.
+
+        Parameters
+        ----------
+        remap_nc_1 : str
+            the remapping file from A to B.
+        remap_nc_2 : str
+            the remapping file from B to C, where B is the source, e.g. as irregular lat/lon.
+        composed_remap_nc : str, defaults to `None`
+            name of the created remapping file;
+            `temp_dir + case_name + '_remapping.nc'` if `None`.
+
+        Returns
+        -------
+        composed_remap_nc : str, name of the created remapping file that is also set as
+            remap_nc of the object
+        """
+        remaps = []
+        hashes = []
+        for remap_nc in [remap_nc_1, remap_nc_2]:
+            ds_remap = xr.open_dataset(remap_nc)
+            if 'easymore_hash' not in ds_remap.attrs:
+                sys.exit('the remapping file does not have an easymore_hash: '+remap_nc)
+            hashes.append(ds_remap.attrs['easymore_hash'])
+            remap = ds_remap.to_dataframe().reset_index(drop=True)
+            ds_remap.close()
+            if not set(['ID_t','lat_t','lon_t','order_t','ID_s','lat_s','lon_s','weight','rows','cols','easymore_case']) <= set(remap.columns):
+                sys.exit('provided remapping file does not have one of the needed fields: \n'+\
+                    'ID_t, lat_t, lon_t, order_t, ID_s, lat_s, lon_s, weight, rows, cols, easymore_case: '+remap_nc)
+            remaps.append(remap)
+        if hashes[0] == hashes[1]:
+            sys.exit('the two remapping files have the same easymore_hash; they should be from A to B and from B to C')
+        remap_1, remap_2 = remaps
+        # the shapes of B as target of the first and source of the second remapping
+        lat_lon_b = remap_1[['ID_t', 'lat_t', 'lon_t']].drop_duplicates(subset='ID_t')
+        source_b = remap_2[remap_2['weight'] > 0][['ID_s', 'lat_s', 'lon_s']].drop_duplicates(subset='ID_s')
+        source_b = source_b.merge(lat_lon_b, left_on='ID_s', right_on='ID_t', how='left')
+        if source_b['ID_t'].isna().any():
+            sys.exit('the sources of the second remapping file are not the targets of the first remapping file: '+\
+                     str(np.array(source_b.loc[source_b['ID_t'].isna(), 'ID_s'])[:10]))
+        mismatch = (np.abs(source_b['lat_s']-source_b['lat_t']) > self.tolerance) |\
+                   (np.abs(np.mod(source_b['lon_s']-source_b['lon_t']+180, 360)-180) > self.tolerance)
+        if mismatch.any():
+            sys.exit('the lat and lon of the sources of the second remapping file differ from the lat and lon '+\
+                     'of the targets of the first remapping file with the same ID by more than tolerance: '+\
+                     str(np.array(source_b.loc[mismatch, 'ID_s'])[:10]))
+        # the shapes of C in the order of the second remapping file
+        table = remap_2.sort_values(by='order_t')
+        table = pd.DataFrame({'ID_t': table['ID_s'], 'ID_c': table['ID_t'], 'weight': table['weight'],
+                              'lat_c': table['lat_t'], 'lon_c': table['lon_t']})
+        sort_ID = self.sort_ID
+        self.sort_ID = False
+        try:
+            remapping = self.propagate_remap_weights(remap_1, table)
+        finally:
+            self.sort_ID = sort_ID
+        if composed_remap_nc is None:
+            composed_remap_nc = self.temp_dir+self.case_name+'_remapping.nc'
+        self.save_remap(remapping, composed_remap_nc, 'Created by EASYMORE compose_remap from '+remap_nc_1+\
+                        ' (easymore_hash '+hashes[0]+') and '+remap_nc_2+' (easymore_hash '+hashes[1]+')',
+                        attributes={'easymore_hash_1': hashes[0], 'easymore_hash_2': hashes[1]})
+        print('EASYMORE composed the remapping file of ', remapping['order_t'].max(), ' target shapes: ', composed_remap_nc)
+        return composed_remap_nc
+
+    def propagate_remap_weights(self,
+                                remap,
+                                table):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function propagates the weights of a remapping to coarser target shapes; the
+        weight of a source grid for a coarse shape is the sum over the fine shapes of the weight
+        of the fine shape in the coarse shape and of the source grid for the fine shape
+        Arguments
+        ---------
+        remap: pandas dataframe, remapping of the fine shapes with the fields ID_t, lat_t, lon_t,
+        order_t, ID_s, lat_s, lon_s, weight, rows, cols and easymore_case
+        table: pandas dataframe, the fine shapes in the coarse shapes with the fields ID_t, ID_c
+        and weight and optionally lat_c and lon_c
+        Returns
+        -------
+        remapping: pandas dataframe, remapping of the coarse shapes with the same fields
+        """
+        # order of the coarse shapes
+        ID_c = pd.unique(table['ID_c'])
+        if self.sort_ID:
+            ID_c = np.sort(ID_c)
+        order_c = pd.Series(np.arange(len(ID_c))+1, index=ID_c)
+        # lat and lon of the coarse shapes
+        if set(['lat_c', 'lon_c']) <= set(table.columns):
+            lat_lon_c = table.groupby('ID_c')[['lat_c', 'lon_c']].first()
+        # the fine shapes with weight in the coarse shapes should be in the remapping
+        table = table[table['weight'] > 0].copy()
+        missing = np.setdiff1d(np.array(table['ID_t']), np.array(remap['ID_t']))
+        if missing.size > 0:
+            sys.exit('the table has shapes that are not targets of the remapping file: '+str(missing[:10]))
+        table['weight'] = table['weight'] / table.groupby('ID_c')['weight'].transform('sum')
+        if not (set(['lat_c', 'lon_c']) <= set(table.columns)):
+            lat_lon_t = remap[['ID_t', 'lat_t', 'lon_t']].drop_duplicates(subset='ID_t')
+            lat_lon_c = table[['ID_t', 'ID_c', 'weight']].merge(lat_lon_t, on='ID_t')
+            lat_lon_c['lat_c'] = lat_lon_c['lat_t'] * lat_lon_c['weight']
+            lat_lon_c['lon_c'] = lat_lon_c['lon_t'] * lat_lon_c['weight']
+            lat_lon_c = lat_lon_c.groupby('ID_c')[['lat_c', 'lon_c']].sum()
+        lat_lon_c = lat_lon_c.reindex(ID_c)
+        # weight propagation
+        fine = remap[~remap['weight'].isna()][['ID_t', 'ID_s', 'lat_s', 'lon_s', 'rows', 'cols', 'weight', 'easymore_case']]
+        remapping = table[['ID_t', 'ID_c', 'weight']].merge(fine, on='ID_t', suffixes=('_c', ''))
+        remapping['weight'] = remapping['weight_c'] * remapping['weight']
+        remapping = remapping.groupby(['ID_c', 'rows', 'cols'], as_index=False).agg({'ID_s': 'first',
+                                                                                     'lat_s': 'first',
+                                                                                     'lon_s': 'first',
+                                                                                     'weight': 'sum',
+                                                                                     'easymore_case': 'first'})
+        # the weights of a coarse shape add up to one over its fine shapes with source grids,
+        # as the fine shapes outside of the source domain have no weight
+        remapping['weight'] = remapping['weight'] / remapping.groupby('ID_c')['weight'].transform('sum')
+        # coarse shapes with no source grid carry nan as the shapes outside of the source domain
+        ID_c_missing = np.setdiff1d(ID_c, np.array(remapping['ID_c']))
+        if ID_c_missing.size > 0:
+            remapping_missing = pd.DataFrame({'ID_c': ID_c_missing, 'rows': 0, 'cols': 0, 'ID_s': np.nan,
+                                              'lat_s': 0.00, 'lon_s': 0.00, 'weight': np.nan,
+                                              'easymore_case': remap['easymore_case'].iloc[0]})
+            remapping = pd.concat([remapping, remapping_missing], axis=0)
+        remapping = remapping.rename(columns={'ID_c': 'ID_t'})
+        remapping['lat_t'] = np.array(lat_lon_c.loc[remapping['ID_t'], 'lat_c'])
+        remapping['lon_t'] = np.array(lat_lon_c.loc[remapping['ID_t'], 'lon_c'])
+        remapping['order_t'] = np.array(order_c.loc[remapping['ID_t']])
+        remapping = remapping.sort_values(by=['order_t', 'rows', 'cols']).reset_index(drop=True)
+        return remapping[['ID_t', 'lat_t', 'lon_t', 'order_t', 'ID_s', 'lat_s', 'lon_s', 'weight', 'rows', 'cols', 'easymore_case']]
+
+    def save_remap(self,
+                   remapping,
+                   remap_nc_name,
+                   history,
+                   attributes = None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves a remapping dataframe as a remapping file with a new hash and sets
+        it as remap_nc of the object
+        Arguments
+        ---------
+        remapping: pandas dataframe, the remapping
+        remap_nc_name: string, name of the remapping file
+        history: string, history attribute of the remapping file
+        attributes: dict, other attributes of the remapping file such as the hashes of the
+        remapping files it is created from
+        """
+        self.easymore_hash = hashlib.sha256(secrets.token_hex(8).encode()).hexdigest()
+        remapping = remapping.reset_index(drop=True).to_xarray()
+        remapping = remapping.rename({'index': 'frequency'})
+        remapping.attrs['title'] = 'Remapping file created by EASYMORE'
+        remapping.attrs['history'] = history
+        remapping.attrs['easymore_hash'] = self.easymore_hash
+        remapping.attrs.update(attributes or {})
+        if os.path.isfile(remap_nc_name):
+            os.remove(remap_nc_name)
+        remapping.to_netcdf(remap_nc_name)
+        self.remap_nc = remap_nc_name
+        self.attr_nc = None
+
     def check_easymore_remap(self,
                              remap_nc_name,
                              attr_nc_name = None):
@@ -1693,343 +2936,3046 @@ in dimensions of the variables and latitude and longitude')
         nc_names: list of nc file names to be remapped, or string of single names
         """
         print('------REMAPPING------')
-        remap = pd.read_csv(self.remap_csv_temp)
-        remap = remap.apply(pd.to_numeric, errors='coerce') # convert non numeric to NaN
-        # creating the target_ID_lat_lon
-        target_ID_lat_lon = pd.DataFrame()
-        target_ID_lat_lon ['ID_t']  = remap ['ID_t']
-        target_ID_lat_lon ['lat_t'] = remap ['lat_t']
-        target_ID_lat_lon ['lon_t'] = remap ['lon_t']
-        target_ID_lat_lon ['order_t'] = remap ['order_t']
-        target_ID_lat_lon = target_ID_lat_lon.drop_duplicates()
-        target_ID_lat_lon = target_ID_lat_lon.sort_values(by=['order_t'])
-        target_ID_lat_lon = target_ID_lat_lon.reset_index(drop=True)
-        # prepare the hru_id (here COMID), lat, lon
-        hruID_var = np.array(target_ID_lat_lon['ID_t'])
-        hruID_lat = np.array(target_ID_lat_lon['lat_t'])
-        hruID_lon = np.array(target_ID_lat_lon['lon_t'])
-        #
-        self.rows = np.array(remap['rows']).astype(int)
-        self.cols = np.array(remap['cols']).astype(int)
-        self.number_of_target_elements = len(hruID_var)
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
         # check compression choice
-        if isinstance(self.complevel, int) and (self.complevel >=1) and (self.complevel<=9):
-            compflag = True
-            complevel = self.complevel
-            print('netcdf output file will be compressed at level', complevel)
-        else:
-            compflag = False
-            complevel = 0
-            print('netcdf output file will not be compressed.')
+        compflag, complevel = self.get_compression()
         if isinstance(nc_names, str):
             nc_names = [nc_names]  # Convert the string to a list
-        for nc_name in nc_names:
-            # get the time unit and time var from source
-            ncids = nc4.Dataset(nc_name)
-            # Check data license, calendar and time units
-            nc_att_list = ncids.ncattrs()
-            nc_att_list = [each_att for each_att in nc_att_list]
-            nc_att_list_lower = [each_att.lower() for each_att in nc_att_list]
-            if self.license is None and ('license' not in nc_att_list_lower):
-                self.license == 'the original license of the source NetCDF file is not provided'
-            if ('license' in nc_att_list_lower):
-                if 'license' in nc_att_list:
-                    self.license == getattr(ncids, 'license')
-                elif 'License' in nc_att_list:
-                    self.license == getattr(ncids, 'License')
-                elif 'LICENSE' in nc_att_list:
-                    self.license == getattr(ncids, 'LICENSE')
-                else:
-                    self.license = ''
-                self.license == 'Original data license '+str(self.license)
-            if 'units' in ncids.variables[self.var_time].ncattrs():
-                time_unit = ncids.variables[self.var_time].units
-            else:
-                sys.exit('units is not provided for the time variable for source NetCDF of'+ nc_name)
-            if 'calendar' in ncids.variables[self.var_time].ncattrs():
-                time_cal = ncids.variables[self.var_time].calendar
-            else:
-                sys.exit('calendar is not provided for the time variable for source NetCDF of'+ nc_name)
-            time_var = ncids[self.var_time][:]
-
-            #self.length_of_time = len(time_var)
-            #target_date_times = nc4.num2date(time_var,units = time_unit,calendar = time_cal)
-            #target_name = self.output_dir + self.case_name + '_remapped_' + target_date_times[0].strftime("%Y-%m-%d-%H-%M-%S")+'.nc'
-
-            target_name = self.output_dir + self.case_name + '_remapped_' + os.path.basename(nc_name)
-
-            if os.path.exists(target_name):
-                os.remove(target_name)
-            for var in ncids.variables.values():
-                if var.name == self.var_time:
-                    time_dtype =  str(var.dtype)
-            time_dtype_code = 'f8' # initialize the time as float
-            if 'float' in time_dtype.lower():
-                time_dtype_code = 'f8'
-            elif 'int' in time_dtype.lower():
-                time_dtype_code = 'i4'
-
-            # get the history
-            org_hist = ''
-            org_license = ''
-            global_attributes = ncids.__dict__
-            for key in global_attributes.keys():
-                if 'history' in key.lower():
-                    org_hist = org_hist +' '+ key + ': '+ global_attributes[key]
-                if 'license' in key.lower():
-                    org_license = org_license +' '+ key + ': '+ global_attributes[key]
-            # time bound
-            time_bounds_data = None
-            if self.var_time_bound is not None:
-                time_bounds_data = source_file.variables[self.var_time_bound][:]
-
-            # reporting
-            statement_print = 'Remapping '+nc_name+' to '+target_name+' \n'
-            time_start = datetime.now()
-            statement_print = statement_print + 'Started at date and time '+ str(time_start) + ' \n'
-            with nc4.Dataset(target_name, "w", format="NETCDF4") as ncid: # creating the NetCDF file
-                # define the dimensions
-                dimid_N = ncid.createDimension(self.remapped_dim_id, len(hruID_var))  # limited dimensiton equal the number of hruID
-                dimid_T = ncid.createDimension('time', None)   # unlimited dimensiton
-                # Variable time
-                time_varid = ncid.createVariable('time', time_dtype_code, ('time', ), zlib=compflag, complevel=complevel)
-                # Attributes
-                time_varid.long_name = self.var_time
-                time_varid.units = time_unit  # e.g. 'days since 2000-01-01 00:00' should change accordingly
-                time_varid.calendar = time_cal
-                time_varid.standard_name = self.var_time
-                time_varid.axis = 'T'
-                time_varid[:] = time_var
-                # Variables lat, lon, subbasin_ID
-                lat_varid = ncid.createVariable(self.remapped_var_lat, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
-                lon_varid = ncid.createVariable(self.remapped_var_lon, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
-                hruId_varid = ncid.createVariable(self.remapped_var_id, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
-                # Attributes
-                lat_varid.long_name = self.remapped_var_lat
-                lon_varid.long_name = self.remapped_var_lon
-                hruId_varid.long_name = 'shape ID'
-                lat_varid.units = 'degrees_north'
-                lon_varid.units = 'degrees_east'
-                hruId_varid.units = '1'
-                lat_varid.standard_name = self.remapped_var_lat
-                lon_varid.standard_name = self.remapped_var_lon
-                lat_varid[:] = hruID_lat
-                lon_varid[:] = hruID_lon
-                hruId_varid[:] = hruID_var
-                # write variables
-                # check chunking choice
-                if self.remapped_chunk_size == None:
-                    chunk_sizes = None # Use netCDF4 default values, i.e. (1,n) chunk lengths for (unlimited,limited) dimensions, where n is the length of the limited dim
-                else:
-                    chunk_length = min(self.remapped_chunk_size, self.number_of_target_elements) # don't make a chunk > data length
-                    chunk_sizes = (1,chunk_length) # (time,remap_dim)
+        # the remapped files are written and compressed by a writer thread
+        submit_write, close_writer = self.start_nc_writer()
+        try:
+            for source in self.iter_source_nc(nc_names):
+                nc_name = source['nc_name']
+                #self.length_of_time = len(time_var)
+                #target_date_times = nc4.num2date(time_var,units = time_unit,calendar = time_cal)
+                #target_name = self.output_dir + self.case_name + '_remapped_' + target_date_times[0].strftime("%Y-%m-%d-%H-%M-%S")+'.nc'
+
+                target_name = self.get_target_nc_name(nc_name)
+                # write into a temporary file and rename it once complete
+                target_name_temp = target_name + '.tmp'
+
+                if os.path.exists(target_name):
+                    os.remove(target_name)
+                if os.path.exists(target_name_temp):
+                    os.remove(target_name_temp)
+                # general attributes for NetCDF file
+                nc_attributes = self.get_nc_attributes(source['global_attributes'], nc_name)
+
+                # reporting
+                statement_print = 'Remapping '+nc_name+' to '+target_name+' \n'
+                time_start = datetime.now()
+                statement_print = statement_print + 'Started at date and time '+ str(time_start) + ' \n'
+                # creating the NetCDF file
+                target_nc = {'file_name': target_name_temp}
+                submit_write(functools.partial(self.create_remapped_nc,
+                                               target_nc,
+                                               source['time'],
+                                               source['time_unit'],
+                                               source['time_cal'],
+                                               source['time_dtype_code'],
+                                               source['time_bounds'],
+                                               hruID_var,
+                                               hruID_lat,
+                                               hruID_lon,
+                                               compflag,
+                                               complevel))
                 #loop over variables
+                var_values = {}
+                remapped = {} # remapped source variables of the derived variables
                 for i in np.arange(len(self.var_names)):
-                    var_value  = self.__weighted_average( nc_name,
-                                                          len(time_var),
-                                                          self.var_names[i],
-                                                          self.fill_value_list[i],
-                                                          remap)
-                    # Variables writing
-                    varid = ncid.createVariable(self.var_names_remapped[i], \
-                                                self.format_list[i], ('time',self.remapped_dim_id ),\
-                                                fill_value = self.fill_value_list[i], zlib=compflag,\
-                                                complevel=complevel,\
-                                                chunksizes=chunk_sizes)
-                    varid [:] = var_value
-                    # Pass attributes
-                    if 'long_name' in ncids.variables[self.var_names[i]].ncattrs():
-                        varid.long_name = ncids.variables[self.var_names[i]].long_name
-                    if 'units' in ncids.variables[self.var_names[i]].ncattrs():
-                        varid.units = ncids.variables[self.var_names[i]].units
-                if time_bounds_data is not None:
-                    time_bounds_var = ncid.createVariable(self.var_time_bound,\
-                                                      time_bounds_data.dtype,\
-                                                      dimensions=('time', 'bounds'))
-                    time_bounds_var[:] = time_bounds_data
-                # general attributes for NetCDF file
-                ncid.Conventions = 'CF-1.6'
-                if self.author_name is not None:
-                    ncid.Author = 'The data were written by ' + self.author_name
-                if self.license is None:
-                    self.license = 'No license for remapping'
-                if org_license == '':
-                    org_license = 'No license from original file is detected'
-                ncid.License = self.license +'; Originla license: '+ org_license
-                ncid.History = 'Created ' + time.ctime(time.time()) + 'by EASYMORE nc_remapper; original file history: ' +\
-                                org_hist
-                ncid.easymore_hash = self.easymore_hash
-                ncid.Source = 'Remapped by EASYMORE nc_remapper from original file: '+ nc_name
-
-            # closing
-            ncids.close()
-
-            # # merge attribute files or pass it to the model
-            # if self.pass_target_shp_attr_remapped:
-            #     ds = xr.open_dataset(target_name)
-            #     ds_attr = xr.open_dataset(self.target_shp_attr_file_name)
-            #     ds_attr = ds_attr.swap_dims({'index': self.remapped_dim_id})
-            #     for var_name in ds_attr.data_vars:
-            #         # Check if the variable is not already in the target dataset
-            #         if var_name not in ds and var_name not in ['lat','lon','lat_t','lon_t','order','index']:
-            #             # Add the variable to the target dataset
-            #             ds[var_name] = ds_attr[var_name]
-            #     if os.path.isfile(target_name):
-            #         os.remove(target_name)
-            #     ds.to_netcdf(target_name)
-            #     ds.close()
-            #     ds_attr.close()
-            # save the remapped values in csv file
-            if self.save_csv:
-                ds = xr.open_dataset(target_name)
-                for i in np.arange(len(self.var_names_remapped)):
-                    # assign the variable to the data frame with the ID column name
-                    column_name = list(map(str,list(np.array(ds[self.remapped_var_id]))))
-                    column_name = ['ID_'+s for s in column_name]
-                    df = pd.DataFrame(data=np.array(ds[self.var_names_remapped[i]]), columns=column_name)
-                    # df ['time'] = ds.time
-                    df.insert(loc=0, column='time', value=ds.time)
-                    # get the unit for the variable if exists
-                    unit_name = ''
-                    if 'units' in ds[self.var_names_remapped[i]].attrs.keys():
-                        unit_name = ds[self.var_names_remapped[i]].attrs['units']
-                    # remove the forbidden character based on
-                    # ['#','%','&','{','}','\','<','>','*','?','/',' ','$','!','`',''','"',':','@','+',',','|','=']
-                    unit_name = re.sub("[#%&{}*<>*?*$!`:@+,|= ]","",unit_name)
-                    unit_name = unit_name.replace("\\","")
-                    unit_name = unit_name.replace("//","")
-                    unit_name = unit_name.replace("/","")
-                    # print(unit_name)
-                    target_name_csv = self.output_dir + self.case_name + '_remapped_'+ self.var_names_remapped[i] +\
-                     '_' + unit_name +\
-                     '_' + os.path.basename(nc_name)+ '.csv'
-                    target_name_map = self.output_dir + 'Mapping_' + self.case_name + '_remapped_'+ self.var_names_remapped[i] +\
-                     '_' + unit_name +\
-                     '_' + os.path.basename(nc_name)+ '.csv'
-                    if os.path.exists(target_name_csv): # remove file if exists
-                        os.remove(target_name_csv)
-                    if os.path.exists(target_name_map): # remove file if exists
-                        os.remove(target_name_map)
-                    lat_data = np.squeeze(np.array(ds[self.remapped_var_lat])); lat_data = lat_data.flatten()
-                    lon_data = np.squeeze(np.array(ds[self.remapped_var_lon])); lon_data = lon_data.flatten()
-                    maps = np.zeros([2,len(lat_data)])
-                    maps [0,:] = lat_data
-                    maps [1,:] = lon_data
-                    df_map = pd.DataFrame(data=maps, index=["lat","lon"], columns=column_name)
-                    df.to_csv(target_name_csv)
-                    df_map.to_csv(target_name_map)
-                    statement_print = statement_print + 'Converting variable '+ self.var_names_remapped[i] +\
-                    ' from remapped file of '+target_name+' to '+target_name_csv + ' \n'
-                    statement_print = statement_print + 'Saving the ID, lat, lon map at '+target_name_csv+ ' \n'
-                ds.close()
-            time_end = datetime.now()
-            time_diff = time_end-time_start
-            statement_print = statement_print + 'Ended at date and time ' + str(time_end) + ' \n'
-            statement_print = statement_print + 'It took '+ str(time_diff.total_seconds()) +\
-            ' seconds to finish the remapping of variable(s)' +' \n'+ ('---------------------')
-            print(statement_print)
+                    statistics_values = self.remap_source_var(source['data'], i, remap, remapped)
+                    # check chunking choice
+                    chunk_sizes = self.get_chunk_sizes(len(source['time']), self.format_list[i])
+                    for statistic in list(statistics_values):
+                        var_value = statistics_values.pop(statistic)
+                        # Variables writing
+                        submit_write(functools.partial(self.write_remapped_var,
+                                                       target_nc,
+                                                       i,
+                                                       var_value,
+                                                       source['var_attributes'][self.var_names[i]],
+                                                       compflag,
+                                                       complevel,
+                                                       chunk_sizes,
+                                                       statistic))
+                        if self.save_parquet or self.save_csv:
+                            var_values[self.get_output_name(i, statistic)] = var_value
+                        del var_value
+                # save the remapped values in csv file
+                if self.save_csv:
+                    submit_write(functools.partial(self.save_remapped_csv,
+                                                   nc_name,
+                                                   source['time'],
+                                                   source['time_unit'],
+                                                   source['time_cal'],
+                                                   var_values,
+                                                   source['var_attributes']))
+                if self.save_parquet:
+                    submit_write(functools.partial(self.save_remapped_parquet,
+                                                   nc_name,
+                                                   source['time'],
+                                                   source['time_unit'],
+                                                   source['time_cal'],
+                                                   var_values,
+                                                   source['var_attributes']))
+                del var_values, remapped
+                del source['data'] # release the source values
+                submit_write(functools.partial(self.close_remapped_nc,
+                                               target_nc,
+                                               nc_attributes,
+                                               nc_name,
+                                               target_name,
+                                               statement_print,
+                                               time_start))
+        finally:
+            close_writer()
         print('---------------------')
 
 
-    def __weighted_average(self,
-                           nc_name,
-                           length_time,
-                           variable_name,
-                           fill_value,
-                           mapping_df):
+    def get_work_dir_case(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the subdirectory of the work directory for the settings of this
+        run; the name includes a hash of the settings that change the remapping file or the
+        remapped outputs, so runs with other settings do not share claims, completed files or
+        the remapping file
+        Returns
+        -------
+        work_dir_case: string, the subdirectory of work_dir
+        """
+        # settings of the execution that do not change the outputs
+        execution = ['numcpu', 'parallel', 'work_dir', 'claim_timeout', 'resume', 'shard_index',
+                     'shard_count', 'schedule_by_cost', 'pack_cost_fraction', 'prefetch_depth',
+                     'write_queue_depth']
+        def encode(obj):
+            if isinstance(obj, np.ndarray):
+                return obj.tolist()
+            if callable(obj):
+                return getattr(obj, '__module__', '')+'.'+getattr(obj, '__qualname__', '')
+            return str(obj)
+        settings = {name: getattr(self, name, None) for name in inspect.signature(Easymore.__init__).parameters
+                    if (name != 'self') and (name not in execution)}
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True, default=encode).encode()).hexdigest()
+        return os.path.join(self.work_dir, self.case_name+'_'+settings_hash[:16])
+
+    def refresh_claim(self,
+                      claim_name,
+                      stop):
         """
         @ author:                  Shervan Gharari
         @ Github:                  https://github.com/ShervanGharari/EASYMORE
         @ author's email id:
         @ license:                 GNU-GPLv3
-        This function reads the data for a given time and calculates the weighted average
+        This function refreshes the modification time of a claim file every quarter of
+        claim_timeout until stop is set, so the claim is not considered stale while it is held
         Arguments
         ---------
-        nc_name: string, name of the netCDF file
-        length_time: int,
-        variable_name: string, name of variable from source netcsf file to be remapped
-        mapping_df: pandas dataframe, including the row and column of the source data and weight
+        claim_name: string, name of the claim file
+        stop: threading.Event, set when the claim is released
+        """
+        while not stop.wait(self.claim_timeout/4):
+            try:
+                os.utime(claim_name)
+            except FileNotFoundError:
+                break
+
+    def start_heartbeat(self,
+                        claim_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function starts a thread that refreshes a claim file while it is held
+        Arguments
+        ---------
+        claim_name: string, name of the claim file
         Returns
         -------
-        weighted_value: a numpy array that has the remapped values from the nc file
-        """
-        # open dataset
-        ds = xr.open_dataset(nc_name)
-        # rename time variable to time
-        if self.var_time != 'time':
-            ds = ds.rename({self.var_time:'time'})
-        # get the variable from the ds the location of time
-        var = ds[variable_name]  # Load variable
-        ds.close()
-        time_dim = var.dims.index('time')  # Get position of time dimension
-        data_all = np.array(var)  # Load all data into memory
-        length_time = data_all.shape[time_dim]  # Number of time steps
-        # prepared the numpy array for ouptut
-        weighted_value = np.zeros([length_time,self.number_of_target_elements])
-
-        for m in range(length_time):
-
-            if data_all.ndim == 3 and self.case in (1, 2):# 3D
-                if time_dim == 0:
-                    data = data_all[m,:,:]
-                elif time_dim == 1:
-                    data = data_all[:,m,:]
-                elif time_dim == 2:
-                    data = data_all[:,:,m]
-                else:
-                    raise ValueError("Time dimension not in the first 3 axes")
-            elif data_all.ndim == 2 and self.case == 3:# 2D
-                if time_dim == 0:
-                    data = data_all[m,:]
-                elif time_dim == 1:
-                    data = data_all[:,m]
-                else:
-                    raise ValueError("Time dimension not in the first 2 axes")
-
-            # Extract values for the specified case
-            if self.case in (1, 2):
-                values = data[self.rows, self.cols]
-            elif self.case == 3:
-                values = data[self.rows]
-            else:
-                raise ValueError("Unknown case value")
-
-            # add values to data frame
-            mapping_df['values'] = values
-            # replace non-numeric or np.nan with NaN
-            mapping_df['values'] = pd.to_numeric(mapping_df['values'], errors='coerce')
-            # if there are NaN values then rescale the weights if needed
-            there_is_nan = (mapping_df['values'].isna().any() or mapping_df['weight'].isna().any())
-            if self.rescaledweights and there_is_nan:
-                idx = mapping_df[~mapping_df['values'].isna() & ~mapping_df['weight'].isna()].index
-                mapping_df['row'] = np.nan; mapping_df.loc[idx,'row'] = 1 # 1 for the once with values in both values and weight columns
-                mapping_df['weight_row'] = mapping_df['weight'] * mapping_df['row']
-                mapping_df['values_row'] = mapping_df['values'] * mapping_df['row']
-                # rescaling the weight
-                mapping_df['weight_row_sum']  = mapping_df['order_t'].map(mapping_df.groupby('order_t')['weight_row'].sum())
-                mapping_df['weight_rescaled'] = mapping_df['weight'] / mapping_df['weight_row_sum'] # rescaled weight
-                idx = mapping_df[mapping_df['weight_rescaled'] > 1.0].index
-                mapping_df.loc[idx,'weight_rescaled'] = np.nan # if there is inf or devision by zero replace with nan
-            else:
-                mapping_df['weight_rescaled'] = mapping_df['weight']
-            mapping_df['values_w']   = mapping_df['values'] * mapping_df['weight_rescaled']
-            df_temp = mapping_df.groupby(['order_t'],as_index=False).agg({'values_w': 'sum'})
-            if there_is_nan:
-                idx                      = mapping_df[~mapping_df['values_w'].isna()].index
-                mapping_df_slice         = mapping_df.loc[idx].copy()
-                order_t_IDs_not_all_nan  = np.unique(mapping_df_slice['order_t'])
-                order_t_IDs_all          = np.unique(mapping_df['order_t'])
-                order_t_IDs_all_nan      = np.setdiff1d(order_t_IDs_all, order_t_IDs_not_all_nan).flatten()
-                # put back NaN for the order_t that are all NaN values
-                idx = df_temp[df_temp['order_t'].isin(order_t_IDs_all_nan)].index
-                df_temp_slice = df_temp.loc[idx].copy()
-                if not df_temp_slice.empty:
-                    df_temp.loc[df_temp_slice.index,'values_w'] = np.nan
-                # df_temp['values_w'].fillna(float(fill_value), inplace=True)
-                df_temp['values_w'] = df_temp['values_w'].fillna(float(fill_value))
-            weighted_value [m,:] = np.array(df_temp['values_w'])
-
-        return weighted_value
+        heartbeat: tuple of the threading.Event that stops the thread and the thread, or None
+        if claim_timeout is None
+        """
+        if self.claim_timeout is None:
+            return None
+        stop = threading.Event()
+        thread = threading.Thread(target=self.refresh_claim, args=(claim_name, stop), daemon=True)
+        thread.start()
+        return (stop, thread)
+
+    def stop_heartbeat(self,
+                       heartbeat):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function stops and joins a thread started by start_heartbeat
+        Arguments
+        ---------
+        heartbeat: tuple of the threading.Event and the thread, or None
+        """
+        if heartbeat is None:
+            return
+        stop, thread = heartbeat
+        stop.set()
+        thread.join()
+
+    def remove_stale_claim(self,
+                           claim_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function renames (atomic) a claim file that is not refreshed for claim_timeout
+        seconds, so only one of the processes finding the stale claim removes it
+        Arguments
+        ---------
+        claim_name: string, name of the claim file
+        Returns
+        -------
+        removed: boolean, True if this process removed the stale claim
+        """
+        if self.claim_timeout is None:
+            return False
+        try:
+            if time.time() - os.path.getmtime(claim_name) < self.claim_timeout:
+                return False
+            os.rename(claim_name, claim_name+'.stale.'+secrets.token_hex(4))
+        except FileNotFoundError: # claim is released or renamed by another process
+            return False
+        return True
+
+    def target_nc_merge(self,
+                        nc_names,
+                        num_processes=1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function remaps the source netCDF files in the order of their time and appends
+        the remapped values into one remapped netCDF file, <case_name>_remapped.nc, along the
+        unlimited time dimension, or with output_period into one remapped netCDF file per day,
+        month or year, <case_name>_remapped_<period>.nc, independent of the time covered by
+        the source files. The time of every file is converted to the time units of the first
+        file and should increase monotonically. With more than one process the files are
+        remapped in parallel and appended in order by the writer of this process
+        Arguments
+        ---------
+        nc_names: list of nc file names to be remapped, or string of single names
+        num_processes: int, number of processes that remap the files
+        """
+        print('------REMAPPING------')
+        if isinstance(nc_names, str):
+            nc_names = [nc_names]  # Convert the string to a list
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
+        del remap
+        # check compression choice
+        compflag, complevel = self.get_compression()
+        nc_names = self.sort_source_nc_by_time(nc_names)
+        target_nc = {}
+        time_previous = None
+        def close_target(target_nc):
+            # close the remapped file of the period once complete
+            if target_nc['nc_names'][-1] != target_nc['nc_names'][0]:
+                target_nc['nc_attributes']['Source'] = target_nc['nc_attributes']['Source'] + ' to ' + target_nc['nc_names'][-1]
+            submit_write(functools.partial(self.close_remapped_nc,
+                                           target_nc,
+                                           target_nc['nc_attributes'],
+                                           target_nc['target_name'],
+                                           target_nc['target_name'],
+                                           target_nc['statement_print'],
+                                           target_nc['time_start'],
+                                           manifest=False))
+        # the remapped files are appended by a writer thread
+        submit_write, close_writer = self.start_nc_writer()
+        try:
+            for source in self.aggregate_remapped_nc(self.iter_remapped_nc(nc_names, num_processes)):
+                # time in the units of the first file
+                time_previous = self.check_source_time(source, time_previous)
+                # the time steps of the source file per period
+                periods = self.get_time_periods(source['time'], time_previous['time_unit'], time_previous['time_cal'])
+                for period, start, end in periods:
+                    time_var = source['time'][start:end]
+                    time_bounds_data = None if source['time_bounds'] is None else source['time_bounds'][start:end]
+                    var_values = {var_name: values[start:end] for var_name, values in source['values'].items()}
+                    if target_nc.get('period', False) != period:
+                        if target_nc:
+                            close_target(target_nc)
+                        # creating the NetCDF file of the period
+                        if period is None:
+                            target_name = self.output_dir + self.case_name + '_remapped.nc'
+                        else:
+                            target_name = self.output_dir + self.case_name + '_remapped_' + period + '.nc'
+                        # write into a temporary file and rename it once complete
+                        target_name_temp = target_name + '.tmp'
+                        if os.path.exists(target_name):
+                            os.remove(target_name)
+                        if os.path.exists(target_name_temp):
+                            os.remove(target_name_temp)
+                        # reporting
+                        time_start = datetime.now()
+                        target_nc = {'file_name': target_name_temp,
+                                     'target_name': target_name,
+                                     'period': period,
+                                     'nc_names': [source['nc_name']],
+                                     'time_start': time_start,
+                                     'statement_print': 'Remapping source nc file(s) to '+target_name+' \n'+\
+                                                        'Started at date and time '+ str(time_start) + ' \n'}
+                        target_nc['nc_attributes'] = self.get_nc_attributes(source['global_attributes'], source['nc_name'])
+                        submit_write(functools.partial(self.create_remapped_nc,
+                                                       target_nc,
+                                                       time_var,
+                                                       time_previous['time_unit'],
+                                                       time_previous['time_cal'],
+                                                       source['time_dtype_code'],
+                                                       time_bounds_data,
+                                                       hruID_var,
+                                                       hruID_lat,
+                                                       hruID_lon,
+                                                       compflag,
+                                                       complevel))
+                        for i, var_name, statistic in self.get_output_variables():
+                            chunk_sizes = self.get_chunk_sizes(len(time_var), self.format_list[i])
+                            submit_write(functools.partial(self.write_remapped_var,
+                                                           target_nc,
+                                                           i,
+                                                           var_values[var_name],
+                                                           source['var_attributes'][self.var_names[i]],
+                                                           compflag,
+                                                           complevel,
+                                                           chunk_sizes,
+                                                           statistic))
+                    else:
+                        if target_nc['nc_names'][-1] != source['nc_name']:
+                            target_nc['nc_names'].append(source['nc_name'])
+                        submit_write(functools.partial(self.append_remapped_nc,
+                                                       target_nc,
+                                                       time_var,
+                                                       time_bounds_data,
+                                                       var_values))
+                    print('Remapped values of '+source['nc_name']+' are appended to '+target_nc['target_name'])
+                if self.save_csv:
+                    submit_write(functools.partial(self.save_remapped_csv,
+                                                   source['nc_name'],
+                                                   source['time'],
+                                                   time_previous['time_unit'],
+                                                   time_previous['time_cal'],
+                                                   source['values'],
+                                                   source['var_attributes']))
+                if self.save_parquet:
+                    submit_write(functools.partial(self.save_remapped_parquet,
+                                                   source['nc_name'],
+                                                   source['time'],
+                                                   time_previous['time_unit'],
+                                                   time_previous['time_cal'],
+                                                   source['values'],
+                                                   source['var_attributes']))
+                del source
+            if target_nc:
+                close_target(target_nc)
+        finally:
+            close_writer()
+        print('---------------------')
+
+    def get_time_periods(self,
+                         time_var,
+                         time_unit,
+                         time_cal):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function splits the time steps into the days, months or years of output_period
+        in the calendar of the time; all the time steps are in one period if output_period
+        is None
+        Arguments
+        ---------
+        time_var: numpy array, time values in the order of time
+        time_unit: string, units of time
+        time_cal: string, calendar of time
+        Returns
+        -------
+        periods: list of tuple of the period, such as 2000, 2000-01 or 2000-01-01, and the
+        index of the first time step and the index after the last time step of the period
+        """
+        if self.output_period is None:
+            return [(None, 0, len(time_var))]
+        dates = np.atleast_1d(nc4.num2date(np.array(time_var), time_unit, calendar=time_cal))
+        if self.output_period == 'year':
+            keys = ['{:04d}'.format(date.year) for date in dates]
+        elif self.output_period == 'month':
+            keys = ['{:04d}-{:02d}'.format(date.year, date.month) for date in dates]
+        else:
+            keys = ['{:04d}-{:02d}-{:02d}'.format(date.year, date.month, date.day) for date in dates]
+        periods = []
+        start = 0
+        for end in np.arange(1, len(keys)+1):
+            if (end == len(keys)) or (keys[end] != keys[start]):
+                periods.append((keys[start], start, int(end)))
+                start = int(end)
+        return periods
+
+    def target_zarr_creation(self,
+                             nc_names,
+                             num_processes=1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function remaps the source netCDF files into one Zarr store, <case_name>_remapped.zarr,
+        with the same variables and attributes as the remapped netCDF files. The store is
+        created with the time of all the source files, in the time units of the first file,
+        and every source file is written to its own time region. If the files are remapped
+        by several processes the time chunks divide the length of every source file so that
+        the regions of the worker processes do not share chunks and are written without
+        locking; otherwise the regions are written one after the other and may share chunks
+        Arguments
+        ---------
+        nc_names: list of nc file names to be remapped, or string of single names
+        num_processes: int, number of processes that remap the files
+        """
+        print('------REMAPPING------')
+        if isinstance(nc_names, str):
+            nc_names = [nc_names]  # Convert the string to a list
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
+        del remap
+        # check compression choice
+        compflag, complevel = self.get_compression()
+        # time of the source nc files in the order of time and their regions in the store
+        sources = []
+        offsets = {}
+        lengths = {}
+        time_previous = None
+        for nc_name in self.sort_source_nc_by_time(nc_names):
+            source = self.read_source_nc(nc_name, read_data=False)
+            time_previous = self.check_source_time(source, time_previous)
+            offsets[nc_name] = sum(lengths.values())
+            lengths[nc_name] = len(source['time'])
+            sources.append(source)
+        store_name = self.output_dir + self.case_name + '_remapped.zarr'
+        # reporting
+        statement_print = 'Remapping '+str(len(sources))+' source nc file(s) to '+store_name+' \n'
+        time_start = datetime.now()
+        statement_print = statement_print + 'Started at date and time '+ str(time_start) + ' \n'
+        self.create_remapped_zarr(store_name,
+                                  sources,
+                                  time_previous,
+                                  hruID_var,
+                                  hruID_lat,
+                                  hruID_lon,
+                                  compflag,
+                                  complevel,
+                                  concurrent_regions = num_processes > 1)
+        if num_processes > 1:
+            # every worker remaps a source nc file and writes its region, largest first
+            nc_names = sorted(offsets.keys(), key=lambda nc_name: -lengths[nc_name])
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+                futures = [executor.submit(self.remap_zarr_region, nc_name, store_name, offsets[nc_name]) for nc_name in nc_names]
+                concurrent.futures.wait(futures)
+                for future in futures:
+                    future.result() # raise the error of the worker if any
+        else:
+            # the regions are written by a writer thread
+            submit_write, close_writer = self.start_nc_writer()
+            try:
+                for source in self.iter_remapped_nc(list(offsets.keys())):
+                    submit_write(functools.partial(self.write_zarr_region,
+                                                   store_name,
+                                                   source,
+                                                   offsets[source['nc_name']]))
+                    del source
+            finally:
+                close_writer()
+        values_size = sum(np.prod(source['time'].shape) for source in sources) * \
+                      len(hruID_var) * sum(np.dtype(self.format_list[i]).itemsize for i, var_name, statistic in self.get_output_variables())
+        statement_print = statement_print + self.get_size_statement(values_size, store_name)
+        time_end = datetime.now()
+        time_diff = time_end-time_start
+        statement_print = statement_print + 'Ended at date and time ' + str(time_end) + ' \n'
+        statement_print = statement_print + 'It took '+ str(time_diff.total_seconds()) +\
+        ' seconds to finish the remapping of variable(s)' +' \n'+ ('---------------------')
+        print(statement_print)
+        print('---------------------')
+
+    def get_zarr_compressor(self,
+                            compflag,
+                            complevel):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the numcodecs compressor of the Zarr store that corresponds
+        to the compression and shuffle choice of the remapped netCDF files
+        Arguments
+        ---------
+        compflag: bool, compress the variables
+        complevel: int, compression level
+        Returns
+        -------
+        compressor: numcodecs codec or None
+        """
+        import numcodecs
+        if not compflag:
+            return None
+        if self.compression.startswith('blosc_'):
+            shuffle = numcodecs.Blosc.SHUFFLE if self.shuffle else numcodecs.Blosc.NOSHUFFLE
+            return numcodecs.Blosc(cname=self.compression.split('_', 1)[1], clevel=complevel, shuffle=shuffle)
+        if self.compression == 'zstd':
+            return numcodecs.Zstd(level=complevel)
+        if self.compression == 'bzip2':
+            return numcodecs.BZ2(level=complevel)
+        return numcodecs.Zlib(level=complevel)
+
+    def create_remapped_zarr(self,
+                             store_name,
+                             sources,
+                             time_previous,
+                             hruID_var,
+                             hruID_lat,
+                             hruID_lon,
+                             compflag,
+                             complevel,
+                             concurrent_regions = False):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function creates the Zarr store of the remapped variables with the time, time
+        bounds, ID, lat and lon of all the source netCDF files and consolidates its metadata;
+        the remapped variables are created empty and filled by write_zarr_region
+        Arguments
+        ---------
+        store_name: string, name of the Zarr store
+        sources: list of dict, time and attributes of the source netCDF files from read_source_nc
+        in the order of time, with time in the units of the first file
+        time_previous: dict, with the time_unit and time_cal of the first file
+        hruID_var: numpy array, ID of the target shapes
+        hruID_lat: numpy array, latitude of the target shapes
+        hruID_lon: numpy array, longitude of the target shapes
+        compflag: bool, compress the variables
+        complevel: int, compression level
+        concurrent_regions: bool, the time regions of the source files are written by several
+        processes at the same time; the time chunks then divide the length of every source file
+        """
+        import zarr
+        import numcodecs
+        import shutil
+        if os.path.exists(store_name):
+            shutil.rmtree(store_name)
+        # Zarr format 2 is read by both zarr 2 and 3 and by xarray
+        if int(zarr.__version__.split('.')[0]) >= 3:
+            root = zarr.open_group(store_name, mode='w', zarr_format=2)
+        else:
+            root = zarr.open_group(store_name, mode='w')
+        compressor = self.get_zarr_compressor(compflag, complevel)
+        def create_array(name, dimensions, shape, chunks, dtype, fill_value=None, attributes={}, filters=None):
+            if hasattr(root, 'create_array'): # zarr 3
+                array = root.create_array(name, shape=shape, chunks=chunks, dtype=dtype,
+                                          fill_value=fill_value, compressors=compressor, filters=filters)
+            else:
+                array = root.create_dataset(name, shape=shape, chunks=chunks, dtype=dtype,
+                                            fill_value=fill_value, compressor=compressor, filters=filters)
+            array.attrs.update(dict(attributes, _ARRAY_DIMENSIONS=list(dimensions)))
+            return array
+        time_var = np.concatenate([source['time'] for source in sources])
+        length_time = len(time_var)
+        lengths = [len(source['time']) for source in sources]
+        length_gcd = int(np.gcd.reduce(lengths))
+        time_dtype_code = sources[0]['time_dtype_code']
+        time_varid = create_array('time', ('time',), (length_time,), (max(length_time, 1),),
+                                  'f8' if time_dtype_code == 'f8' else 'i4',
+                                  attributes={'long_name': self.var_time,
+                                              'units': time_previous['time_unit'],
+                                              'calendar': time_previous['time_cal'],
+                                              'standard_name': self.var_time,
+                                              'axis': 'T'})
+        time_varid[:] = time_var
+        if sources[0]['time_bounds'] is not None:
+            time_bounds_data = np.concatenate([source['time_bounds'] for source in sources])
+            time_bounds_var = create_array(self.var_time_bound, ('time', 'bounds'), time_bounds_data.shape,
+                                           time_bounds_data.shape, time_bounds_data.dtype)
+            time_bounds_var[:] = time_bounds_data
+        # Variables lat, lon, subbasin_ID
+        n = len(hruID_var)
+        lat_varid = create_array(self.remapped_var_lat, (self.remapped_dim_id,), (n,), (n,), 'f8',
+                                 attributes={'long_name': self.remapped_var_lat,
+                                             'units': 'degrees_north',
+                                             'standard_name': self.remapped_var_lat})
+        lon_varid = create_array(self.remapped_var_lon, (self.remapped_dim_id,), (n,), (n,), 'f8',
+                                 attributes={'long_name': self.remapped_var_lon,
+                                             'units': 'degrees_east',
+                                             'standard_name': self.remapped_var_lon})
+        hruId_varid = create_array(self.remapped_var_id, (self.remapped_dim_id,), (n,), (n,), 'f8',
+                                   attributes={'long_name': 'shape ID',
+                                               'units': '1'})
+        lat_varid[:] = hruID_lat
+        lon_varid[:] = hruID_lon
+        hruId_varid[:] = hruID_var
+        for i, var_name, statistic in self.get_output_variables():
+            if concurrent_regions:
+                # the time chunks should divide the length of every source file
+                chunk_sizes = self.get_chunk_sizes(min(lengths), self.format_list[i])
+                if chunk_sizes is None:
+                    chunk_sizes = (1, n)
+                chunk_time = max(d for d in range(1, min(chunk_sizes[0], length_gcd)+1) if length_gcd % d == 0)
+            else:
+                chunk_sizes = self.get_chunk_sizes(length_time, self.format_list[i])
+                if chunk_sizes is None:
+                    chunk_sizes = (1, n)
+                chunk_time = chunk_sizes[0]
+            attributes = self.get_output_attributes(sources[0]['var_attributes'][self.var_names[i]], statistic)
+            # quantization of the values by the filters of the array
+            filters = None
+            if self.least_significant_digit[i] is not None:
+                filters = [numcodecs.Quantize(digits=self.least_significant_digit[i], dtype=self.format_list[i])]
+                attributes['least_significant_digit'] = self.least_significant_digit[i]
+            if self.significant_digits[i] is not None:
+                keepbits = int(np.ceil(self.significant_digits[i] * np.log2(10)))
+                filters = [numcodecs.BitRound(keepbits=min(keepbits, np.finfo(self.format_list[i]).nmant))]
+                attributes['significant_digits'] = self.significant_digits[i]
+            create_array(var_name, ('time', self.remapped_dim_id), (length_time, n),
+                         (chunk_time, chunk_sizes[1]), self.format_list[i],
+                         fill_value=np.array(self.fill_value_list[i]).astype(self.format_list[i]).item(),
+                         attributes=attributes, filters=filters)
+        # general attributes
+        root.attrs.update(self.get_nc_attributes(sources[0]['global_attributes'],
+                                                 sources[0]['nc_name']+' to '+sources[-1]['nc_name']))
+        zarr.consolidate_metadata(store_name)
+
+    def write_zarr_region(self,
+                          store_name,
+                          source,
+                          offset):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function writes the remapped values of a source netCDF file into its time region
+        of the Zarr store and saves them in csv and parquet format if save_csv and save_parquet
+        Arguments
+        ---------
+        store_name: string, name of the Zarr store
+        source: dict, the source with the remapped values of the variables from remap_source_values
+        offset: int, index of the first time step of the source netCDF file in the store
+        """
+        import zarr
+        root = zarr.open_group(store_name, mode='r+')
+        end = offset + len(source['time'])
+        for i, var_name, statistic in self.get_output_variables():
+            root[var_name][offset:end, :] = source['values'][var_name]
+        if self.save_csv:
+            self.save_remapped_csv(source['nc_name'],
+                                   source['time'],
+                                   root['time'].attrs['units'],
+                                   root['time'].attrs['calendar'],
+                                   source['values'],
+                                   source['var_attributes'])
+        if self.save_parquet:
+            self.save_remapped_parquet(source['nc_name'],
+                                       source['time'],
+                                       root['time'].attrs['units'],
+                                       root['time'].attrs['calendar'],
+                                       source['values'],
+                                       source['var_attributes'])
+
+    def remap_zarr_region(self,
+                          nc_name,
+                          store_name,
+                          offset):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reads and remaps a source netCDF file and writes it into its time region
+        of the Zarr store; used by the worker processes
+        Arguments
+        ---------
+        nc_name: string, name of the netCDF file
+        store_name: string, name of the Zarr store
+        offset: int, index of the first time step of the source netCDF file in the store
+        """
+        self.write_zarr_region(store_name, self.remap_source_nc(nc_name), offset)
+
+    def target_time_series_creation(self,
+                                    nc_names,
+                                    num_processes=1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function remaps the source netCDF files in the order of their time directly into
+        one ID-major remapped netCDF file, <case_name>_remapped_time_series.nc, with the
+        variables along (ID, time) for reading the whole time series of the target shapes
+        Arguments
+        ---------
+        nc_names: list of nc file names to be remapped, or string of single names
+        num_processes: int, number of processes that remap the files
+        """
+        print('------REMAPPING------')
+        if isinstance(nc_names, str):
+            nc_names = [nc_names]  # Convert the string to a list
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
+        del remap
+        def sources():
+            for source in self.aggregate_remapped_nc(self.iter_remapped_nc(self.sort_source_nc_by_time(nc_names),
+                                                                           num_processes)):
+                # attributes of the variables by their remapped names
+                source['var_attributes'] = {var_name: self.get_output_attributes(source['var_attributes'][self.var_names[i]], statistic)
+                                            for i, var_name, statistic in output_variables}
+                yield source
+        output_variables = self.get_output_variables()
+        self.write_time_series_nc(sources(),
+                                  self.output_dir + self.case_name + '_remapped_time_series.nc',
+                                  [var_name for i, var_name, statistic in output_variables],
+                                  [self.format_list[i] for i, var_name, statistic in output_variables],
+                                  [self.fill_value_list[i] for i, var_name, statistic in output_variables],
+                                  hruID_var,
+                                  hruID_lat,
+                                  hruID_lon,
+                                  [self.get_quantization(i) for i, var_name, statistic in output_variables])
+
+    def remapped_to_time_series(self,
+                                remapped_nc):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function transposes remapped netCDF files, such as the outputs of nc_remapper
+        for every source file, into one ID-major netCDF file, <case_name>_remapped_time_series.nc,
+        with the variables along (ID, time). The files are read one after the other in the
+        order of their time so that the memory is bounded by time_series_memory
+        Arguments
+        ---------
+        remapped_nc: string or list of string, name or pattern of the remapped netCDF files
+        """
+        print('------TIME SERIES------')
+        remapped_names = self.get_source_nc_file_names(remapped_nc)
+        remapped_names = self.sort_source_nc_by_time(remapped_names, var_time='time')
+        # the variables with the time and ID dimensions and the target shapes from the first file
+        with nc4.Dataset(remapped_names[0]) as ncid:
+            var_names = [var_name for var_name, varid in ncid.variables.items()
+                         if set(varid.dimensions) == {'time', self.remapped_dim_id}]
+            var_formats = [ncid.variables[var_name].dtype.str.lstrip('<>=|') for var_name in var_names]
+            fill_values = [str(getattr(ncid.variables[var_name], '_FillValue', '-9999')) for var_name in var_names]
+            hruID_var = np.array(ncid.variables[self.remapped_var_id][:])
+            hruID_lat = np.array(ncid.variables[self.remapped_var_lat][:])
+            hruID_lon = np.array(ncid.variables[self.remapped_var_lon][:])
+            # the hash of the remapping that produced the remapped files
+            if not hasattr(self, 'easymore_hash'):
+                self.easymore_hash = getattr(ncid, 'easymore_hash', '')
+        if not var_names:
+            sys.exit('no variable with the time and '+self.remapped_dim_id+' dimensions is found in '+remapped_names[0])
+        def sources():
+            for remapped_name in remapped_names:
+                source = {'nc_name': remapped_name, 'values': {}, 'var_attributes': {}}
+                with NC_LOCK, nc4.Dataset(remapped_name) as ncid:
+                    ncid.set_auto_mask(False)
+                    time_varid = ncid.variables['time']
+                    source['time'] = np.array(time_varid[:])
+                    source['time_unit'] = time_varid.units
+                    source['time_cal'] = getattr(time_varid, 'calendar', 'standard')
+                    source['time_dtype_code'] = 'i4' if 'int' in str(time_varid.dtype) else 'f8'
+                    source['time_bounds'] = None
+                    if (self.var_time_bound is not None) and (self.var_time_bound in ncid.variables):
+                        source['time_bounds'] = np.array(ncid.variables[self.var_time_bound][:])
+                    source['global_attributes'] = dict(ncid.__dict__)
+                    if not np.array_equal(np.array(ncid.variables[self.remapped_var_id][:]), hruID_var):
+                        sys.exit('the IDs of '+remapped_name+' are not the same as the IDs of '+remapped_names[0])
+                    for var_name in var_names:
+                        varid = ncid.variables[var_name]
+                        values = np.array(varid[:])
+                        if varid.dimensions[0] != 'time':
+                            values = values.T
+                        source['values'][var_name] = values
+                        source['var_attributes'][var_name] = {att: varid.getncattr(att) for att in varid.ncattrs()}
+                yield source
+        self.write_time_series_nc(sources(),
+                                  self.output_dir + self.case_name + '_remapped_time_series.nc',
+                                  var_names,
+                                  var_formats,
+                                  fill_values,
+                                  hruID_var,
+                                  hruID_lat,
+                                  hruID_lon)
+
+    def write_time_series_nc(self,
+                             sources,
+                             target_name,
+                             var_names,
+                             var_formats,
+                             fill_values,
+                             hruID_var,
+                             hruID_lat,
+                             hruID_lon,
+                             quantization_list=None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function writes remapped values that arrive in the order of time into an ID-major
+        netCDF file with the variables along (ID, time) and an unlimited time dimension. The
+        remapped values are buffered until a slab of time steps that fits in time_series_memory
+        is complete; the slab is then transposed and written by the writer thread as whole
+        chunks of (ID, time) so that no chunk is written more than once
+        Arguments
+        ---------
+        sources: iterable of dict, remapped values of the files in the order of time with the keys
+        nc_name, time, time_unit, time_cal, time_dtype_code, time_bounds, global_attributes,
+        var_attributes and values; var_attributes and values have var_names as keys
+        target_name: string, name of the ID-major netCDF file
+        var_names: list of string, name of the variables
+        var_formats: list of string, format of the variables such as f4 or f8
+        fill_values: list of string, fill value of the variables
+        hruID_var: numpy array, ID of the target shapes
+        hruID_lat: numpy array, latitude of the target shapes
+        hruID_lon: numpy array, longitude of the target shapes
+        quantization_list: list of dict, least_significant_digit or significant_digits of the variables
+        """
+        # check compression choice
+        compflag, complevel = self.get_compression()
+        if quantization_list is None:
+            quantization_list = [{} for var_name in var_names]
+        n = len(hruID_var)
+        # time steps of a slab that fit in the memory and the chunks of the time series
+        slab_length = max(int(self.time_series_memory) // (n * len(var_names) * 8), 1)
+        chunk_time = max(min(slab_length, int(self.chunk_bytes) // max(np.dtype(f).itemsize for f in var_formats)), 1)
+        slab_length = (slab_length // chunk_time) * chunk_time
+        chunk_sizes = [(max(min(int(self.chunk_bytes) // (chunk_time * np.dtype(f).itemsize), n), 1), chunk_time)
+                       for f in var_formats]
+        target_name_temp = target_name + '.tmp'
+        if os.path.exists(target_name):
+            os.remove(target_name)
+        if os.path.exists(target_name_temp):
+            os.remove(target_name_temp)
+        # reporting
+        statement_print = 'Writing the time series of the remapped values to '+target_name+' \n'
+        time_start = datetime.now()
+        statement_print = statement_print + 'Started at date and time '+ str(time_start) + ' \n'
+        target_nc = {'file_name': target_name_temp}
+        time_previous = None
+        buffer = {'time': [], 'time_bounds': [], 'values': {var_name: [] for var_name in var_names}}
+        start = 0
+        def take_slab(length):
+            # the first length time steps of the buffer
+            slab = {}
+            for key in ['time', 'time_bounds']:
+                if buffer[key]:
+                    values = np.concatenate(buffer[key])
+                    slab[key], buffer[key] = values[:length], [values[length:]]
+                else:
+                    slab[key] = None
+            slab['values'] = {}
+            for var_name in var_names:
+                values = np.concatenate(buffer['values'][var_name])
+                slab['values'][var_name], buffer['values'][var_name] = values[:length], [values[length:]]
+            return slab
+        submit_write, close_writer = self.start_nc_writer()
+        try:
+            for source in sources:
+                # time in the units of the first file
+                time_previous = self.check_source_time(source, time_previous)
+                if 'nc_attributes' not in target_nc:
+                    target_nc['nc_attributes'] = self.get_nc_attributes(source['global_attributes'], source['nc_name'])
+                    submit_write(functools.partial(self.create_remapped_nc,
+                                                   target_nc,
+                                                   np.array([]),
+                                                   time_previous['time_unit'],
+                                                   time_previous['time_cal'],
+                                                   source['time_dtype_code'],
+                                                   None if source['time_bounds'] is None else source['time_bounds'][:0],
+                                                   hruID_var,
+                                                   hruID_lat,
+                                                   hruID_lon,
+                                                   compflag,
+                                                   complevel))
+                    for i in np.arange(len(var_names)):
+                        submit_write(functools.partial(self.create_time_series_var,
+                                                       target_nc,
+                                                       var_names[i],
+                                                       var_formats[i],
+                                                       fill_values[i],
+                                                       source['var_attributes'][var_names[i]],
+                                                       compflag,
+                                                       complevel,
+                                                       chunk_sizes[i],
+                                                       quantization_list[i]))
+                source_last = source['nc_name']
+                buffer['time'].append(source['time'])
+                if source['time_bounds'] is not None:
+                    buffer['time_bounds'].append(source['time_bounds'])
+                for var_name in var_names:
+                    buffer['values'][var_name].append(source['values'][var_name])
+                del source
+                # write the complete slabs
+                while sum(len(t) for t in buffer['time']) >= slab_length:
+                    submit_write(functools.partial(self.write_time_series_slab, target_nc, start, take_slab(slab_length)))
+                    start += slab_length
+            if 'nc_attributes' not in target_nc:
+                sys.exit('no remapped values are provided for the time series')
+            # the rest of the buffer
+            length = sum(len(t) for t in buffer['time'])
+            if length > 0:
+                submit_write(functools.partial(self.write_time_series_slab, target_nc, start, take_slab(length)))
+            target_nc['nc_attributes']['Source'] = target_nc['nc_attributes']['Source'] + ' to ' + source_last
+            submit_write(functools.partial(self.close_remapped_nc,
+                                           target_nc,
+                                           target_nc['nc_attributes'],
+                                           target_name,
+                                           target_name,
+                                           statement_print,
+                                           time_start,
+                                           manifest=False))
+        finally:
+            close_writer()
+        print('---------------------')
+
+    def create_time_series_var(self,
+                               target_nc,
+                               var_name,
+                               var_format,
+                               fill_value,
+                               var_attributes,
+                               compflag,
+                               complevel,
+                               chunk_sizes,
+                               quantization={}):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function creates a variable along (ID, time) in the ID-major netCDF file
+        Arguments
+        ---------
+        target_nc: dict, with the opened netCDF file as ncid and its compression
+        var_name: string, name of the variable
+        var_format: string, format of the variable such as f4 or f8
+        fill_value: string, fill value of the variable
+        var_attributes: dict, attributes of the variable
+        compflag: bool, compress the variable
+        complevel: int, compression level
+        chunk_sizes: tuple of int, chunk sizes along (ID, time)
+        quantization: dict, least_significant_digit or significant_digits of the variable
+        """
+        with NC_LOCK:
+            varid = target_nc['ncid'].createVariable(var_name, var_format, (self.remapped_dim_id, 'time'),\
+                                                     fill_value = fill_value,\
+                                                     compression=target_nc['compression'] if compflag else None,\
+                                                     complevel=complevel,\
+                                                     shuffle=self.shuffle,\
+                                                     chunksizes=chunk_sizes,\
+                                                     **quantization)
+            # Pass attributes
+            if 'long_name' in var_attributes:
+                varid.long_name = var_attributes['long_name']
+            if 'units' in var_attributes:
+                varid.units = var_attributes['units']
+
+    def write_time_series_slab(self,
+                               target_nc,
+                               start,
+                               slab):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function writes a slab of time steps into the ID-major netCDF file
+        Arguments
+        ---------
+        target_nc: dict, with the opened netCDF file as ncid
+        start: int, index of the first time step of the slab
+        slab: dict, with time, time_bounds and the values of the variables along (time, ID)
+        """
+        end = start + len(slab['time'])
+        with NC_LOCK:
+            ncid = target_nc['ncid']
+            ncid.variables['time'][start:end] = slab['time']
+            if slab['time_bounds'] is not None:
+                ncid.variables[self.var_time_bound][start:end] = slab['time_bounds']
+            for var_name, values in slab['values'].items():
+                ncid.variables[var_name][:, start:end] = np.ascontiguousarray(values.T)
+
+    def sort_source_nc_by_time(self,
+                               nc_names,
+                               var_time=None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function sorts the source netCDF files based on their first time step
+        Arguments
+        ---------
+        nc_names: list of string, name of the netCDF files
+        var_time: string, name of the time variable; var_time of the object if None
+        Returns
+        -------
+        nc_names: list of string, name of the netCDF files sorted by their first time step
+        """
+        if var_time is None:
+            var_time = self.var_time
+        start_times = {}
+        for nc_name in nc_names:
+            with nc4.Dataset(nc_name) as ncid:
+                time_varid = ncid.variables[var_time]
+                if len(time_varid) == 0:
+                    sys.exit('the source nc file '+nc_name+' has no time step')
+                start_times[nc_name] = nc4.num2date(time_varid[0], time_varid.units,
+                                                    calendar=getattr(time_varid, 'calendar', 'standard'))
+        try:
+            return sorted(nc_names, key=lambda nc_name: start_times[nc_name])
+        except TypeError:
+            sys.exit('the source nc files have different calendars and cannot be put in the order of time')
+
+    def check_source_time(self,
+                          source,
+                          time_previous=None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function converts the time and time bounds of a source netCDF file to the time
+        units of the previous source netCDF files and checks that the time increases
+        monotonically after the time of the previous files
+        Arguments
+        ---------
+        source: dict, the content of a source netCDF file from read_source_nc; its time and
+        time_bounds are converted in place
+        time_previous: dict, with time_unit, time_cal and time_last of the previous files or
+        None for the first file
+        Returns
+        -------
+        time_previous: dict, with time_unit, time_cal and time_last including the source
+        """
+        time_var = np.array(source['time'])
+        time_bounds_data = source['time_bounds']
+        if time_previous is None:
+            time_previous = {'time_unit': source['time_unit'],
+                             'time_cal': source['time_cal'],
+                             'time_last': None}
+        elif source['time_cal'] != time_previous['time_cal']:
+            sys.exit('calendar of the time variable in '+source['nc_name']+' is '+source['time_cal']+\
+                     ' while it is '+time_previous['time_cal']+' in the previous source nc files')
+        elif source['time_unit'] != time_previous['time_unit']:
+            # convert the time to the units of the first file
+            time_var = nc4.date2num(nc4.num2date(time_var, source['time_unit'], calendar=source['time_cal']),
+                                    time_previous['time_unit'], calendar=source['time_cal'])
+            if time_bounds_data is not None:
+                time_bounds_data = nc4.date2num(nc4.num2date(time_bounds_data, source['time_unit'], calendar=source['time_cal']),
+                                                time_previous['time_unit'], calendar=source['time_cal'])
+        # check the time is monotonic
+        time_last = time_previous['time_last']
+        if np.any(np.diff(time_var) <= 0) or ((time_last is not None) and (len(time_var) > 0) and (time_var[0] <= time_last)):
+            sys.exit('time of the source nc file '+source['nc_name']+' is not increasing monotonically'+\
+                     ' or overlaps with the time of the previous source nc files')
+        if len(time_var) > 0:
+            time_previous = dict(time_previous, time_last=time_var[-1])
+        source['time'] = time_var
+        source['time_bounds'] = time_bounds_data
+        return time_previous
+
+    def append_remapped_nc(self,
+                           target_nc,
+                           time_var,
+                           time_bounds_data,
+                           var_values):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function appends the time, time bounds and remapped values of the variables to
+        the remapped netCDF file along the unlimited time dimension
+        Arguments
+        ---------
+        target_nc: dict, with the opened remapped netCDF file as ncid
+        time_var: numpy array, time values in the time units of the remapped netCDF file
+        time_bounds_data: numpy array, time bounds in the time units of the remapped netCDF file or None
+        var_values: dict, remapped values of the variables with the names of get_output_variables as keys
+        """
+        with NC_LOCK:
+            ncid = target_nc['ncid']
+            start = len(ncid.dimensions['time'])
+            end = start + len(time_var)
+            ncid.variables['time'][start:end] = time_var
+            if time_bounds_data is not None:
+                ncid.variables[self.var_time_bound][start:end] = time_bounds_data
+            for i, var_name, statistic in self.get_output_variables():
+                ncid.variables[var_name][start:end] = var_values[var_name]
+
+    def iter_remapped_nc(self,
+                         nc_names,
+                         num_processes=1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function yields the remapped values of the source netCDF files in the order of
+        nc_names. With more than one process the files are remapped in parallel and at most
+        two files per process are remapped ahead of the file that is yielded
+        Arguments
+        ---------
+        nc_names: list of string, name of the netCDF files
+        num_processes: int, number of processes that remap the files
+        Yields
+        -------
+        source: dict, the content of a source netCDF file from read_source_nc with the remapped
+        values of the variables as values with the names of get_output_variables as keys
+        """
+        if num_processes <= 1:
+            remap = self.load_remap()[0]
+            for source in self.iter_source_nc(nc_names):
+                yield self.remap_source_values(source, remap)
+            return
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_processes) as executor:
+            futures = [executor.submit(self.remap_source_nc, nc_name) for nc_name in nc_names[:2*num_processes]]
+            next_nc = len(futures)
+            try:
+                while futures:
+                    source = futures.pop(0).result()
+                    if next_nc < len(nc_names):
+                        futures.append(executor.submit(self.remap_source_nc, nc_names[next_nc]))
+                        next_nc += 1
+                    yield source
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def aggregate_remapped_nc(self,
+                              sources):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function aggregates the remapped values of the source netCDF files, in the order
+        of their time, into the days, months or years of time_aggregation by time_aggregation_stat.
+        The sum, count and extreme of the open period are accumulated across the boundaries
+        of the files so that only the aggregated values are held and yielded; a file is yielded
+        with the periods that are complete once the next file is read. The sources are yielded
+        as they are if time_aggregation is None
+        Arguments
+        ---------
+        sources: iterable of dict, the remapped values of the source netCDF files in the order
+        of time from iter_remapped_nc
+        Yields
+        -------
+        source: dict, as the sources with the time, time bounds and values of the complete
+        periods in the time units of the first file
+        """
+        if self.time_aggregation is None:
+            yield from sources
+            return
+        output_variables = self.get_output_variables()
+        extreme = np.fmax if self.time_aggregation_stat == 'max' else np.fmin
+        time_previous = None
+        period = None # accumulators of the open period
+        pending = None # a source with its complete periods to be yielded
+        def close_period(period):
+            # the aggregated values of the period from its accumulators
+            values = {}
+            for i, var_name, statistic in output_variables:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    if self.time_aggregation_stat == 'mean':
+                        value = period['sum'][var_name] / period['count'][var_name]
+                    elif self.time_aggregation_stat == 'sum':
+                        value = np.where(period['count'][var_name] > 0, period['sum'][var_name], np.nan)
+                    else:
+                        value = period['extreme'][var_name]
+                values[var_name] = np.where(np.isnan(value), float(self.fill_value_list[i]), value)
+            return period['start'], values
+        for source in sources:
+            # time in the units of the first file
+            time_previous = self.check_source_time(source, time_previous)
+            dates = np.atleast_1d(nc4.num2date(np.array(source['time']), time_previous['time_unit'],
+                                               calendar=time_previous['time_cal']))
+            starts = [self.get_aggregation_period(date + timedelta(hours=int(self.time_aggregation_offset)))[0]
+                      for date in dates]
+            values = {}
+            for i, var_name, statistic in output_variables:
+                value = np.array(source['values'][var_name], dtype=np.float64)
+                values[var_name] = np.where(value == float(self.fill_value_list[i]), np.nan, value)
+            periods = []
+            start = 0
+            for end in np.arange(1, len(starts)+1):
+                if (end < len(starts)) and (starts[end] == starts[start]):
+                    continue
+                if (period is not None) and (period['start'] != starts[start]):
+                    periods.append(close_period(period))
+                    period = None
+                if period is None:
+                    period = {'start': starts[start], 'sum': {}, 'count': {}, 'extreme': {}}
+                    for var_name in values:
+                        period['sum'][var_name] = 0.0
+                        period['count'][var_name] = 0
+                        period['extreme'][var_name] = np.nan
+                for var_name, value in values.items():
+                    value = value[start:end]
+                    period['sum'][var_name] = period['sum'][var_name] + np.nansum(value, axis=0)
+                    period['count'][var_name] = period['count'][var_name] + np.sum(~np.isnan(value), axis=0)
+                    period['extreme'][var_name] = extreme(period['extreme'][var_name], extreme.reduce(value, axis=0))
+                start = int(end)
+            del values
+            if (pending is not None) and pending['periods']:
+                yield self.get_aggregated_source(pending, time_previous)
+            pending = {'source': source, 'periods': periods}
+            del source['values']
+        if period is not None:
+            pending['periods'].append(close_period(period))
+        if (pending is not None) and pending['periods']:
+            yield self.get_aggregated_source(pending, time_previous)
+
+    def get_aggregation_period(self,
+                               date):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the day, month or year of time_aggregation of a date in the
+        calendar of the date
+        Arguments
+        ---------
+        date: datetime or cftime datetime
+        Returns
+        -------
+        start: datetime or cftime datetime, start of the period
+        end: datetime or cftime datetime, start of the next period
+        """
+        start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.time_aggregation == 'day':
+            return start, start + timedelta(days=1)
+        if self.time_aggregation == 'month':
+            start = start.replace(day=1)
+            if start.month == 12:
+                return start, start.replace(year=start.year+1, month=1)
+            return start, start.replace(month=start.month+1)
+        start = start.replace(month=1, day=1)
+        return start, start.replace(year=start.year+1)
+
+    def get_aggregated_source(self,
+                              pending,
+                              time_previous):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns a source netCDF file with the aggregated values of its complete
+        periods of time_aggregation
+        Arguments
+        ---------
+        pending: dict, the source without values and its periods as a list of start of the
+        period and aggregated values
+        time_previous: dict, with time_unit and time_cal of the first file
+        Returns
+        -------
+        source: dict, the source with the time, time bounds and values of the periods
+        """
+        source = pending['source']
+        starts = [start for start, values in pending['periods']]
+        source['time'] = nc4.date2num(starts, time_previous['time_unit'], calendar=time_previous['time_cal'])
+        source['time_unit'] = time_previous['time_unit']
+        source['time_cal'] = time_previous['time_cal']
+        source['time_dtype_code'] = 'f8'
+        source['time_bounds'] = None
+        if self.var_time_bound is not None:
+            # the time covered by the periods
+            offset = timedelta(hours=int(self.time_aggregation_offset))
+            bounds = [[start - offset, self.get_aggregation_period(start)[1] - offset] for start in starts]
+            source['time_bounds'] = np.array([nc4.date2num(bound, time_previous['time_unit'],
+                                                           calendar=time_previous['time_cal']) for bound in bounds])
+        source['values'] = {var_name: np.array([values[var_name] for start, values in pending['periods']])
+                            for var_name in pending['periods'][0][1]}
+        return source
+
+    def remap_source_nc(self,
+                        nc_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reads and remaps a source netCDF file; used by the worker processes
+        Arguments
+        ---------
+        nc_name: string, name of the netCDF file
+        Returns
+        -------
+        source: dict, the content of the source netCDF file from read_source_nc with the
+        remapped values of the variables as values
+        """
+        remap = self.load_remap()[0]
+        return self.remap_source_values(self.read_source_nc(nc_name), remap)
+
+    def remap_source_values(self,
+                            source,
+                            remap):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function remaps the values of the variables of a source netCDF file
+        Arguments
+        ---------
+        source: dict, the content of a source netCDF file from read_source_nc
+        remap: pandas dataframe, including the row and column of the source data and weight
+        Returns
+        -------
+        source: dict, the source without data and with the remapped values of the variables
+        as values with the names of get_output_variables as keys
+        """
+        source['values'] = {}
+        remapped = {} # remapped source variables of the derived variables
+        for i in np.arange(len(self.var_names)):
+            statistics_values = self.remap_source_var(source['data'], i, remap, remapped)
+            for statistic, var_value in statistics_values.items():
+                source['values'][self.get_output_name(i, statistic)] = var_value
+            del statistics_values
+        del source['data'] # release the source values
+        return source
+
+    def remap_source_var(self,
+                         data,
+                         i,
+                         remap,
+                         remapped):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function remaps the statistics of a variable of var_names; a derived variable
+        is evaluated on the gathered source values of its source variables, or on their
+        remapped values for the stage after
+        Arguments
+        ---------
+        data: dict, the values and the position of the time dimension of the source variables
+        i: int, index of the variable in var_names
+        remap: pandas dataframe, including the row and column of the source data and weight
+        remapped: dict, remapped values of the source variables of the derived variables that
+        are kept for the other derived variables of the source netCDF file
+        Returns
+        -------
+        statistics_values: dict, remapped values of the variable with the statistics as keys
+        """
+        var_name = self.var_names[i]
+        derivation = self.derived_vars.get(var_name)
+        unit_conversion = self.unit_conversions.get(var_name)
+        if derivation is None:
+            data_all, time_dim = data[var_name]
+            return self.__weighted_statistics(data_all,
+                                              time_dim,
+                                              self.fill_value_list[i],
+                                              remap,
+                                              self.statistics,
+                                              unit_conversion)
+        if derivation['stage'] == 'before':
+            return self.__weighted_statistics({name: data[name] for name in derivation['inputs']},
+                                              None,
+                                              self.fill_value_list[i],
+                                              remap,
+                                              self.statistics,
+                                              unit_conversion,
+                                              var_name)
+        # derived from the remapped values of the source variables
+        for name in derivation['inputs']:
+            if name not in remapped:
+                remapped[name] = self.__weighted_statistics(data[name][0], data[name][1], np.nan, remap)['mean']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var_value = self.evaluate_derived_var(var_name, {name: remapped[name] for name in derivation['inputs']})
+        if unit_conversion is not None:
+            var_value = unit_conversion[0] * var_value + unit_conversion[1]
+        return {'mean': np.where(np.isnan(var_value), float(self.fill_value_list[i]), var_value)}
+
+    def evaluate_derived_var(self,
+                             var_name,
+                             values):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function evaluates the expression or function of a derived variable
+        Arguments
+        ---------
+        var_name: string, name of the variable in derived_vars
+        values: dict, values of the source variables of the derived variable with the same shape
+        Returns
+        -------
+        var_value: numpy array, values of the derived variable
+        """
+        expression = self.derived_vars[var_name]['expression']
+        shape = list(values.values())[0].shape
+        if callable(expression):
+            var_value = expression(**values)
+        else:
+            # the expression is checked by get_derived_expression_inputs; only its allowed
+            # nodes are evaluated
+            def evaluate(node):
+                if isinstance(node, ast.Expression):
+                    return evaluate(node.body)
+                if isinstance(node, ast.Constant):
+                    return node.value
+                if isinstance(node, ast.Name):
+                    return values[node.id] if node.id in values else DERIVED_VAR_CONSTANTS[node.id]
+                if isinstance(node, ast.BinOp):
+                    return DERIVED_VAR_OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+                if isinstance(node, ast.UnaryOp):
+                    return DERIVED_VAR_OPERATORS[type(node.op)](evaluate(node.operand))
+                if isinstance(node, ast.Compare):
+                    return DERIVED_VAR_OPERATORS[type(node.ops[0])](evaluate(node.left), evaluate(node.comparators[0]))
+                if isinstance(node, ast.Call):
+                    return DERIVED_VAR_FUNCTIONS[self.get_derived_function_name(node.func)](*[evaluate(arg) for arg in node.args])
+                sys.exit('expression of the derived variable '+var_name+' is not allowed: '+ast.unparse(node))
+            var_value = evaluate(ast.parse(expression, mode='eval'))
+        return np.broadcast_to(np.asarray(var_value, dtype=np.float64), shape)
+
+    def load_remap(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reads the temporary remapping csv file, sliced to the target shapes of
+        target_ids and weighted by the field of weight_nc, and sets the rows and cols in the
+        window of the source grid that is read, the number of target elements, the ID, lat and
+        lon of the target elements for the remapping and the header of the remapped csv files.
+        The remapping is loaded once and kept in remap_loaded, which is passed with the object
+        to the worker processes, so the later calls return it without reading the files again
+        Returns
+        -------
+        remap: pandas dataframe, the remapping with the row and column of the source data and weight
+        hruID_var: numpy array, ID of the target shapes in the order of order_t
+        hruID_lat: numpy array, latitude of the target shapes in the order of order_t
+        hruID_lon: numpy array, longitude of the target shapes in the order of order_t
+        """
+        remap_key = (self.remap_csv_temp, self.get_target_ids_hash(), self.weight_nc, self.weight_var)
+        if (self.remap_loaded is not None) and (self.remap_loaded[0] == remap_key):
+            return self.remap_loaded[1]
+        remap = pd.read_csv(self.remap_csv_temp)
+        remap = remap.apply(pd.to_numeric, errors='coerce') # convert non numeric to NaN
+        # the selected target shapes
+        if self.target_ids is not None:
+            missing = np.setdiff1d(self.target_ids, np.array(remap['ID_t']))
+            if missing.size > 0:
+                sys.exit('EASYMORE cannot find '+str(missing.size)+' of target_ids in the remapping file such as '+\
+                         str(missing[:10].tolist()))
+            remap = remap[remap['ID_t'].isin(self.target_ids)].reset_index(drop=True)
+        # the weights of the remapping with the field of weight_nc
+        if self.weight_nc is not None:
+            remap['weight'] = self.get_secondary_weights(remap)
+        # creating the target_ID_lat_lon
+        target_ID_lat_lon = pd.DataFrame()
+        target_ID_lat_lon ['ID_t']  = remap ['ID_t']
+        target_ID_lat_lon ['lat_t'] = remap ['lat_t']
+        target_ID_lat_lon ['lon_t'] = remap ['lon_t']
+        target_ID_lat_lon ['order_t'] = remap ['order_t']
+        target_ID_lat_lon = target_ID_lat_lon.drop_duplicates()
+        target_ID_lat_lon = target_ID_lat_lon.sort_values(by=['order_t'])
+        target_ID_lat_lon = target_ID_lat_lon.reset_index(drop=True)
+        # prepare the hru_id (here COMID), lat, lon
+        hruID_var = np.array(target_ID_lat_lon['ID_t'])
+        hruID_lat = np.array(target_ID_lat_lon['lat_t'])
+        hruID_lon = np.array(target_ID_lat_lon['lon_t'])
+        #
+        rows = np.array(remap['rows']).astype(int)
+        cols = np.array(remap['cols']).astype(int)
+        # the window of the source grid that is read, from the rows with a weight; the rows
+        # without a weight, such as of the target shapes outside of the source domain, are
+        # moved into the window as they do not contribute to the remapped values
+        weight = np.array(remap['weight'], dtype=np.float64)
+        weighted = np.isfinite(weight) & (weight != 0)
+        if not weighted.any():
+            weighted = np.ones(len(weight), dtype=bool)
+        self.source_window = [(int(rows[weighted].min()), int(rows[weighted].max())+1)]
+        rows = np.clip(rows, self.source_window[0][0], self.source_window[0][1]-1) - self.source_window[0][0]
+        if self.case in (1, 2):
+            self.source_window.append((int(cols[weighted].min()), int(cols[weighted].max())+1))
+            cols = np.clip(cols, self.source_window[1][0], self.source_window[1][1]-1) - self.source_window[1][0]
+        self.rows = rows
+        self.cols = cols
+        self.number_of_target_elements = len(hruID_var)
+        self.target_ID_lat_lon = target_ID_lat_lon
+        # header of the csv files
+        self.csv_column_name = ['ID_'+str(s) for s in hruID_var.astype(float)]
+        self.remap_loaded = (remap_key, (remap, hruID_var, hruID_lat, hruID_lon))
+        return remap, hruID_var, hruID_lat, hruID_lon
+
+    def get_secondary_weights(self,
+                              remap):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function multiplies the weights of the remapping by the field of weight_var
+        from weight_nc at the source cells and scales the weights of every target shape to
+        add up to 1
+        Arguments
+        ---------
+        remap: pandas dataframe, including the row and column of the source data and weight
+        Returns
+        -------
+        weight: pandas series, the weights of the remapping
+        """
+        # the dimensions of the source grid
+        nc_names = self.get_source_nc_file_names(self.source_nc)
+        with nc4.Dataset(nc_names[0]) as ncid:
+            varid = ncid.variables[self.get_source_var_names()[0]]
+            source_dims = [dim for dim in varid.dimensions if dim != self.var_time]
+            source_shape = tuple(len(ncid.dimensions[dim]) for dim in source_dims)
+        with xr.open_dataset(self.weight_nc, decode_times=False) as ds:
+            if self.weight_var not in ds:
+                sys.exit('weight_var '+self.weight_var+' is not in weight_nc '+self.weight_nc)
+            field = ds[self.weight_var].squeeze(drop=True)
+            if set(field.dims) == set(source_dims):
+                field = field.transpose(*source_dims)
+            field = np.array(field, dtype=np.float64)
+        if field.shape != source_shape:
+            sys.exit('weight_var '+self.weight_var+' of weight_nc has the shape '+str(field.shape)+\
+                     ' while the source grid has the shape '+str(source_shape)+' of '+str(source_dims))
+        rows = np.array(remap['rows']).astype(int)
+        cols = np.array(remap['cols']).astype(int)
+        if self.case in (1, 2):
+            secondary = field[rows, cols]
+        else:
+            secondary = field[rows]
+        secondary = np.where(np.isnan(secondary), 0.0, secondary) # missing values of the field
+        if np.any(secondary < 0):
+            sys.exit('weight_var '+self.weight_var+' of weight_nc should not be negative')
+        weight = remap['weight'] * secondary
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = weight / weight.groupby(remap['order_t']).transform('sum')
+        return weight
+
+    def get_compression(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function checks the compression choice for the remapped netCDF files
+        Returns
+        -------
+        compflag: bool, compress the variables
+        complevel: int, compression level
+        """
+        if isinstance(self.complevel, int) and (self.complevel >=1) and (self.complevel<=9):
+            compflag = True
+            complevel = self.complevel
+            print('netcdf output file will be compressed at level', complevel)
+        else:
+            compflag = False
+            complevel = 0
+            print('netcdf output file will not be compressed.')
+        return compflag, complevel
+
+    def get_quantization(self,
+                         i):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the quantization of a remapped variable for createVariable of
+        netCDF4; netCDF4 records it in the attributes of the variable
+        Arguments
+        ---------
+        i: int, index of the variable in var_names
+        Returns
+        -------
+        quantization: dict, least_significant_digit or significant_digits of the variable
+        """
+        quantization = {}
+        if self.least_significant_digit[i] is not None:
+            quantization['least_significant_digit'] = self.least_significant_digit[i]
+        if self.significant_digits[i] is not None:
+            quantization['significant_digits'] = self.significant_digits[i]
+        return quantization
+
+    def get_output_variables(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the variables of the remapped files, a variable for every
+        statistic of every remapped variable; the mean keeps the remapped variable name and
+        the other statistics are added as suffix. The variables derived after the remapping
+        have only the mean
+        Returns
+        -------
+        output_variables: list of tuple, index of the variable in var_names, name of the
+        variable in the remapped files and statistic
+        """
+        output_variables = []
+        for i in np.arange(len(self.var_names)):
+            statistics = self.statistics
+            if self.derived_vars.get(self.var_names[i], {}).get('stage') == 'after':
+                statistics = ['mean'] # derived from the remapped values
+            for statistic in statistics:
+                output_variables.append((i, self.get_output_name(i, statistic), statistic))
+        return output_variables
+
+    def get_derived_vars(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function checks the derived variables and finds their source variables, the
+        arguments of a function or the names of an expression that are not numpy functions
+        Returns
+        -------
+        derived_vars: dict, the derivation of the derived variables as a dict with the keys
+        expression, stage, inputs and optionally units and long_name
+        """
+        derived_vars = {}
+        if not self.derived_vars:
+            return derived_vars
+        if not isinstance(self.derived_vars, dict):
+            sys.exit('derived_vars should be a dictionary of the variables and their expressions such as {"wind": "sqrt(u**2 + v**2)"}')
+        for var_name, derivation in self.derived_vars.items():
+            if var_name not in self.var_names:
+                sys.exit('the derived variable '+str(var_name)+' should be given in var_names')
+            if not isinstance(derivation, dict):
+                derivation = {'expression': derivation}
+            derivation = dict(derivation, stage=derivation.get('stage', 'before'))
+            expression = derivation.get('expression')
+            if derivation['stage'] not in ('before', 'after'):
+                sys.exit('stage of the derived variable '+var_name+' should be before or after')
+            if isinstance(expression, str) and ('inputs' in derivation):
+                self.get_derived_expression_inputs(var_name, expression) # check the expression
+            if 'inputs' not in derivation:
+                if callable(expression):
+                    derivation['inputs'] = list(inspect.signature(expression).parameters)
+                elif isinstance(expression, str):
+                    derivation['inputs'] = self.get_derived_expression_inputs(var_name, expression)
+                else:
+                    sys.exit('expression of the derived variable '+var_name+' should be a string or a function')
+            if not derivation['inputs']:
+                sys.exit('the derived variable '+var_name+' has no source variable')
+            for name in derivation['inputs']:
+                if name in self.derived_vars:
+                    sys.exit('the derived variable '+var_name+' cannot be derived from the derived variable '+name)
+            derived_vars[var_name] = derivation
+        return derived_vars
+
+    def get_derived_expression_inputs(self,
+                                      var_name,
+                                      expression):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function checks that the expression of a derived variable has only numbers,
+        variables, the operators of DERIVED_VAR_OPERATORS and calls of the functions of
+        DERIVED_VAR_FUNCTIONS, and finds its source variables
+        Arguments
+        ---------
+        var_name: string, name of the derived variable
+        expression: string, expression of the derived variable
+        Returns
+        -------
+        inputs: list of string, names of the source variables in the expression
+        """
+        try:
+            tree = ast.parse(expression, mode='eval')
+        except SyntaxError as error:
+            sys.exit('expression of the derived variable '+var_name+' is not valid: '+str(error))
+        inputs = []
+        def check(node):
+            if isinstance(node, ast.Expression):
+                check(node.body)
+            elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and \
+                 not isinstance(node.value, bool):
+                pass
+            elif isinstance(node, ast.Name):
+                if (node.id not in DERIVED_VAR_CONSTANTS) and (node.id not in inputs):
+                    inputs.append(node.id)
+            elif isinstance(node, ast.BinOp) and (type(node.op) in DERIVED_VAR_OPERATORS):
+                check(node.left)
+                check(node.right)
+            elif isinstance(node, ast.UnaryOp) and (type(node.op) in DERIVED_VAR_OPERATORS):
+                check(node.operand)
+            elif isinstance(node, ast.Compare) and (len(node.ops) == 1) and (type(node.ops[0]) in DERIVED_VAR_OPERATORS):
+                check(node.left)
+                check(node.comparators[0])
+            elif isinstance(node, ast.Call) and (self.get_derived_function_name(node.func) in DERIVED_VAR_FUNCTIONS) and \
+                 not node.keywords and not any(isinstance(arg, ast.Starred) for arg in node.args):
+                for arg in node.args:
+                    check(arg)
+            else:
+                sys.exit('expression of the derived variable '+var_name+' can only have numbers, variables, '+\
+                         'arithmetic operators, comparisons and the functions '+', '.join(DERIVED_VAR_FUNCTIONS)+\
+                         '; not allowed: '+ast.unparse(node))
+        check(tree)
+        return inputs
+
+    def get_derived_function_name(self,
+                                  func):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the name of the function called in the expression of a derived
+        variable, given as name or np.name
+        Arguments
+        ---------
+        func: ast node, the function of the call
+        Returns
+        -------
+        name: string, name of the function or None
+        """
+        if isinstance(func, ast.Name):
+            return func.id
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and (func.value.id == 'np'):
+            return func.attr
+        return None
+
+    def get_source_var_names(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the variables that are read from the source netCDF files, the
+        variables of var_names that are not derived and the source variables of the derived
+        variables, each once
+        Returns
+        -------
+        source_var_names: list of string, name of the variables in the source netCDF files
+        """
+        source_var_names = [var_name for var_name in self.var_names if var_name not in self.derived_vars]
+        for var_name in self.var_names:
+            for name in self.derived_vars.get(var_name, {}).get('inputs', []):
+                if name not in source_var_names:
+                    source_var_names.append(name)
+        return source_var_names
+
+    def get_output_name(self,
+                        i,
+                        statistic):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the name of a statistic of a remapped variable in the remapped files
+        Arguments
+        ---------
+        i: int, index of the variable in var_names
+        statistic: string, statistic of the variable
+        Returns
+        -------
+        var_name: string, the remapped variable name with the statistic as suffix except for the mean
+        """
+        if statistic == 'mean':
+            return self.var_names_remapped[i]
+        return self.var_names_remapped[i] + '_' + statistic
+
+    def get_output_attributes(self,
+                              var_attributes,
+                              statistic):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the long_name and units of a statistic of a remapped variable
+        Arguments
+        ---------
+        var_attributes: dict, attributes of the variable in the source netCDF file
+        statistic: string, statistic of the variable
+        Returns
+        -------
+        attributes: dict, long_name and units of the statistic if exist
+        """
+        attributes = {att: var_attributes[att] for att in ('long_name', 'units') if att in var_attributes}
+        if statistic == 'valid_frac':
+            attributes['units'] = '1'
+            attributes['long_name'] = 'fraction of the target shape with values of ' + \
+                                      str(var_attributes.get('long_name', 'the variable'))
+        elif statistic != 'mean' and 'long_name' in attributes:
+            attributes['long_name'] = str(attributes['long_name']) + ' (' + \
+                                      {'max': 'maximum', 'min': 'minimum', 'std': 'standard deviation'}[statistic] + \
+                                      ' over the target shape)'
+        return attributes
+
+    def get_size_statement(self,
+                           values_size,
+                           target_name,
+                           quantization_saving=None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reports the size of a remapped file or store if the remapped variables
+        are quantized; the reduction by the quantization is reported against the same values
+        encoded without quantization if it is measured, otherwise the size is only compared
+        with the uncompressed values
+        Arguments
+        ---------
+        values_size: int, bytes of the uncompressed values of all the variables
+        target_name: string, name of the remapped netCDF file or Zarr store
+        quantization_saving: int, bytes saved by the quantization from get_quantization_saving
+        or None if not measured
+        Returns
+        -------
+        statement: string, the report or empty if no variable is quantized
+        """
+        # the quantization lists are not set up if the remapped files are converted on their own
+        digits = (self.significant_digits or []) + (self.least_significant_digit or [])
+        if all(digit is None for digit in digits):
+            return ''
+        if os.path.isdir(target_name):
+            target_size = sum(os.path.getsize(os.path.join(root, file_name))
+                              for root, dirs, file_names in os.walk(target_name) for file_name in file_names)
+        else:
+            target_size = os.path.getsize(target_name)
+        if quantization_saving is not None:
+            unquantized_size = target_size + quantization_saving
+            return 'The quantization reduces the remapped file from ' + str(unquantized_size) + ' to ' +\
+                   str(target_size) + ' bytes, by ' +\
+                   str(round(100 * quantization_saving / max(unquantized_size, 1), 1)) + '% \n'
+        return 'The remapped file takes ' + str(target_size) + ' bytes, ' +\
+               str(round(100 * target_size / max(values_size, 1), 1)) + '% of the ' + str(values_size) +\
+               ' bytes of its uncompressed values \n'
+
+    def get_nc_attributes(self,
+                          global_attributes,
+                          nc_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the general attributes of a remapped netCDF file including the
+        license and history of the source netCDF file
+        Arguments
+        ---------
+        global_attributes: dict, global attributes of the source netCDF file
+        nc_name: string, name of the source netCDF file(s) for the Source attribute
+        Returns
+        -------
+        nc_attributes: dict, general attributes for the remapped netCDF file
+        """
+        # Check data license
+        nc_att_list = list(global_attributes.keys())
+        nc_att_list_lower = [each_att.lower() for each_att in nc_att_list]
+        if self.license is None and ('license' not in nc_att_list_lower):
+            self.license == 'the original license of the source NetCDF file is not provided'
+        if ('license' in nc_att_list_lower):
+            if 'license' in nc_att_list:
+                self.license == global_attributes['license']
+            elif 'License' in nc_att_list:
+                self.license == global_attributes['License']
+            elif 'LICENSE' in nc_att_list:
+                self.license == global_attributes['LICENSE']
+            else:
+                self.license = ''
+            self.license == 'Original data license '+str(self.license)
+
+        # get the history
+        org_hist = ''
+        org_license = ''
+        for key in global_attributes.keys():
+            if 'history' in key.lower():
+                org_hist = org_hist +' '+ key + ': '+ global_attributes[key]
+            if 'license' in key.lower():
+                org_license = org_license +' '+ key + ': '+ global_attributes[key]
+        # general attributes for NetCDF file
+        nc_attributes = {'Conventions': 'CF-1.6'}
+        if self.author_name is not None:
+            nc_attributes['Author'] = 'The data were written by ' + self.author_name
+        if self.license is None:
+            self.license = 'No license for remapping'
+        if org_license == '':
+            org_license = 'No license from original file is detected'
+        nc_attributes['License'] = self.license +'; Originla license: '+ org_license
+        nc_attributes['History'] = 'Created ' + time.ctime(time.time()) + 'by EASYMORE nc_remapper; original file history: ' +\
+                                   org_hist
+        nc_attributes['easymore_hash'] = self.easymore_hash
+        nc_attributes['Source'] = 'Remapped by EASYMORE nc_remapper from original file: '+ nc_name
+        return nc_attributes
+
+    def get_chunk_sizes(self,
+                        length_time,
+                        var_format):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the chunk sizes of a remapped variable for the access pattern
+        of chunk_access; the chunks hold about chunk_bytes. If chunk_access is not provided
+        the chunks are one time step by remapped_chunk_size target shapes
+        Arguments
+        ---------
+        length_time: int, length of the time dimension of the remapped variable
+        var_format: string, format of the remapped variable such as f4 or f8
+        Returns
+        -------
+        chunk_sizes: tuple of int, chunk sizes along (time, remapped_dim_id) or None for the
+        netCDF4 default
+        """
+        n = self.number_of_target_elements
+        length_time = max(int(length_time), 1)
+        if self.chunk_access is None:
+            if self.remapped_chunk_size == None:
+                return None # Use netCDF4 default values, i.e. (1,n) chunk lengths for (unlimited,limited) dimensions, where n is the length of the limited dim
+            chunk_length = min(self.remapped_chunk_size, n) # don't make a chunk > data length
+            return (1, chunk_length) # (time,remap_dim)
+        # number of values in a chunk
+        chunk_values = max(int(self.chunk_bytes) // np.dtype(var_format).itemsize, 1)
+        if self.chunk_access == 'time_series':
+            # the whole time of the file for as many target shapes as fit in a chunk
+            chunk_time = min(length_time, chunk_values)
+            chunk_length = min(max(chunk_values // chunk_time, 1), n)
+        elif self.chunk_access == 'map':
+            # all the target shapes for as many time steps as fit in a chunk
+            chunk_length = min(chunk_values, n)
+            chunk_time = min(max(chunk_values // chunk_length, 1), length_time)
+        else:
+            # the same fraction of the time and target shapes in a chunk
+            fraction = min(np.sqrt(chunk_values / (length_time * n)), 1.0)
+            chunk_time = min(max(int(round(length_time * fraction)), 1), length_time)
+            chunk_length = min(max(chunk_values // chunk_time, 1), n)
+        return (chunk_time, chunk_length)
+
+    def start_nc_writer(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function starts a writer thread that runs the writing jobs, such as writing and
+        compressing a remapped variable, in the order they are submitted while the next
+        variable or file is remapped. The queue of the writer holds up to write_queue_depth
+        jobs; if write_queue_depth is 0 the jobs are run when submitted
+        Returns
+        -------
+        submit: function, submits a writing job (a function without arguments) to the writer
+        close: function, waits for the submitted jobs to finish and stops the writer; an error
+        of a writing job is raised by submit or close
+        """
+        write_queue_depth = 0 if self.write_queue_depth is None else int(self.write_queue_depth)
+        if write_queue_depth < 1:
+            return (lambda job: job()), (lambda: None)
+        jobs = queue.Queue(maxsize=write_queue_depth)
+        errors = []
+        def writer():
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                if not errors: # skip the remaining jobs after an error
+                    try:
+                        job()
+                    except BaseException as e: # pass the error, including sys.exit, to the caller
+                        errors.append(e)
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        def submit(job):
+            if errors:
+                raise errors[0]
+            jobs.put(job)
+        def close():
+            jobs.put(None)
+            thread.join()
+            if errors:
+                raise errors[0]
+        return submit, close
+
+    def create_remapped_nc(self,
+                           target_nc,
+                           time_var,
+                           time_unit,
+                           time_cal,
+                           time_dtype_code,
+                           time_bounds_data,
+                           hruID_var,
+                           hruID_lat,
+                           hruID_lon,
+                           compflag,
+                           complevel):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function creates a remapped netCDF file with the time, time bounds, ID, lat and
+        lon variables
+        Arguments
+        ---------
+        target_nc: dict, with the file_name of the remapped netCDF file; the opened file is
+        added to it as ncid and the available compression codec as compression
+        time_var: numpy array, time values from the source netCDF file
+        time_unit: string, units of time
+        time_cal: string, calendar of time
+        time_dtype_code: string, type of the time variable, f8 or i4
+        time_bounds_data: numpy array, time bounds from the source netCDF file or None
+        hruID_var: numpy array, ID of the target shapes
+        hruID_lat: numpy array, latitude of the target shapes
+        hruID_lon: numpy array, longitude of the target shapes
+        compflag: bool, compress the variables
+        complevel: int, compression level
+        """
+        with NC_LOCK:
+            ncid = nc4.Dataset(target_nc['file_name'], "w", format="NETCDF4")
+            target_nc['ncid'] = ncid
+            # check if the compression codec is available
+            target_nc['compression'] = self.compression
+            has_filter = {'zstd': ncid.has_zstd_filter,
+                          'bzip2': ncid.has_bzip2_filter,
+                          'szip': ncid.has_szip_filter,
+                          'blosc': ncid.has_blosc_filter}.get(self.compression.split('_')[0])
+            if (has_filter is not None) and not has_filter():
+                print('compression '+self.compression+' is not supported by the installed netCDF/HDF5 libraries; '+\
+                      'zlib is used instead')
+                target_nc['compression'] = 'zlib'
+            # define the dimensions
+            dimid_N = ncid.createDimension(self.remapped_dim_id, len(hruID_var))  # limited dimensiton equal the number of hruID
+            dimid_T = ncid.createDimension('time', None)   # unlimited dimensiton
+            # Variable time
+            time_varid = ncid.createVariable('time', time_dtype_code, ('time', ), zlib=compflag, complevel=complevel)
+            # Attributes
+            time_varid.long_name = self.var_time
+            time_varid.units = time_unit  # e.g. 'days since 2000-01-01 00:00' should change accordingly
+            time_varid.calendar = time_cal
+            time_varid.standard_name = self.var_time
+            time_varid.axis = 'T'
+            time_varid[:] = time_var
+            # Variables lat, lon, subbasin_ID
+            lat_varid = ncid.createVariable(self.remapped_var_lat, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
+            lon_varid = ncid.createVariable(self.remapped_var_lon, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
+            hruId_varid = ncid.createVariable(self.remapped_var_id, 'f8', (self.remapped_dim_id, ), zlib=compflag, complevel=complevel)
+            # Attributes
+            lat_varid.long_name = self.remapped_var_lat
+            lon_varid.long_name = self.remapped_var_lon
+            hruId_varid.long_name = 'shape ID'
+            lat_varid.units = 'degrees_north'
+            lon_varid.units = 'degrees_east'
+            hruId_varid.units = '1'
+            lat_varid.standard_name = self.remapped_var_lat
+            lon_varid.standard_name = self.remapped_var_lon
+            lat_varid[:] = hruID_lat
+            lon_varid[:] = hruID_lon
+            hruId_varid[:] = hruID_var
+            if time_bounds_data is not None:
+                if 'bounds' not in ncid.dimensions:
+                    ncid.createDimension('bounds', time_bounds_data.shape[1])
+                time_bounds_var = ncid.createVariable(self.var_time_bound,\
+                                                      time_bounds_data.dtype,\
+                                                      dimensions=('time', 'bounds'))
+                time_bounds_var[:] = time_bounds_data
+
+    def write_remapped_var(self,
+                           target_nc,
+                           i,
+                           var_value,
+                           var_attributes,
+                           compflag,
+                           complevel,
+                           chunk_sizes,
+                           statistic='mean'):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function writes a statistic of a remapped variable into the remapped netCDF file;
+        for a quantized variable the bytes saved by the quantization are added to target_nc
+        Arguments
+        ---------
+        target_nc: dict, with the opened remapped netCDF file as ncid and its compression
+        i: int, index of the variable in var_names
+        var_value: numpy array, remapped values of the variable
+        var_attributes: dict, attributes of the variable in the source netCDF file
+        compflag: bool, compress the variable
+        complevel: int, compression level
+        chunk_sizes: tuple of int, chunk sizes of the variable or None
+        statistic: string, statistic of the variable
+        """
+        var_attributes = self.get_output_attributes(var_attributes, statistic)
+        with NC_LOCK:
+            varid = target_nc['ncid'].createVariable(self.get_output_name(i, statistic), \
+                                                     self.format_list[i], ('time',self.remapped_dim_id ),\
+                                                     fill_value = self.fill_value_list[i],\
+                                                     compression=target_nc['compression'] if compflag else None,\
+                                                     complevel=complevel,\
+                                                     shuffle=self.shuffle,\
+                                                     chunksizes=chunk_sizes,\
+                                                     **self.get_quantization(i))
+            varid [:] = var_value
+            # Pass attributes
+            if 'long_name' in var_attributes:
+                varid.long_name = var_attributes['long_name']
+            if 'units' in var_attributes:
+                varid.units = var_attributes['units']
+        if self.get_quantization(i):
+            target_nc['quantization_saving'] = target_nc.get('quantization_saving', 0) +\
+                self.get_quantization_saving(i, var_value, target_nc['compression'] if compflag else None,
+                                             complevel, chunk_sizes)
+
+    def get_quantization_saving(self,
+                                i,
+                                var_value,
+                                compression,
+                                complevel,
+                                chunk_sizes):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function encodes the values of a remapped variable with and without its
+        quantization, with the same format, chunks, compression and shuffle, into two
+        temporary netCDF files and returns the bytes saved by the quantization
+        Arguments
+        ---------
+        i: int, index of the variable in var_names
+        var_value: numpy array, remapped values of the variable
+        compression: string, compression codec of the variable or None
+        complevel: int, compression level
+        chunk_sizes: tuple of int, chunk sizes of the variable or None
+        Returns
+        -------
+        saving: int, bytes of the values without quantization minus the bytes with quantization
+        """
+        import tempfile
+        sizes = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for quantization in [{}, self.get_quantization(i)]:
+                file_name = os.path.join(temp_dir, str(len(sizes)) + '.nc')
+                with NC_LOCK:
+                    with nc4.Dataset(file_name, 'w', format='NETCDF4') as ncid:
+                        ncid.createDimension('time', None)
+                        ncid.createDimension(self.remapped_dim_id, var_value.shape[1])
+                        varid = ncid.createVariable('values', self.format_list[i], ('time', self.remapped_dim_id),\
+                                                    fill_value = self.fill_value_list[i],\
+                                                    compression=compression,\
+                                                    complevel=complevel,\
+                                                    shuffle=self.shuffle,\
+                                                    chunksizes=chunk_sizes,\
+                                                    **quantization)
+                        varid [:] = var_value
+                sizes.append(os.path.getsize(file_name))
+        return sizes[0] - sizes[1]
+
+    def close_remapped_nc(self,
+                          target_nc,
+                          nc_attributes,
+                          nc_name,
+                          target_name,
+                          statement_print,
+                          time_start,
+                          manifest=True):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function writes the general attributes, closes the remapped
+        netCDF file, renames it to its final name and records the file in the manifest
+        if manifest
+        Arguments
+        ---------
+        target_nc: dict, with the opened remapped netCDF file as ncid and its file_name
+        nc_attributes: dict, general attributes for the remapped netCDF file
+        nc_name: string, name of the source netCDF file
+        target_name: string, final name of the remapped netCDF file
+        statement_print: string, report of the remapping to be completed and printed
+        time_start: datetime, start of the remapping of the file
+        manifest: bool, record the remapped netCDF file in the manifest
+        """
+        with NC_LOCK:
+            ncid = target_nc.pop('ncid')
+            ncid.setncatts(nc_attributes)
+            values_size = sum(varid.size * varid.dtype.itemsize for varid in ncid.variables.values())
+            # closing
+            ncid.close()
+        os.replace(target_nc['file_name'], target_name)
+        statement_print = statement_print + self.get_size_statement(values_size, target_name,
+                                                                    target_nc.pop('quantization_saving', None))
+        # record the complete output in the manifest
+        if manifest:
+            self.append_manifest(nc_name, target_name)
+        time_end = datetime.now()
+        time_diff = time_end-time_start
+        statement_print = statement_print + 'Ended at date and time ' + str(time_end) + ' \n'
+        statement_print = statement_print + 'It took '+ str(time_diff.total_seconds()) +\
+        ' seconds to finish the remapping of variable(s)' +' \n'+ ('---------------------')
+        print(statement_print)
+
+    def get_table_time(self,
+                       time_var,
+                       time_unit,
+                       time_cal):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function converts the time of the remapped values to date and time for the
+        tabular outputs; time of calendars that are not supported by pandas remains numeric
+        Arguments
+        ---------
+        time_var: numpy array, time values
+        time_unit: string, units of time
+        time_cal: string, calendar of time
+        Returns
+        -------
+        time_table: pandas DatetimeIndex or numpy array of the time values
+        """
+        try:
+            return pd.to_datetime(nc4.num2date(np.array(time_var), time_unit, calendar=time_cal,
+                                               only_use_cftime_datetimes=False,
+                                               only_use_python_datetimes=True))
+        except ValueError:
+            return np.array(time_var)
+
+    def save_remapped_parquet_mapping(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves the ID, lat and lon of the target shapes, in the order of the
+        remapped values, in Mapping_<case_name>_remapped.parquet once per run
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
+        table = pa.table({self.remapped_var_id: self.get_table_ID(hruID_var),
+                          self.remapped_var_lat: hruID_lat,
+                          self.remapped_var_lon: hruID_lon})
+        table = table.replace_schema_metadata({'easymore_hash': self.easymore_hash})
+        target_name_map = self.output_dir + 'Mapping_' + self.case_name + '_remapped.parquet'
+        pq.write_table(table, target_name_map)
+        print('Saving the ID, lat, lon map at '+target_name_map)
+
+    def get_table_ID(self,
+                     hruID_var):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the IDs of the target shapes as integer if they are all
+        integer values and otherwise as float for the tabular outputs
+        Arguments
+        ---------
+        hruID_var: numpy array, ID of the target shapes
+        Returns
+        -------
+        hruID_var: numpy array, ID of the target shapes as int64 or float64
+        """
+        hruID_var = np.array(hruID_var, dtype=np.float64)
+        if np.all(np.isfinite(hruID_var)) and np.all(np.mod(hruID_var, 1) == 0):
+            return hruID_var.astype(np.int64)
+        return hruID_var
+
+    def save_remapped_parquet(self,
+                              nc_name,
+                              time_var,
+                              time_unit,
+                              time_cal,
+                              var_values,
+                              var_attributes):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves the remapped values of a source netCDF file from memory in parquet
+        format. In long layout one table, <case_name>_remapped_<source>.parquet, has a row for
+        every time step and target shape with the columns time, ID and the variables; in wide
+        layout one table per variable, <case_name>_remapped_<variable>_<source>.parquet, has
+        a row for every time step with the columns time and ID_<ID>. The fill values are saved
+        as null and every variable is compressed with its codec from parquet_compression
+        Arguments
+        ---------
+        nc_name: string, name of the source netCDF file
+        time_var: numpy array, time values
+        time_unit: string, units of time
+        time_cal: string, calendar of time
+        var_values: dict, remapped values of the variables with the names of get_output_variables as keys
+        var_attributes: dict, attributes of the variables in the source netCDF file with
+        var_names as keys
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        time_table = self.get_table_time(time_var, time_unit, time_cal)
+        hruID_var = self.get_table_ID(self.target_ID_lat_lon['ID_t'])
+        metadata = {'easymore_hash': self.easymore_hash,
+                    'source': nc_name,
+                    'time_units': time_unit,
+                    'calendar': time_cal}
+        # values of the variables with the fill values as null
+        columns = {}
+        for i, var_name, statistic in self.get_output_variables():
+            var_value = np.asarray(var_values[var_name]).astype(self.format_list[i])
+            mask = np.isnan(var_value) | (var_value == np.array(self.fill_value_list[i]).astype(self.format_list[i]))
+            columns[var_name] = (var_value, mask)
+        if self.parquet_layout == 'long':
+            length_time, length_ID = len(time_table), len(hruID_var)
+            arrays = [pa.array(np.repeat(np.array(time_table), length_ID)),
+                      pa.array(np.tile(hruID_var, length_time))]
+            fields = [pa.field('time', arrays[0].type),
+                      pa.field(self.remapped_var_id, arrays[1].type)]
+            compression = {'time': 'zstd', self.remapped_var_id: 'zstd'}
+            for i, var_name, statistic in self.get_output_variables():
+                var_value, mask = columns[var_name]
+                field_metadata = {att: str(value) for att, value in
+                                  self.get_output_attributes(var_attributes[self.var_names[i]], statistic).items()}
+                arrays.append(pa.array(var_value.ravel(), mask=mask.ravel()))
+                fields.append(pa.field(var_name, arrays[-1].type, metadata=field_metadata))
+                compression[var_name] = self.parquet_compression[i]
+            table = pa.Table.from_arrays(arrays, schema=pa.schema(fields, metadata=metadata))
+            target_name_parquet = self.output_dir + self.case_name + '_remapped_' + os.path.basename(nc_name) + '.parquet'
+            pq.write_table(table, target_name_parquet, compression=compression)
+        else:
+            column_name = ['ID_'+str(s) for s in hruID_var]
+            for i, var_name, statistic in self.get_output_variables():
+                var_value, mask = columns[var_name]
+                arrays = [pa.array(np.array(time_table))] + \
+                         [pa.array(var_value[:, j], mask=mask[:, j]) for j in range(len(column_name))]
+                var_metadata = dict(metadata, **{att: str(value) for att, value in
+                                                 self.get_output_attributes(var_attributes[self.var_names[i]], statistic).items()})
+                table = pa.Table.from_arrays(arrays, names=['time'] + column_name)
+                table = table.replace_schema_metadata(var_metadata)
+                target_name_parquet = self.output_dir + self.case_name + '_remapped_' + var_name +\
+                                      '_' + os.path.basename(nc_name) + '.parquet'
+                pq.write_table(table, target_name_parquet, compression=self.parquet_compression[i])
+        print('Saving the remapped values of '+nc_name+' in parquet format')
+
+    def save_remapped_csv_mapping(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves the ID, lat and lon of the target shapes, in the order of the
+        columns of the remapped csv files, in Mapping_<case_name>_remapped.csv once per run
+        """
+        remap, hruID_var, hruID_lat, hruID_lon = self.load_remap()
+        maps = np.zeros([2,len(hruID_lat)])
+        maps [0,:] = hruID_lat
+        maps [1,:] = hruID_lon
+        df_map = pd.DataFrame(data=maps, index=["lat","lon"], columns=self.csv_column_name)
+        target_name_map = self.output_dir + 'Mapping_' + self.case_name + '_remapped.csv'
+        if os.path.exists(target_name_map): # remove file if exists
+            os.remove(target_name_map)
+        df_map.to_csv(target_name_map)
+        print('Saving the ID, lat, lon map at '+target_name_map)
+
+    def save_remapped_csv(self,
+                          nc_name,
+                          time_var,
+                          time_unit,
+                          time_cal,
+                          var_values,
+                          var_attributes):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function saves the remapped values of every variable of a source netCDF file
+        from memory in csv files with a column per target shape; the values are rounded to
+        the format of the variable and the fill values are saved as empty
+        Arguments
+        ---------
+        nc_name: string, name of the source netCDF file
+        time_var: numpy array, time values
+        time_unit: string, units of time
+        time_cal: string, calendar of time
+        var_values: dict, remapped values of the variables with the names of get_output_variables as keys
+        var_attributes: dict, attributes of the variables in the source netCDF file with
+        var_names as keys
+        """
+        time_csv = nc4.num2date(np.array(time_var), time_unit, calendar=time_cal,
+                                only_use_cftime_datetimes=False)
+        for i, var_name, statistic in self.get_output_variables():
+            var_value = np.asarray(var_values[var_name]).astype(self.format_list[i])
+            fill_value = np.array(self.fill_value_list[i]).astype(self.format_list[i])
+            if np.issubdtype(var_value.dtype, np.floating):
+                var_value = np.where(var_value == fill_value, np.nan, var_value)
+            else:
+                var_value = np.where(var_value == fill_value, np.nan, var_value.astype(np.float64))
+            # assign the variable to the data frame with the ID column name
+            df = pd.DataFrame(data=var_value, columns=self.csv_column_name)
+            df.insert(loc=0, column='time', value=time_csv)
+            # get the unit for the variable if exists
+            unit_name = ''
+            attributes = self.get_output_attributes(var_attributes[self.var_names[i]], statistic)
+            if 'units' in attributes:
+                unit_name = str(attributes['units'])
+            # remove the forbidden character based on
+            # ['#','%','&','{','}','\','<','>','*','?','/',' ','$','!','`',''','"',':','@','+',',','|','=']
+            unit_name = re.sub("[#%&{}*<>*?*$!`:@+,|= ]","",unit_name)
+            unit_name = unit_name.replace("\\","")
+            unit_name = unit_name.replace("//","")
+            unit_name = unit_name.replace("/","")
+            target_name_csv = self.output_dir + self.case_name + '_remapped_'+ var_name +\
+             '_' + unit_name +\
+             '_' + os.path.basename(nc_name)+ '.csv'
+            if os.path.exists(target_name_csv): # remove file if exists
+                os.remove(target_name_csv)
+            df.to_csv(target_name_csv)
+            print('Converting variable '+ var_name +' remapped from '+nc_name+' to '+target_name_csv)
+
+    def get_source_nc_shard(self,
+                            nc_names,
+                            number_of_cells = 1):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the source netCDF files of shard shard_index out of shard_count
+        shards. The shards are deterministic for the same list of files; if schedule_by_cost
+        is True the files are assigned from the largest to the smallest estimated cost to the
+        shard with the lowest total cost, otherwise every shard_count-th file is taken
+        Arguments
+        ---------
+        nc_names: list of nc file names
+        number_of_cells: int, number of source cells in the remapping file (rows of remapping file)
+        Returns
+        -------
+        nc_names_shard: list of nc file names of the shard in their original order
+        """
+        if (self.shard_index is None) or not (0 <= int(self.shard_index) < int(self.shard_count)):
+            sys.exit('shard_index should be provided and be between 0 and shard_count-1')
+        shard_index = int(self.shard_index)
+        shard_count = int(self.shard_count)
+        if not self.schedule_by_cost:
+            return nc_names[shard_index::shard_count]
+        costs = self.get_source_nc_cost(nc_names, number_of_cells)
+        loads = [0] * shard_count
+        shard = set()
+        for nc_name in sorted(nc_names, key=lambda nc_name: -costs[nc_name]):
+            i = loads.index(min(loads))
+            loads[i] = loads[i] + costs[nc_name]
+            if i == shard_index:
+                shard.add(nc_name)
+        return [nc_name for nc_name in nc_names if nc_name in shard]
+
+    def claim_work_dir_remap(self,
+                             wait = 10):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function decides which of the processes sharing the work directory creates the
+        remapping file. The first process that creates the lock file creates the remapping file
+        while the other processes wait until the remapping file is published in the work directory.
+        The lock is refreshed while the remapping file is created; a lock that is older than
+        claim_timeout is taken over by one of the waiting processes
+        Arguments
+        ---------
+        wait: float, seconds between checks for the published remapping file
+        Returns
+        -------
+        create_remap_nc: boolean, True if this process should create the remapping file
+        """
+        for folder in ['', 'claims', 'done']:
+            os.makedirs(os.path.join(self.work_dir_case, folder), exist_ok=True)
+        lock_name = os.path.join(self.work_dir_case, 'remap.lock')
+        remap_info_name = os.path.join(self.work_dir_case, 'remap.json')
+        while not os.path.isfile(remap_info_name):
+            try:
+                fd = os.open(lock_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                os.write(fd, (socket.gethostname()+' '+str(os.getpid())).encode())
+                os.close(fd)
+                self.remap_lock_heartbeat = self.start_heartbeat(lock_name)
+                print('EASYMORE creates the remapping file for the processes sharing work directory ', self.work_dir)
+                return True
+            except FileExistsError:
+                pass
+            if self.remove_stale_claim(lock_name):
+                print('EASYMORE detects a stale lock of the remapping file in ', self.work_dir)
+                continue
+            print('EASYMORE waits for the remapping file created by another process sharing work directory ', self.work_dir)
+            time.sleep(wait)
+        with open(remap_info_name) as f:
+            remap_info = json.load(f)
+        self.remap_nc = remap_info['remap_nc']
+        self.attr_nc = remap_info['attr_nc']
+        return False
+
+    def publish_work_dir_remap(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function publishes the created remapping and attribute file names in the work
+        directory for the other processes sharing the work directory and stops refreshing the
+        lock of the remapping file
+        """
+        remap_info_name = os.path.join(self.work_dir_case, 'remap.json')
+        with open(remap_info_name+'.tmp', 'w') as f:
+            json.dump({'remap_nc': os.path.abspath(self.remap_nc),
+                       'attr_nc': os.path.abspath(self.attr_nc)}, f)
+        os.replace(remap_info_name+'.tmp', remap_info_name)
+        self.stop_heartbeat(self.remap_lock_heartbeat)
+        self.remap_lock_heartbeat = None
+
+    def claim_nc(self,
+                 nc_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function claims a source netCDF file in the work directory by creating its claim
+        file atomically. A claim that is older than claim_timeout is renamed (atomic) by one of
+        the processes which then claims the file again
+        Arguments
+        ---------
+        nc_name: string, name of the source netCDF file
+        Returns
+        -------
+        claimed: boolean, True if this process has claimed the file
+        """
+        claim_name = os.path.join(self.work_dir_case, 'claims', os.path.basename(nc_name)+'.claim')
+        try:
+            fd = os.open(claim_name, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            os.write(fd, (socket.gethostname()+' '+str(os.getpid())+' '+str(datetime.now())).encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            pass
+        if not self.remove_stale_claim(claim_name):
+            return False
+        print('EASYMORE detects a stale claim for ', nc_name, ' and claims it again')
+        return self.claim_nc(nc_name)
+
+    def remap_work_dir(self,
+                       nc_names):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function claims, remaps and marks as done the source netCDF files that are not
+        claimed or done by the other processes sharing the work directory. The files that are
+        claimed by the other processes are tried again every quarter of claim_timeout, at most
+        every 10 seconds, until they are done, so a file of a process that stops is taken over once its claim is stale; the
+        function returns when all the files are done, or after one pass over the files if
+        claim_timeout is None. Several independent processes can run this
+        function on the same work directory
+        Arguments
+        ---------
+        nc_names: list of nc file names to be remapped
+        Returns
+        -------
+        nc_names_remapped: list of nc file names remapped by this process
+        """
+        for folder in ['claims', 'done']:
+            os.makedirs(os.path.join(self.work_dir_case, folder), exist_ok=True)
+        nc_names_remapped = []
+        nc_names_pending = list(nc_names)
+        while nc_names_pending:
+            nc_names_claimed = [] # claimed by the other processes
+            for nc_name in nc_names_pending:
+                done_name = os.path.join(self.work_dir_case, 'done', os.path.basename(nc_name)+'.done')
+                claim_name = os.path.join(self.work_dir_case, 'claims', os.path.basename(nc_name)+'.claim')
+                if os.path.isfile(done_name):
+                    continue
+                if not self.claim_nc(nc_name):
+                    nc_names_claimed.append(nc_name)
+                    continue
+                # refresh the claim while remapping so it is not considered stale
+                heartbeat = self.start_heartbeat(claim_name)
+                try:
+                    self.target_nc_creation([nc_name])
+                except BaseException:
+                    self.stop_heartbeat(heartbeat)
+                    heartbeat = None
+                    if os.path.isfile(claim_name): # release the claim for the other processes
+                        os.remove(claim_name)
+                    raise
+                finally:
+                    self.stop_heartbeat(heartbeat)
+                with open(done_name+'.tmp', 'w') as f:
+                    f.write(socket.gethostname()+' '+str(os.getpid())+' '+str(datetime.now()))
+                os.replace(done_name+'.tmp', done_name)
+                nc_names_remapped.append(nc_name)
+            nc_names_pending = [nc_name for nc_name in nc_names_claimed if not os.path.isfile(
+                                os.path.join(self.work_dir_case, 'done', os.path.basename(nc_name)+'.done'))]
+            if nc_names_pending and (self.claim_timeout is None):
+                break # the claims are never taken over
+            if nc_names_pending:
+                print('EASYMORE waits for ', len(nc_names_pending), ' source nc file(s) claimed by other processes')
+                time.sleep(min(self.claim_timeout/4, 10))
+        return nc_names_remapped
+
+    def get_target_nc_name(self,
+                           nc_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the name of the remapped netCDF file for a source netCDF file
+        """
+        return self.output_dir + self.case_name + '_remapped_' + os.path.basename(nc_name)
+
+    def get_manifest_name(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the name of the manifest of completed outputs in the output directory
+        """
+        return self.output_dir + self.case_name + '_manifest.jsonl'
+
+    def source_nc_fingerprint(self,
+                              nc_name,
+                              head_bytes = 2**20):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns a fingerprint of a source netCDF file based on its name, size,
+        modification time and the first bytes of the file, without reading the entire file
+        """
+        fingerprint = hashlib.sha256()
+        stat = os.stat(nc_name)
+        fingerprint.update(os.path.basename(nc_name).encode())
+        fingerprint.update(str(stat.st_size).encode())
+        fingerprint.update(str(stat.st_mtime_ns).encode())
+        with open(nc_name, 'rb') as f:
+            fingerprint.update(f.read(head_bytes))
+        return fingerprint.hexdigest()
+
+    def file_checksum(self,
+                      file_name,
+                      block_size = 2**24):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the sha256 checksum of a file
+        """
+        checksum = hashlib.sha256()
+        with open(file_name, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                checksum.update(block)
+        return checksum.hexdigest()
+
+    def get_remap_hash(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the easymore_hash of a created remapping file from its inputs: the
+        files of the target and source shapefiles, the lat, lon and ID of the first source netCDF
+        file and the settings of the intersection. A remapping file that is created again from
+        the same inputs, such as by a run with resume, has the same hash as in the manifest
+        Returns
+        -------
+        easymore_hash: string, sha256 of the inputs of the remapping file
+        """
+        settings = ['target_shp_ID', 'target_shp_lat', 'target_shp_lon', 'source_nc_resolution',
+                    'approximate_edge_grids', 'var_lon', 'var_lat', 'var_ID', 'var_station',
+                    'source_shp_lat', 'source_shp_lon', 'source_shp_ID', 'clip_source_shp',
+                    'buffer_clip_source_shp', 'correction_shp_lon', 'tolerance', 'sort_ID',
+                    'point_method', 'idw_neighbours', 'idw_power']
+        checksum = hashlib.sha256(json.dumps({name: str(getattr(self, name, None)) for name in settings},
+                                             sort_keys=True).encode())
+        # the files of the shapefiles, such as .shp, .shx, .dbf and .prj
+        for shp_name in [self.target_shp, self.source_shp]:
+            if shp_name is None:
+                continue
+            file_names = [shp_name]
+            if os.path.splitext(shp_name)[1].lower() == '.shp':
+                file_names = [os.path.splitext(shp_name)[0]+extension for extension in ['.shp', '.shx', '.dbf', '.prj']]
+            for file_name in file_names:
+                if os.path.isfile(file_name):
+                    checksum.update(self.file_checksum(file_name).encode())
+        # the grid or stations of the source netCDF files
+        nc_name = self.get_source_nc_file_names(self.source_nc)[0]
+        with nc4.Dataset(nc_name) as ncid:
+            for var_name in [self.var_lat, self.var_lon, self.var_ID]:
+                if (var_name is not None) and (var_name in ncid.variables):
+                    checksum.update(np.ascontiguousarray(ncid.variables[var_name][:], dtype=np.float64).tobytes())
+        return checksum.hexdigest()
+
+    def append_manifest(self,
+                        nc_name,
+                        target_name):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function records a complete remapped file in the manifest of the output directory.
+        Each record is one line of json appended in one write so that parallel workers can
+        record their outputs in the same manifest
+        Arguments
+        ---------
+        nc_name: string, name of the source netCDF file
+        target_name: string, name of the remapped netCDF file
+        """
+        entry = {'source': os.path.basename(nc_name),
+                 'source_fingerprint': self.source_nc_fingerprint(nc_name),
+                 'easymore_hash': self.easymore_hash,
+                 'var_names': list(self.var_names),
+                 'var_names_remapped': list(self.var_names_remapped),
+                 'statistics': list(self.statistics),
+                 'target_ids': self.get_target_ids_hash(),
+                 'weight': None if self.weight_nc is None else self.weight_var+' of '+os.path.basename(self.weight_nc),
+                 'target': os.path.basename(target_name),
+                 'target_checksum': self.file_checksum(target_name),
+                 'time': str(datetime.now())}
+        line = (json.dumps(entry) + '\n').encode()
+        fd = os.open(self.get_manifest_name(), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def get_target_ids_hash(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function returns the hash of target_ids for the manifest
+        Returns
+        -------
+        target_ids_hash: string, sha256 of the sorted IDs of target_ids or None for all the target shapes
+        """
+        if self.target_ids is None:
+            return None
+        return hashlib.sha256(np.array(self.target_ids, dtype=np.float64).tobytes()).hexdigest()
+
+    def read_manifest(self):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reads the manifest of the output directory
+        Returns
+        -------
+        manifest: dictionary of remapped file name and its latest record
+        """
+        manifest = {}
+        if not os.path.isfile(self.get_manifest_name()):
+            return manifest
+        with open(self.get_manifest_name()) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # partial line from an interrupted run
+                manifest[entry['target']] = entry
+        return manifest
+
+    def check_manifest(self,
+                       nc_name,
+                       manifest = None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function checks if a source netCDF file is already remapped and recorded in the
+        manifest with the same source file, remapping file, variables and output checksum
+        Arguments
+        ---------
+        nc_name: string, name of the source netCDF file
+        manifest: dictionary, read manifest; if not provided the manifest is read
+        Returns
+        -------
+        complete: boolean, True if the remapped file is complete
+        """
+        if manifest is None:
+            manifest = self.read_manifest()
+        target_name = self.get_target_nc_name(nc_name)
+        entry = manifest.get(os.path.basename(target_name))
+        if entry is None or not os.path.isfile(target_name):
+            return False
+        if (entry['easymore_hash'] != self.easymore_hash) or\
+           (entry['var_names'] != list(self.var_names)) or\
+           (entry['var_names_remapped'] != list(self.var_names_remapped)) or\
+           (entry.get('statistics', ['mean']) != list(self.statistics)) or\
+           (entry.get('target_ids') != self.get_target_ids_hash()) or\
+           (entry.get('weight') != (None if self.weight_nc is None else self.weight_var+' of '+os.path.basename(self.weight_nc))) or\
+           (entry['source_fingerprint'] != self.source_nc_fingerprint(nc_name)):
+            return False
+        return entry['target_checksum'] == self.file_checksum(target_name)
+
+    def read_source_nc(self,
+                       nc_name,
+                       read_data=True):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function reads the time, attributes and the values of the variables
+        to be remapped from a source netCDF file in one pass
+        Arguments
+        ---------
+        nc_name: string, name of the netCDF file
+        read_data: bool, read the values of the variables; if False only the time and
+        attributes are read
+        Returns
+        -------
+        source: dict, with the keys nc_name, global_attributes, time, time_unit, time_cal,
+        time_dtype, time_dtype_code, time_bounds, var_attributes and data; data holds for each variable in
+        get_source_var_names a tuple of the values as numpy array and the position of the time dimension
+        """
+        source = {'nc_name': nc_name}
+        with NC_LOCK:
+            with nc4.Dataset(nc_name) as ncids:
+                source['global_attributes'] = dict(ncids.__dict__)
+                time_varid = ncids.variables[self.var_time]
+                if 'units' in time_varid.ncattrs():
+                    source['time_unit'] = time_varid.units
+                else:
+                    sys.exit('units is not provided for the time variable for source NetCDF of'+ nc_name)
+                if 'calendar' in time_varid.ncattrs():
+                    source['time_cal'] = time_varid.calendar
+                else:
+                    sys.exit('calendar is not provided for the time variable for source NetCDF of'+ nc_name)
+                source['time'] = time_varid[:]
+                source['time_dtype'] = str(time_varid.dtype)
+                source['time_dtype_code'] = 'f8' # initialize the time as float
+                if 'float' in source['time_dtype'].lower():
+                    source['time_dtype_code'] = 'f8'
+                elif 'int' in source['time_dtype'].lower():
+                    source['time_dtype_code'] = 'i4'
+                source['time_bounds'] = None
+                if self.var_time_bound is not None:
+                    source['time_bounds'] = ncids.variables[self.var_time_bound][:]
+                source['var_attributes'] = {}
+                for var_name in self.var_names:
+                    if var_name in self.derived_vars:
+                        source['var_attributes'][var_name] = {att: self.derived_vars[var_name][att]
+                                                              for att in ('long_name', 'units') if att in self.derived_vars[var_name]}
+                    else:
+                        varid = ncids.variables[var_name]
+                        source['var_attributes'][var_name] = {att: varid.getncattr(att) for att in varid.ncattrs()}
+                    if var_name in self.unit_conversions:
+                        source['var_attributes'][var_name]['units'] = self.unit_conversions[var_name][2]
+                # values of the variables, masked and scaled by xarray, in the window of load_remap;
+                # read under the lock as the writer thread may be writing a netCDF file
+                if read_data:
+                    source['data'] = {}
+                    with xr.open_dataset(nc_name, decode_times=False) as ds:
+                        for var_name in self.get_source_var_names():
+                            var = ds[var_name]
+                            if self.source_window is not None:
+                                # only the window of the source grid of the remapping
+                                var_dims = [dim for dim in var.dims if dim != self.var_time]
+                                var = var.isel({dim: slice(start, end) for dim, (start, end) in zip(var_dims, self.source_window)})
+                            source['data'][var_name] = (np.array(var), var.dims.index(self.var_time))
+        return source
+
+    def iter_source_nc(self,
+                       nc_names):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function yields the content of the source netCDF files, read by read_source_nc,
+        one after the other. If prefetch_depth is larger than 0 a background thread reads up
+        to prefetch_depth files ahead of the file that is being remapped
+        Arguments
+        ---------
+        nc_names: list of string, name of the netCDF files
+        Yields
+        -------
+        source: dict, the content of a source netCDF file from read_source_nc
+        """
+        prefetch_depth = 0 if self.prefetch_depth is None else int(self.prefetch_depth)
+        if (prefetch_depth < 1) or (len(nc_names) < 2):
+            for nc_name in nc_names:
+                yield self.read_source_nc(nc_name)
+            return
+        buffer = queue.Queue(maxsize=prefetch_depth)
+        stop = threading.Event()
+        def prefetch():
+            for nc_name in nc_names:
+                try:
+                    item = self.read_source_nc(nc_name)
+                except BaseException as e: # pass the error, including sys.exit, to the caller
+                    item = e
+                # wait for a free place in the buffer unless the caller has stopped
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set() or isinstance(item, BaseException):
+                    return
+        thread = threading.Thread(target=prefetch, daemon=True)
+        thread.start()
+        try:
+            for _ in nc_names:
+                item = buffer.get()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def __weighted_statistics(self,
+                              data_all,
+                              time_dim,
+                              fill_value,
+                              mapping_df,
+                              statistics=['mean'],
+                              unit_conversion=None,
+                              derived_var=None):
+        """
+        @ author:                  Shervan Gharari
+        @ Github:                  https://github.com/ShervanGharari/EASYMORE
+        @ author's email id:
+        @ license:                 GNU-GPLv3
+        This function calculates the statistics of the data over the target shapes for every
+        time step. The source values of the rows of the remapping are gathered once for a block
+        of time steps and every statistic is computed from them by sums over the target shapes.
+        The weighted average follows the rescaling of the weights of rescaledweights for the
+        time steps with missing values
+        Arguments
+        ---------
+        data_all: numpy array, values of the variable from the source netCDF file, or for
+        derived_var a dict of the values and the position of the time dimension of its source
+        variables
+        time_dim: int, position of the time dimension in data_all
+        fill_value: float, value for the targets with no valid source values
+        mapping_df: pandas dataframe, including the row and column of the source data and weight
+        statistics: list of string, statistics from mean, max, min, std and valid_frac
+        unit_conversion: tuple, scale and offset of the conversion of the units or None
+        derived_var: string, name of the variable of derived_vars that is evaluated on the
+        gathered values of its source variables or None
+        Returns
+        -------
+        statistics_values: dict, numpy arrays of the statistics from the nc file with the
+        statistics as keys
+        """
+        import scipy.sparse
+        if derived_var is None:
+            data_all = {None: (data_all, time_dim)}
+        arrays = {}
+        for name, (array, time_dim) in data_all.items():
+            if array.ndim == 3 and self.case in (1, 2):# 3D
+                if time_dim not in (0, 1, 2):
+                    raise ValueError("Time dimension not in the first 3 axes")
+            elif array.ndim == 2 and self.case == 3:# 2D
+                if time_dim not in (0, 1):
+                    raise ValueError("Time dimension not in the first 2 axes")
+            else:
+                raise ValueError("Unknown case value")
+            arrays[name] = np.moveaxis(array, time_dim, 0)
+        length_time = list(arrays.values())[0].shape[0]  # Number of time steps
+        # the target of every row of the remapping in the order of order_t
+        order_t, target = np.unique(np.array(mapping_df['order_t']), return_inverse=True)
+        number_of_rows = len(target)
+        weight = np.array(mapping_df['weight'], dtype=np.float64)
+        weight_valid = ~np.isnan(weight)
+        summation = scipy.sparse.csr_matrix((np.ones(number_of_rows), (target, np.arange(number_of_rows))),
+                                            shape=(len(order_t), number_of_rows))
+        def target_sum(values):
+            return (summation @ values.T).T
+        # the rows sorted by their target for the max and min
+        rows_sorted = np.argsort(target, kind='stable')
+        rows_start = np.searchsorted(target[rows_sorted], np.arange(len(order_t)))
+        # prepared the numpy arrays for ouptut
+        statistics_values = {statistic: np.zeros([length_time, len(order_t)]) for statistic in statistics}
+        # time steps that are gathered together
+        length_block = max(1, 2**22 // max(number_of_rows, 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for start in range(0, length_time, length_block):
+                end = min(start + length_block, length_time)
+                # Extract values for the specified case
+                values = {}
+                for name, array in arrays.items():
+                    if self.case in (1, 2):
+                        values[name] = array[start:end, self.rows, self.cols].astype(np.float64)
+                    else:
+                        values[name] = array[start:end, self.rows].astype(np.float64)
+                if derived_var is None:
+                    values = values[None]
+                else:
+                    values = self.evaluate_derived_var(derived_var, values)
+                values_valid = ~np.isnan(values) & weight_valid
+                weight_row = np.where(values_valid, weight, 0.0)
+                weight_row_sum = target_sum(weight_row)
+                for statistic in statistics:
+                    if statistic == 'mean':
+                        weight_rescaled = np.broadcast_to(weight, values.shape)
+                        if self.rescaledweights:
+                            # if there are NaN values then rescale the weights
+                            there_is_nan = np.isnan(values).any(axis=1) | (~weight_valid).any()
+                            rescaled = weight / weight_row_sum[:, target]
+                            rescaled[rescaled > 1.0] = np.nan # if there is inf or devision by zero replace with nan
+                            weight_rescaled = np.where(there_is_nan[:, np.newaxis], rescaled, weight_rescaled)
+                        values_w = values * weight_rescaled
+                        values_w_valid = ~np.isnan(values_w)
+                        value = target_sum(np.where(values_w_valid, values_w, 0.0))
+                        # put back NaN for the order_t that are all NaN values
+                        value[target_sum(values_w_valid.astype(np.float64)) == 0] = np.nan
+                    elif statistic == 'std':
+                        value = target_sum(weight_row * np.where(values_valid, values, 0.0)) / weight_row_sum
+                        deviation = np.where(values_valid, values - value[:, target], 0.0)
+                        value = np.sqrt(target_sum(weight_row * deviation**2) / weight_row_sum)
+                    elif statistic == 'valid_frac':
+                        value = weight_row_sum / target_sum(np.where(weight_valid, weight, 0.0)[np.newaxis, :])
+                    else:
+                        # a conversion with a negative scale turns the max into the min
+                        maximum = (statistic == 'max') != ((unit_conversion is not None) and (unit_conversion[0] < 0))
+                        extreme = np.fmax if maximum else np.fmin
+                        value = np.where(values_valid & (weight > 0), values, np.nan)
+                        value = extreme.reduceat(value[:, rows_sorted], rows_start, axis=1)
+                    # conversion of the units of the remapped values
+                    if (unit_conversion is not None) and (statistic == 'std'):
+                        value = abs(unit_conversion[0]) * value
+                    elif (unit_conversion is not None) and (statistic != 'valid_frac'):
+                        value = unit_conversion[0] * value + unit_conversion[1]
+                    statistics_values[statistic][start:end, :] = np.where(np.isnan(value), float(fill_value), value)
+        return statistics_values
 
 
     def shp_lon_correction (self,
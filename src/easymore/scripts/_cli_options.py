@@ -209,6 +209,37 @@ cli_options = {
         'help': 'Chunk size of the generated netCDF file(s)',
         'show_choices': False,
     },
+    ('chunk_access', '--chunk-access'): {
+        'type': click.Choice(['time_series', 'map', 'balanced']),
+        'required': False,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Access pattern the chunks of the generated netCDF file(s)'
+        ' are shaped for',
+        'show_choices': True,
+    },
+    ('chunk_bytes', '--chunk-bytes'): {
+        'type': click.INT,
+        'required': False,
+        'default': 1048576,
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Target chunk size in bytes used with --chunk-access',
+        'show_choices': False,
+    },
+    ('compression', '--compression'): {
+        'type': click.Choice(['zlib', 'zstd', 'bzip2', 'szip', 'blosc_lz',
+                              'blosc_lz4', 'blosc_lz4hc', 'blosc_zlib',
+                              'blosc_zstd']),
+        'required': False,
+        'default': 'zlib',
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Compression codec of the generated netCDF file(s)',
+        'show_choices': True,
+    },
     ('output_dir', '--output-dir', '-o'): {
         'type': click.Path(exists=False, dir_okay=True),
         'required': True,
@@ -301,6 +332,64 @@ cli_options = {
         ' finishing another on given their submission ID',
         'show_choices': False,
     },
+    ('array', '--array', '-a'): {
+        'type': click.INT,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Create the remapping file in one SLURM job and remap the'
+        ' source netCDF files in a dependant job array of given number of'
+        ' tasks, each remapping one shard of the files',
+        'show_choices': False,
+    },
+    ('sbatch', '--sbatch'): {
+        'type': click.STRING,
+        'required': False,
+        'default': 'sbatch',
+        'show_default': True,
+        'envvar': 'EASYMORE_SBATCH',
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Job submission command; can be replaced by a stand-in'
+        ' script to test the submission locally',
+        'show_choices': False,
+    },
+    ('shard_index', '--shard-index'): {
+        'type': click.INT,
+        'required': False,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Index of the shard of source netCDF files to remap, from'
+        ' 0 to shard count - 1',
+        'show_choices': False,
+    },
+    ('shard_count', '--shard-count'): {
+        'type': click.INT,
+        'required': False,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Number of shards the source netCDF files are divided into',
+        'show_choices': False,
+    },
+    ('prefetch_depth', '--prefetch-depth'): {
+        'type': click.INT,
+        'required': False,
+        'default': 1,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Number of source netCDF files read ahead in the background',
+        'show_choices': False,
+    },
+    ('write_queue_depth', '--write-queue-depth'): {
+        'type': click.INT,
+        'required': False,
+        'default': 2,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Number of remapped variables queued for the background writer',
+        'show_choices': False,
+    },
     ('parallel', '--parallel', '-l'): {
         'type': click.BOOL,
         'required': False,
@@ -309,4 +398,178 @@ cli_options = {
         'help': 'Parallelize process',
         'show_choices': False,
     },
+    ('output_format', '--output-format'): {
+        'type': click.Choice(['netcdf', 'zarr', 'time_series']),
+        'required': False,
+        'default': 'netcdf',
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Format of the remapped output',
+        'show_choices': True,
+    },
+    ('time_series_memory', '--time-series-memory'): {
+        'type': click.INT,
+        'required': False,
+        'default': 1073741824,
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Bytes of remapped values held in memory before they are'
+        ' written to the time series output',
+        'show_choices': False,
+    },
+    ('save_parquet', '--save-parquet'): {
+        'type': click.BOOL,
+        'required': False,
+        'is_flag': True,
+        'allow_from_autoenv': True,
+        'help': 'Save the remapped values also in parquet format',
+        'show_choices': False,
+    },
+    ('parquet_layout', '--parquet-layout'): {
+        'type': click.Choice(['long', 'wide']),
+        'required': False,
+        'default': 'long',
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Layout of the parquet tables',
+        'show_choices': True,
+    },
+    ('merge_output', '--merge-output', '-M'): {
+        'type': click.BOOL,
+        'required': False,
+        'is_flag': True,
+        'allow_from_autoenv': True,
+        'help': 'Append the remapped values of all the source netCDF files'
+        ' into one netCDF file in the order of time',
+        'show_choices': False,
+    },
+    ('point_method', '--point-method'): {
+        'type': click.Choice(['cell', 'bilinear', 'idw']),
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Locate target points directly in the source grid or'
+        ' Voronoi region, or interpolate them bilinearly or by inverse'
+        ' distance, instead of buffering and intersecting them',
+        'show_choices': True,
+    },
+    ('statistics', '--statistic'): {
+        'type': click.Choice(['mean', 'max', 'min', 'std', 'valid_frac']),
+        'required': False,
+        'default': ['mean'],
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Statistics of the source values over each target shape'
+        ' saved in the remapped files; statistics other than mean are'
+        ' saved with the statistic as suffix of the variable names',
+        'show_choices': True,
+        'multiple': True,
+    },
+    ('target_ids', '--target-id'): {
+        'type': click.FLOAT,
+        'required': False,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'IDs of the target shapes to be remapped; all the target'
+        ' shapes if not given',
+        'show_choices': False,
+        'multiple': True,
+    },
+    ('weight_nc', '--weight-nc'): {
+        'type': click.Path(exists=True),
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Path to a netCDF file with a field on the source grid, such'
+        ' as population or land fraction, weighting the source cells in'
+        ' addition to their area of intersection',
+        'show_choices': False,
+    },
+    ('weight_var', '--weight-var'): {
+        'type': click.STRING,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Name of the variable of the weight netCDF file',
+        'show_choices': False,
+    },
+    ('time_aggregation', '--time-aggregation'): {
+        'type': click.Choice(['day', 'month', 'year']),
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Aggregate the remapped values in time while remapping and'
+        ' write only the aggregated values',
+        'show_choices': True,
+    },
+    ('time_aggregation_stat', '--time-aggregation-stat'): {
+        'type': click.Choice(['mean', 'sum', 'max', 'min']),
+        'required': False,
+        'default': 'mean',
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Statistic of the remapped values of a period of the time'
+        ' aggregation',
+        'show_choices': True,
+    },
+    ('time_aggregation_offset', '--time-aggregation-offset'): {
+        'type': click.INT,
+        'required': False,
+        'default': 0,
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Hours added to the time of the remapped values to find'
+        ' their period of the time aggregation',
+        'show_choices': False,
+    },
+    ('output_period', '--output-period'): {
+        'type': click.Choice(['day', 'month', 'year']),
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Route the remapped values into one netCDF file per day,'
+        ' month or year',
+        'show_choices': True,
+    },
+    ('work_dir', '--work-dir', '-w'): {
+        'type': click.STRING,
+        'required': False,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Work directory shared by several easymore processes'
+        ' claiming source netCDF files',
+        'show_choices': False,
+    },
+    ('claim_timeout', '--claim-timeout'): {
+        'type': click.FLOAT,
+        'required': False,
+        'default': 600,
+        'show_default': True,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Seconds after which a claim of the work directory that is'
+        ' not refreshed, e.g. of a killed or preempted process, is taken'
+        ' over by another process',
+        'show_choices': False,
+    },
+    ('resume', '--resume', '-U'): {
+        'type': click.BOOL,
+        'required': False,
+        'is_flag': True,
+        'allow_from_autoenv': True,
+        'help': 'Skip source netCDF files already remapped according to'
+        ' the manifest of the output directory',
+        'show_choices': False,
+    },
 }
@@ -32,5 +32,74 @@ conf_options = {
         'help': 'Make SLURM job submission dependant on successfully'
         ' finishing another on given their submission ID',
         'show_choices': False,
-    }
+    },
+    ('--array', '-a'): {
+        'type': click.INT,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Create the remapping file in one SLURM job and remap the'
+        ' source netCDF files in a dependant job array of given number of'
+        ' tasks, each remapping one shard of the files',
+        'show_choices': False,
+    },
+    ('--remap-only', '-R'): {
+        'type': click.BOOL,
+        'required': False,
+        'is_flag': True,
+        'allow_from_autoenv': True,
+        'help': 'Only create the remapping file',
+    },
+    ('--remap-file', '-rf'): {
+        'type': click.STRING,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Path to previously generated remap file by EASYMORE',
+        'show_choices': False,
+    },
+    ('--shard-index',): {
+        'type': click.INT,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Index of the shard of source netCDF files to remap, from'
+        ' 0 to shard count - 1',
+        'show_choices': False,
+    },
+    ('--shard-count',): {
+        'type': click.INT,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Number of shards the source netCDF files are divided into',
+        'show_choices': False,
+    },
+    ('--claim-timeout',): {
+        'type': click.FLOAT,
+        'required': False,
+        'default': None,
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Seconds after which a claim of the work directory that is'
+        ' not refreshed is taken over by another process; overrides the'
+        ' value of the configuration file',
+        'show_choices': False,
+    },
+    ('--sbatch',): {
+        'type': click.STRING,
+        'required': False,
+        'default': 'sbatch',
+        'show_default': True,
+        'envvar': 'EASYMORE_SBATCH',
+        'is_flag': False,
+        'allow_from_autoenv': True,
+        'help': 'Job submission command; can be replaced by a stand-in'
+        ' script to test the submission locally',
+        'show_choices': False,
+    },
 }
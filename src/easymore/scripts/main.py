@@ -70,6 +70,8 @@ def from_cli(**kwargs):
     job_var = 'submit_job'  # if submitting a job to SLURM
     job_conf = 'submit_job_conf'  # SLURM job submission file
     job_deps = 'dependency'  # for SLURM dependencies given
+    job_array = 'array'  # number of tasks of a SLURM job array
+    job_sbatch = 'sbatch'  # SLURM submission command
     var = 'var_names'  # list of variables
     var_remapped = 'var_names_remapped'
     cache = 'temp_dir'  # temporary directory
@@ -86,7 +88,7 @@ def from_cli(**kwargs):
 
     # creating parameter dictionary for Easymore
     esmr_kwargs = {k: v for k, v in kwargs.items() if k not in
-                   (job_var, job_conf, job_deps)}
+                   (job_var, job_conf, job_deps, job_array, job_sbatch)}
 
     # checking if submitting a job to HPC schedulers
     if kwargs[job_var]:
@@ -120,7 +122,9 @@ def from_cli(**kwargs):
         submit_hpc_job(kwargs[cache],
                        temp_file,
                        submission_conf,
-                       kwargs[job_deps])
+                       kwargs[job_deps],
+                       array=kwargs[job_array],
+                       sbatch=kwargs[job_sbatch])
 
     # if no job submission
     else:
@@ -133,7 +137,8 @@ def from_cli(**kwargs):
 @main.command('conf', no_args_is_help=True)
 @add_decorator(conf_o)
 @add_decorator(conf_a)
-def from_conf(json, submit_job, job_conf, dependency):
+def from_conf(json, submit_job, job_conf, dependency, array, remap_only,
+              remap_file, shard_index, shard_count, claim_timeout, sbatch):
     """
     Run Easymore using a JSON configuration file
     """
@@ -146,12 +151,26 @@ def from_conf(json, submit_job, job_conf, dependency):
         else:
             submission_conf = job_conf
 
+        # the temporary directory of the experiment holds the job files
+        temp_dir = _read_json_conf(json).get('temp_dir', './temp/')
+
         # submit job to HPC SLURM scheduler
-        submit_hpc_job(json, submission_conf, dependency)
+        submit_hpc_job(temp_dir, json, submission_conf, dependency,
+                       array=array, sbatch=sbatch)
 
     # if no job submission
     else:
         json_exp = Easymore.from_json_file(json)
+        # overrides used by the job array tasks
+        if remap_only:
+            json_exp.only_create_remap_nc = True
+        if remap_file:
+            json_exp.remap_nc = remap_file
+        if shard_count:
+            json_exp.shard_index = shard_index
+            json_exp.shard_count = shard_count
+        if claim_timeout is not None:
+            json_exp.claim_timeout = claim_timeout
         json_exp.nc_remapper()
 
 
@@ -160,11 +179,20 @@ def submit_hpc_job(
     json: str,
     job_conf_file: str,
     dep_ids: str = None,
+    array: int = None,
+    sbatch: str = 'sbatch',
 ):
     """
     [UNSTABLE] Submit easymore experiment to SLURM scheduler
+
+    If `array` is given, a first job creates the remapping file and a
+    job array of `array` tasks, dependant (`afterok`) on the first job,
+    remaps a deterministic shard of the source netCDF files per task.
+    `sbatch` is the submission command; it can be replaced by any
+    executable that accepts `sbatch` arguments and prints the job ID
+    (e.g., to test the submission locally). Returns the submitted job IDs.
     """
-    if dep_ids is not None:
+    if dep_ids:
         # making a colon delimited string out of all input IDs
         id_list = _iterable_to_delim_str(dep_ids)
 
@@ -174,18 +202,8 @@ def submit_hpc_job(
             job_str = f.read().decode()
     else:
         job_str = pkgutil.get_data(__name__, job_conf_file).decode()
-
-    # Add error and output paths to the SLURM submission file
-    job_err_str = f"#SBATCH --error={temp_dir}/easymore.err"
-    job_log_str = f"#SBATCH --output={temp_dir}/easymore.log"
-    job_str = job_str + job_err_str + '\n' + job_log_str
-
-    # job string to be run
-    esmr_text = f'easymore conf {json}'
-    job_str = job_str + '\n' + esmr_text
-
-    # encode `job_str` string into byte-like object
-    # job_byte = job_str.encode()
+    if not job_str.endswith('\n'):
+        job_str = job_str + '\n'
 
     # export new script file
     # first make the given temporary directory
@@ -193,16 +211,83 @@ def submit_hpc_job(
         os.makedirs(temp_dir)
     except FileExistsError:
         pass
+
+    # without job array, one job remaps all the source files
+    if not array:
+        job_file = _write_job_file(temp_dir, 'easymore_job.slurm', job_str,
+                                   'easymore', f'easymore conf {json}')
+        # if dependency activated
+        if dep_ids:
+            return [_sbatch(sbatch, job_file, f"--dependency=afterok:{id_list}")]
+        return [_sbatch(sbatch, job_file)]
+
+    # the remapping file is created once by the first job
+    conf = _read_json_conf(json)
+    remap_nc = conf.get('remap_nc')
+    job_ids = []
+    if not remap_nc:
+        remap_nc = os.path.join(conf.get('temp_dir', './temp/'),
+                                conf.get('case_name', 'case_temp') + '_remapping.nc')
+        job_file = _write_job_file(temp_dir, 'easymore_remap.slurm', job_str,
+                                   'easymore_remap',
+                                   f'easymore conf {json} --remap-only')
+        if dep_ids:
+            job_ids.append(_sbatch(sbatch, job_file, f"--dependency=afterok:{id_list}"))
+        else:
+            job_ids.append(_sbatch(sbatch, job_file))
+        dep_array = job_ids[-1]
+    elif dep_ids:
+        dep_array = id_list
+    else:
+        dep_array = None
+
+    # each task of the job array remaps its shard of the source files
+    array_str = job_str + f"#SBATCH --array=0-{int(array) - 1}\n"
+    esmr_text = f'easymore conf {json} --remap-file {remap_nc}' + \
+        f' --shard-index $SLURM_ARRAY_TASK_ID --shard-count {int(array)}'
+    job_file = _write_job_file(temp_dir, 'easymore_array.slurm', array_str,
+                               'easymore_%a', esmr_text)
+    if dep_array:
+        job_ids.append(_sbatch(sbatch, job_file, f"--dependency=afterok:{dep_array}"))
+    else:
+        job_ids.append(_sbatch(sbatch, job_file))
+    return job_ids
+
+
+def _write_job_file(temp_dir, file_name, job_str, log_name, esmr_text):
+    """write a SLURM job submission file running `esmr_text`
+    """
+    # Add error and output paths to the SLURM submission file
+    job_err_str = f"#SBATCH --error={temp_dir}/{log_name}.err"
+    job_log_str = f"#SBATCH --output={temp_dir}/{log_name}.log"
+    job_str = job_str + job_err_str + '\n' + job_log_str
+
+    # job string to be run
+    job_str = job_str + '\n' + esmr_text + '\n'
+
     # create the temporary file
-    temp_file = os.path.join(temp_dir, 'easymore_job.slurm')
+    temp_file = os.path.join(temp_dir, file_name)
     with open(temp_file, 'w') as f:
         f.write(job_str)
+    return temp_file
 
-    # if dependency activated
-    if dep_ids:
-        subprocess.run(["sbatch", f"--dependency=afterok:{id_list}", f.name])
-    else:
-        subprocess.run(["sbatch", f.name])
+
+def _sbatch(sbatch, job_file, *args):
+    """submit `job_file` with the `sbatch` command and return the job ID
+    """
+    out = subprocess.run([sbatch, '--parsable', *args, job_file],
+                         capture_output=True, text=True, check=True)
+    # `--parsable` prints "jobid" or "jobid;cluster"
+    job_id = out.stdout.strip().split(';')[0]
+    print(f'Submitted {job_file} as job {job_id}')
+    return job_id
+
+
+def _read_json_conf(json_file):
+    """read an easymore JSON configuration file
+    """
+    with open(json_file) as f:
+        return json.load(f, object_hook=Easymore._easymore_decoder)
 
 
 def _iterable_to_delim_str(inp_list):
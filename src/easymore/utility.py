@@ -282,6 +282,101 @@ class Utility:
         return ds
         
         
+    def aggregate_ids(ds,
+                      membership,
+                      rescale = True,
+                      mapping = {'var_id':'ID','dim_id':'ID','dim_time':'time'}):
+        """
+        Aggregate remapped values of fine shapes, such as the outputs of
+        nc_remapper, to coarser shapes given the fine shapes in each coarse
+        shape. Gives the same values as remapping to the coarse shapes with
+        the remapping file of Easymore.aggregate_remap if no value is missing.
+
+        Parameters:
+        -----------
+        ds : xarray.Dataset
+            Input xarray Dataset with the variables along the time and ID
+            dimensions.
+        membership : str or pandas.DataFrame
+            csv file or dataframe with the fields `ID_t`, ID of the fine
+            shapes, and `ID_c`, ID of the coarse shapes, and optionally
+            `weight`, e.g. area of the fine shapes; equal weights if not
+            provided. The weights are normalized for every coarse shape.
+        rescale : bool, optional
+            if True the weights are rescaled to add up to one over the fine
+            shapes with values at every time step, as rescaledweights of
+            Easymore; if False a missing value of a fine shape gives a
+            missing value for its coarse shape, by default True.
+        mapping : dict, optional
+            Dictionary containing the ID variable and the ID and time
+            dimension names, by default {'var_id':'ID','dim_id':'ID','dim_time':'time'}.
+
+        Returns:
+        --------
+        xarray.Dataset
+            Returns an xarray Dataset with the variables along the time and ID
+            dimensions of the coarse shapes in the order of their first
+            appearance in membership.
+        """
+        import scipy.sparse
+
+        # get the var and ID
+        var_id = mapping.get('var_id')
+        dim_id = mapping.get('dim_id')
+        dim_time = mapping.get('dim_time')
+
+        # read the membership and normalize the weights for every coarse shape
+        if isinstance(membership, str):
+            membership = pd.read_csv(membership)
+        membership = pd.DataFrame(membership).copy()
+        if not set(['ID_t', 'ID_c']) <= set(membership.columns):
+            raise ValueError("membership should have the fields ID_t and ID_c.")
+        if 'weight' not in membership.columns:
+            membership['weight'] = 1.0
+        membership = membership[membership['weight'] > 0]
+        membership['weight'] = membership['weight'] / membership.groupby('ID_c')['weight'].transform('sum')
+
+        # sparse matrix of the weights of the fine shapes for the coarse shapes
+        ID_t = pd.Series(np.arange(len(ds[var_id])), index=np.array(ds[var_id].values))
+        missing = np.setdiff1d(np.array(membership['ID_t']), np.array(ID_t.index))
+        if missing.size > 0:
+            raise ValueError(f"membership has IDs that are not in the dataset: {missing[:10]}")
+        ID_c = pd.unique(membership['ID_c'])
+        order_c = pd.Series(np.arange(len(ID_c)), index=ID_c)
+        weight = scipy.sparse.csr_matrix((np.array(membership['weight']),
+                                          (np.array(order_c.loc[membership['ID_c']]),
+                                           np.array(ID_t.loc[membership['ID_t']]))),
+                                         shape=(len(ID_c), len(ID_t)))
+        contributes = weight.copy()
+        contributes.data[:] = 1.0
+
+        # aggregate the variables with the ID and time dimensions
+        ds_agg = xr.Dataset()
+        for var_name in ds.data_vars:
+            if (dim_id in ds[var_name].dims) and (dim_time in ds[var_name].dims) and (ds[var_name].ndim == 2):
+                values = ds[var_name].transpose(dim_time, dim_id).values.astype(float)
+                valid = ~np.isnan(values)
+                values_agg = np.array(weight.dot(np.where(valid, values, 0.0).T).T)
+                if rescale:
+                    weight_valid = np.array(weight.dot(valid.T.astype(float)).T)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        values_agg = np.where(weight_valid > 0, values_agg / weight_valid, np.nan)
+                else:
+                    missing_count = np.array(contributes.dot((~valid).T.astype(float)).T)
+                    values_agg = np.where(missing_count > 0, np.nan, values_agg)
+                ds_agg[var_name] = xr.DataArray(values_agg.astype(ds[var_name].dtype),
+                                                dims=(dim_time, dim_id),
+                                                attrs=ds[var_name].attrs)
+            elif dim_id not in ds[var_name].dims:
+                ds_agg[var_name] = ds[var_name]
+        ds_agg[dim_time] = ds[dim_time]
+        ds_agg[var_id] = xr.DataArray(ID_c, dims=dim_id, attrs=ds[var_id].attrs)
+        ds_agg.attrs = ds.attrs
+
+        # return ds
+        return ds_agg
+        
+        
     def reorder_output(file_name,
                        order_ids,
                        var_id,
@@ -0,0 +1,119 @@
+"""
+Fixtures of the tests of easymore on the example data: the ERA5 files with
+missing values remapped to the HRUs of the Bow river
+"""
+
+import glob
+import os
+import shutil
+import sys
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import xarray as xr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from easymore import Easymore  # noqa: E402
+
+DATA = os.path.join(ROOT, 'examples', 'data')
+TARGET_SHP = os.path.join(DATA, 'target_shapefiles', 'Bow_merit_dem.shp')
+VAR_NAMES = ['airtemp', 'pptrate']
+
+
+def easymore_settings(source_dir, temp_dir, output_dir, **kwargs):
+    """the settings of Easymore for the example data, updated by kwargs"""
+    settings = dict(case_name='bow',
+                    source_nc=os.path.join(str(source_dir), 'ERA5_NA_*.nc'),
+                    var_names=list(VAR_NAMES),
+                    var_lon='longitude',
+                    var_lat='latitude',
+                    var_time='time',
+                    target_shp=TARGET_SHP,
+                    target_shp_ID='HRU_ID',
+                    temp_dir=os.path.join(str(temp_dir), ''),
+                    output_dir=os.path.join(str(output_dir), ''),
+                    format_list=['f4'],
+                    fill_value_list=['-9999'])
+    settings.update(kwargs)
+    return settings
+
+
+def read_remapped(names, fill_value=-9999):
+    """the remapped netCDF files concatenated along time with the fill values as NaN"""
+    if isinstance(names, str):
+        names = sorted(glob.glob(names))
+    datasets = []
+    for name in names:
+        with xr.open_dataset(name) as ds:
+            datasets.append(ds.load())
+    ds = xr.concat(datasets, 'time', data_vars='minimal') if len(datasets) > 1 else datasets[0]
+    for var_name in ds.data_vars:
+        if 'time' in ds[var_name].dims:
+            ds[var_name] = ds[var_name].where(ds[var_name] != fill_value)
+    return ds
+
+
+@pytest.fixture(scope='session')
+def source_dir(tmp_path_factory):
+    """the ERA5 example files with missing values, three days of hourly values,
+    copied with the .nc extension"""
+    path = tmp_path_factory.mktemp('source')
+    for name in sorted(glob.glob(os.path.join(DATA, 'Source_nc_ERA5', 'ERA5_NA_*.ncNaN'))):
+        shutil.copy(name, path / os.path.basename(name).replace('.ncNaN', '.nc'))
+    return path
+
+
+@pytest.fixture(scope='session')
+def remap(source_dir, tmp_path_factory):
+    """the remapping and attribute files of the example data, created once"""
+    temp_dir = tmp_path_factory.mktemp('remap')
+    esmr = Easymore(**easymore_settings(source_dir, temp_dir, temp_dir, only_create_remap_nc=True))
+    esmr.nc_remapper()
+    return {'remap_nc': esmr.remap_nc, 'attr_nc': esmr.attr_nc}
+
+
+@pytest.fixture
+def make_easymore(source_dir, remap, tmp_path):
+    """returns a function that creates an Easymore object for the example data with the
+    remapping file of the session and the temporary and output directories in tmp_path"""
+    def make(**kwargs):
+        kwargs = dict(remap, **kwargs)
+        return Easymore(**easymore_settings(source_dir, tmp_path / 'temp', tmp_path / 'output', **kwargs))
+    return make
+
+
+@pytest.fixture(scope='session')
+def reference(source_dir, remap, tmp_path_factory):
+    """the remapped values of the example data with the default settings, one remapped
+    file per source file, concatenated along time"""
+    path = tmp_path_factory.mktemp('reference')
+    esmr = Easymore(**easymore_settings(source_dir, path / 'temp', path / 'output', **remap))
+    esmr.nc_remapper()
+    return read_remapped(str(path / 'output' / 'bow_remapped_*.nc'))
+
+
+def assert_remapped_equal(ds, reference, var_names=VAR_NAMES, rtol=1e-6):
+    """checks the remapped values of ds against the reference"""
+    for var_name in var_names:
+        np.testing.assert_allclose(ds[var_name].values, reference[var_name].values, rtol=rtol, equal_nan=True)
+
+
+def make_points(path, lat, lon):
+    """a target shapefile of points with the field ID from 1"""
+    points = gpd.GeoDataFrame({'ID': np.arange(1, len(lat)+1)},
+                              geometry=gpd.points_from_xy(lon, lat), crs='EPSG:4326')
+    points.to_file(str(path))
+    return str(path)
+
+
+def read_source(source_dir, var_name):
+    """the values of a variable of the source files along (time, latitude, longitude)"""
+    names = sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))
+    values = []
+    for name in names:
+        with xr.open_dataset(name) as ds:
+            values.append(ds[var_name].load())
+    return xr.concat(values, 'time')
@@ -0,0 +1,66 @@
+"""
+Tests of aggregating a remapping file to coarser target shapes
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from shapely import affinity
+
+from conftest import TARGET_SHP, read_remapped
+
+
+def test_aggregate_remap_to_the_grus(make_easymore, remap, reference, tmp_path):
+    shp = gpd.read_file(TARGET_SHP)
+    membership = pd.DataFrame({'ID_t': shp['HRU_ID'], 'ID_c': shp['GRU_ID'].astype(int), 'weight': shp['HRU_area']})
+    esmr = make_easymore(attr_nc=None)
+    aggregated_remap_nc = esmr.aggregate_remap(membership, aggregated_remap_nc=str(tmp_path / 'gru_remapping.nc'))
+    assert esmr.remap_nc == aggregated_remap_nc
+    # the weights of every GRU add up to one
+    with xr.open_dataset(aggregated_remap_nc) as ds_remap:
+        weight = ds_remap['weight'].to_series().groupby(ds_remap['ID_t'].values).sum()
+    assert len(weight) == membership['ID_c'].nunique()
+    np.testing.assert_allclose(weight.values, 1)
+    esmr.nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    assert sorted(ds['ID'].values) == sorted(membership['ID_c'].unique())
+    # without missing values the GRUs are the area weighted mean of their HRUs
+    fine = reference['pptrate'].to_pandas()
+    for ID in ds['ID'].values[:5]:
+        members = membership[membership['ID_c'] == ID]
+        expected = fine[members['ID_t'].values].values @ (members['weight'].values / members['weight'].sum())
+        np.testing.assert_allclose(ds['pptrate'].sel(ID=ID).values, expected, rtol=1e-5)
+
+
+def test_aggregate_remap_of_a_gru_with_an_hru_outside(make_easymore, tmp_path):
+    # the three HRUs of a GRU of which the last is moved outside of the source grid
+    shp = gpd.read_file(TARGET_SHP)
+    shp = shp[shp['GRU_ID'] == '71028585'].reset_index(drop=True)
+    shp.loc[2, 'geometry'] = affinity.translate(shp.loc[2, 'geometry'], xoff=40)
+    shp.to_file(str(tmp_path / 'hru.shp'))
+    esmr = make_easymore(remap_nc=None, attr_nc=None, target_shp=str(tmp_path / 'hru.shp'), case_name='hru')
+    esmr.nc_remapper()
+    hru = read_remapped(str(tmp_path / 'output' / 'hru_remapped_*.nc'))
+    assert hru['pptrate'].sel(ID=shp.loc[2, 'HRU_ID']).isnull().all()
+    membership = pd.DataFrame({'ID_t': shp['HRU_ID'], 'ID_c': 1, 'weight': shp['HRU_area']})
+    aggregated_remap_nc = esmr.aggregate_remap(membership, aggregated_remap_nc=str(tmp_path / 'gru_remapping.nc'))
+    with xr.open_dataset(aggregated_remap_nc) as ds_remap:
+        np.testing.assert_allclose(float(ds_remap['weight'].sum()), 1)
+    esmr.case_name = 'gru'
+    esmr.nc_remapper()
+    gru = read_remapped(str(tmp_path / 'output' / 'gru_remapped_*.nc'))
+    # the area weighted mean of the two HRUs inside
+    area = shp['HRU_area'].values[:2]
+    expected = hru['pptrate'].sel(ID=shp['HRU_ID'].values[:2]).values @ (area / area.sum())
+    np.testing.assert_allclose(gru['pptrate'].sel(ID=1).values, expected, rtol=1e-5)
+
+
+def test_aggregate_remap_rejects_unknown_shapes(make_easymore, remap, tmp_path):
+    esmr = make_easymore(attr_nc=None)
+    membership = pd.DataFrame({'ID_t': [1, -1], 'ID_c': [1, 1]})
+    with pytest.raises(SystemExit):
+        esmr.aggregate_remap(membership, aggregated_remap_nc=str(tmp_path / 'gru_remapping.nc'))
+    with pytest.raises(SystemExit):
+        esmr.aggregate_remap(membership.rename(columns={'ID_c': 'GRU_ID'}))
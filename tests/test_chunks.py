@@ -0,0 +1,35 @@
+"""
+Tests of the chunk shapes and the compression of the remapped files
+"""
+
+import glob
+
+import netCDF4 as nc4
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+@pytest.mark.parametrize('chunk_access, chunks', [('time_series', [24, 118]),
+                                                  ('map', [24, 118]),
+                                                  (None, [1, 118])])
+def test_chunks_follow_the_access_pattern(make_easymore, reference, tmp_path, chunk_access, chunks):
+    make_easymore(chunk_access=chunk_access).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    with nc4.Dataset(outputs[0]) as ncid:
+        assert ncid.variables['airtemp'].chunking() == chunks
+        filters = ncid.variables['airtemp'].filters()
+    assert filters['zlib'] and filters['shuffle']
+    assert_remapped_equal(read_remapped(outputs), reference)
+
+
+def test_small_chunks_and_codec(make_easymore, reference, tmp_path):
+    # chunks of 256 bytes hold 64 values of f4
+    make_easymore(chunk_access='time_series', chunk_bytes=256, shuffle=False).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    with nc4.Dataset(outputs[0]) as ncid:
+        assert ncid.variables['airtemp'].chunking() == [24, 2]
+        assert not ncid.variables['airtemp'].filters()['shuffle']
+    assert_remapped_equal(read_remapped(outputs), reference)
+    with pytest.raises(SystemExit):
+        make_easymore(compression='lzma').nc_remapper()
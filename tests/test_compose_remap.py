@@ -0,0 +1,88 @@
+"""
+Tests of composing two remapping files without intersection
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+from shapely import affinity
+
+from conftest import TARGET_SHP, easymore_settings, read_remapped
+from easymore import Easymore
+
+
+@pytest.fixture
+def two_steps(make_easymore, remap, tmp_path):
+    """the remapping files and remapped values from the grid of ERA5 to the HRUs and from the
+    HRUs, as irregular lat/lon, to the GRUs"""
+    gru_shp = str(tmp_path / 'gru.shp')
+    shp = gpd.read_file(TARGET_SHP)
+    shp['GRU_ID'] = shp['GRU_ID'].astype(int)
+    shp[['GRU_ID', 'geometry']].dissolve(by='GRU_ID').reset_index().to_file(gru_shp)
+    make_easymore().nc_remapper()
+    esmr = Easymore(**easymore_settings(tmp_path / 'output', tmp_path / 'gru', tmp_path / 'gru', case_name='gru',
+                                        source_nc=str(tmp_path / 'output' / 'bow_remapped_*.nc'), var_ID='ID',
+                                        target_shp=gru_shp, target_shp_ID='GRU_ID'))
+    esmr.nc_remapper()
+    return {'remap_nc_1': remap['remap_nc'], 'remap_nc_2': esmr.remap_nc,
+            'values': read_remapped(str(tmp_path / 'gru' / 'gru_remapped_*.nc'))}
+
+
+def test_compose_remap_from_the_grid_to_the_grus(make_easymore, two_steps, tmp_path):
+    esmr = make_easymore(attr_nc=None, case_name='composed')
+    composed_remap_nc = esmr.compose_remap(two_steps['remap_nc_1'], two_steps['remap_nc_2'],
+                                           composed_remap_nc=str(tmp_path / 'composed_remapping.nc'))
+    assert esmr.remap_nc == composed_remap_nc
+    with xr.open_dataset(composed_remap_nc) as ds_remap, xr.open_dataset(two_steps['remap_nc_1']) as ds_remap_1:
+        # the pairing of the remapping files is saved
+        assert ds_remap.attrs['easymore_hash_1'] == ds_remap_1.attrs['easymore_hash']
+        weight = ds_remap['weight'].to_series().groupby(ds_remap['ID_t'].values).sum()
+    np.testing.assert_allclose(weight.values, 1)
+    esmr.nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'composed_remapped_*.nc'))
+    expected = two_steps['values']
+    np.testing.assert_array_equal(ds['ID'].values, expected['ID'].values)
+    # without missing values the composed remapping gives the values of the two steps
+    np.testing.assert_allclose(ds['pptrate'].values, expected['pptrate'].values, rtol=1e-5)
+
+
+def test_compose_remap_needs_two_different_remappings(make_easymore, remap):
+    esmr = make_easymore(attr_nc=None)
+    with pytest.raises(SystemExit):
+        esmr.compose_remap(remap['remap_nc'], remap['remap_nc'])
+
+
+def test_compose_remap_with_a_shape_outside_of_the_grid(make_easymore, tmp_path):
+    # A to B: the grid of ERA5 to three HRUs of which the last is outside of the grid
+    shp = gpd.read_file(TARGET_SHP).iloc[:3].reset_index(drop=True)
+    shp.loc[2, 'geometry'] = affinity.translate(shp.loc[2, 'geometry'], xoff=40)
+    shp.to_file(str(tmp_path / 'hru.shp'))
+    esmr = make_easymore(remap_nc=None, attr_nc=None, target_shp=str(tmp_path / 'hru.shp'),
+                         only_create_remap_nc=True)
+    esmr.nc_remapper()
+    remap_nc_1 = esmr.remap_nc
+    with xr.open_dataset(remap_nc_1) as ds_remap:
+        remap_1 = ds_remap.to_dataframe().reset_index(drop=True)
+    # B to C: one shape of C from the three HRUs
+    lat_lon_b = remap_1.drop_duplicates(subset='ID_t').set_index('ID_t').loc[shp['HRU_ID']]
+    remap_2 = pd.DataFrame({'ID_t': 1, 'lat_t': 51.0, 'lon_t': -116.0, 'order_t': 1,
+                            'ID_s': shp['HRU_ID'].values, 'lat_s': lat_lon_b['lat_t'].values,
+                            'lon_s': lat_lon_b['lon_t'].values, 'weight': [0.2, 0.3, 0.5],
+                            'rows': [0, 1, 2], 'cols': [0, 1, 2], 'easymore_case': 3})
+    remap_nc_2 = str(tmp_path / 'remap_2.nc')
+    esmr.save_remap(remap_2, remap_nc_2, 'B to C')
+    composed_remap_nc = esmr.compose_remap(remap_nc_1, remap_nc_2, str(tmp_path / 'composed.nc'))
+    with xr.open_dataset(composed_remap_nc) as ds_remap:
+        composed = ds_remap.to_dataframe().set_index(['rows', 'cols'])['weight']
+    # the weights of the two HRUs inside rescaled to add up to one
+    expected = pd.concat([remap_1[remap_1['ID_t'] == ID].set_index(['rows', 'cols'])['weight'] * weight / 0.5
+                          for ID, weight in zip(shp['HRU_ID'][:2], [0.2, 0.3])]).groupby(level=[0, 1]).sum()
+    np.testing.assert_allclose(composed.sort_index().values, expected.sort_index().values)
+    np.testing.assert_allclose(composed.sum(), 1)
+    # B as source of the second remapping file should be at the lat and lon of B as target of the first
+    remap_2['lat_s'] = remap_2['lat_s'] + 1
+    esmr.save_remap(remap_2, remap_nc_2, 'B to C')
+    with pytest.raises(SystemExit):
+        esmr.compose_remap(remap_nc_1, remap_nc_2)
@@ -0,0 +1,31 @@
+"""
+Tests of the csv output of the remapped values
+"""
+
+import glob
+
+import numpy as np
+import pandas as pd
+
+
+def test_csv_has_the_remapped_values(make_easymore, reference, tmp_path):
+    make_easymore(save_csv=True).nc_remapper()
+    output = tmp_path / 'output'
+    df_map = pd.read_csv(output / 'Mapping_bow_remapped.csv', index_col=0)
+    assert list(df_map.index) == ['lat', 'lon']
+    names = sorted(glob.glob(str(output / 'bow_remapped_airtemp_K_ERA5_NA_*.nc.csv')))
+    assert len(names) == 3
+    values = pd.concat([pd.read_csv(name, index_col=0) for name in names])
+    assert list(values.columns[1:]) == list(df_map.columns)
+    # the fill values are saved as empty cells
+    np.testing.assert_allclose(values.iloc[:, 1:].values, reference['airtemp'].values,
+                               rtol=1e-6, equal_nan=True)
+    assert values.iloc[:, 1:].isna().values.sum() == int(reference['airtemp'].isnull().sum())
+
+
+def test_csv_unit_names_drop_forbidden_characters(make_easymore, reference, tmp_path):
+    make_easymore(save_csv=True, var_names=['pptrate']).nc_remapper()
+    # kg m**-2 s**-1 without the spaces and the stars
+    name = tmp_path / 'output' / 'bow_remapped_pptrate_kgm-2s-1_ERA5_NA_19790102.nc.csv'
+    values = pd.read_csv(name, index_col=0)
+    np.testing.assert_allclose(values.iloc[:, 1:].values, reference['pptrate'].values[24:48], rtol=1e-6)
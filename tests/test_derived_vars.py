@@ -0,0 +1,33 @@
+"""
+Tests of the variables derived from the source variables
+"""
+
+import numpy as np
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+def test_derived_vars_before_and_after_the_remapping(make_easymore, reference, tmp_path):
+    derived_vars = {'tc': 'airtemp - 273.15',
+                    'warm': 'where(airtemp > 273.15, 1.0, 0.0)',
+                    'pphour': {'expression': 'np.maximum(pptrate, 0) * 3600', 'stage': 'after',
+                               'units': 'kg m**-2 h**-1'}}
+    make_easymore(var_names=['airtemp', 'pptrate', 'tc', 'warm', 'pphour'],
+                  derived_vars=derived_vars).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    assert_remapped_equal(ds, reference)
+    np.testing.assert_allclose(ds['tc'].values, reference['airtemp'].values - 273.15, atol=1e-3, equal_nan=True)
+    # the fraction of the area of the shapes above zero degree
+    assert np.nanmin(ds['warm'].values) >= 0 and np.nanmax(ds['warm'].values) <= 1
+    np.testing.assert_allclose(ds['pphour'].values, reference['pptrate'].values * 3600, rtol=1e-5)
+    assert ds['pphour'].attrs['units'] == 'kg m**-2 h**-1'
+
+
+@pytest.mark.parametrize('expression', ['airtemp.__class__',
+                                        '__import__("os").getcwd()',
+                                        '(lambda x: x)(airtemp)',
+                                        'airtemp +'])
+def test_derived_vars_reject_other_expressions(make_easymore, expression):
+    with pytest.raises(SystemExit):
+        make_easymore(var_names=['airtemp', 'tc'], derived_vars={'tc': expression}).nc_remapper()
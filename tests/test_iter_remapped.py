@@ -0,0 +1,31 @@
+"""
+Tests of yielding the remapped values in blocks of time steps
+"""
+
+import numpy as np
+import pytest
+
+from conftest import VAR_NAMES
+
+
+def test_iter_remapped_blocks_run_over_the_files(make_easymore, reference, tmp_path):
+    esmr = make_easymore()
+    blocks = list(esmr.iter_remapped(blocks=10))
+    # 72 time steps in blocks of 10, the last is shorter
+    assert [len(time) for time, ID, values in blocks] == [10]*7 + [2]
+    np.testing.assert_array_equal(blocks[0][1], reference['ID'].values)
+    time = np.concatenate([time for time, ID, values in blocks])
+    np.testing.assert_array_equal(time.astype('datetime64[ns]'), reference['time'].values)
+    for var_name in VAR_NAMES:
+        values = np.concatenate([values[var_name] for time, ID, values in blocks]).astype(np.float64)
+        values[values == -9999] = np.nan
+        np.testing.assert_allclose(values, reference[var_name].values, rtol=1e-6, equal_nan=True)
+    # nothing is written
+    assert not list((tmp_path / 'output').glob('*.nc'))
+
+
+def test_iter_remapped_yields_a_block_per_file(make_easymore):
+    esmr = make_easymore()
+    assert [len(time) for time, ID, values in esmr.iter_remapped()] == [24, 24, 24]
+    with pytest.raises(SystemExit):
+        next(esmr.iter_remapped(blocks=0))
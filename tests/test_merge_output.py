@@ -0,0 +1,31 @@
+"""
+Tests of appending the remapped source files into one output along time
+"""
+
+import glob
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+def test_merge_output_appends_along_time(make_easymore, reference, tmp_path):
+    make_easymore(merge_output=True).nc_remapper()
+    assert glob.glob(str(tmp_path / 'output' / '*.nc')) == [str(tmp_path / 'output' / 'bow_remapped.nc')]
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped.nc'))
+    np.testing.assert_array_equal(ds['time'].values, reference['time'].values)
+    assert_remapped_equal(ds, reference)
+
+
+def test_merge_output_rejects_overlapping_files(make_easymore, source_dir, tmp_path):
+    overlap = tmp_path / 'overlap'
+    overlap.mkdir()
+    for name in sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))[:2]:
+        shutil.copy(name, overlap)
+    shutil.copy(str(overlap / 'ERA5_NA_19790101.nc'), str(overlap / 'ERA5_NA_19790101_copy.nc'))
+    with pytest.raises(SystemExit):
+        make_easymore(merge_output=True, source_nc=str(overlap / 'ERA5_NA_*.nc')).nc_remapper()
+    with pytest.raises(SystemExit):
+        make_easymore(merge_output=True, resume=True).nc_remapper()
@@ -0,0 +1,32 @@
+"""
+Tests of routing the remapped values into one file per period
+"""
+
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+def test_output_period_day_gives_a_file_per_day(make_easymore, reference, tmp_path):
+    make_easymore(output_period='day').nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / '*.nc')))
+    assert [os.path.basename(output) for output in outputs] == \
+           ['bow_remapped_1979-01-0%d.nc' % day for day in (1, 2, 3)]
+    ds = read_remapped(outputs[1])
+    assert (ds['time'].dt.day == 2).all() and len(ds['time']) == 24
+    assert_remapped_equal(read_remapped(outputs), reference)
+
+
+def test_output_period_month_spans_the_files(make_easymore, reference, tmp_path):
+    make_easymore(output_period='month').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_1979-01.nc'))
+    np.testing.assert_array_equal(ds['time'].values, reference['time'].values)
+    assert_remapped_equal(ds, reference)
+    with pytest.raises(SystemExit):
+        make_easymore(output_period='day', merge_output=True).nc_remapper()
+    with pytest.raises(SystemExit):
+        make_easymore(output_period='week').nc_remapper()
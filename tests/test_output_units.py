@@ -0,0 +1,39 @@
+"""
+Tests of the conversion of the units of the remapped values
+"""
+
+import netCDF4 as nc4
+import numpy as np
+import pytest
+
+from conftest import read_remapped
+
+
+def test_output_units_convert_the_remapped_values(make_easymore, reference, tmp_path):
+    make_easymore(output_units={'airtemp': 'degC', 'pptrate': 'kg m**-2 day**-1'}).nc_remapper()
+    with nc4.Dataset(str(tmp_path / 'output' / 'bow_remapped_ERA5_NA_19790101.nc')) as ncid:
+        assert ncid.variables['airtemp'].units == 'degC'
+        assert ncid.variables['pptrate'].units == 'kg m**-2 day**-1'
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    np.testing.assert_allclose(ds['airtemp'].values, reference['airtemp'].values - 273.15, atol=1e-4, equal_nan=True)
+    # per day instead of per second
+    np.testing.assert_allclose(ds['pptrate'].values, reference['pptrate'].values * 86400, rtol=1e-5)
+    with pytest.raises(SystemExit):
+        make_easymore(output_units={'airtemp': 'kg'}).nc_remapper()
+    with pytest.raises(SystemExit):
+        make_easymore(output_units={'t2m': 'degC'}).nc_remapper()
+
+
+def test_negative_scale_swaps_the_max_and_min(make_easymore, tmp_path):
+    esmr = make_easymore(statistics=['max', 'min'], case_name='extremes')
+    esmr.nc_remapper()
+    extremes = read_remapped(str(tmp_path / 'output' / 'extremes_remapped_*.nc'))
+    # a conversion of 300 - airtemp as by units with a negative scale
+    esmr = make_easymore(statistics=['max', 'min'], case_name='flipped')
+    esmr.get_unit_conversions = lambda nc_name: {'airtemp': (-1.0, 300.0, 'K')}
+    esmr.nc_remapper()
+    flipped = read_remapped(str(tmp_path / 'output' / 'flipped_remapped_*.nc'))
+    np.testing.assert_allclose(flipped['airtemp_max'].values, 300 - extremes['airtemp_min'].values,
+                               atol=1e-4, equal_nan=True)
+    np.testing.assert_allclose(flipped['airtemp_min'].values, 300 - extremes['airtemp_max'].values,
+                               atol=1e-4, equal_nan=True)
@@ -0,0 +1,37 @@
+"""
+Tests of the parquet output of the remapped values
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def test_long_parquet_has_the_remapped_values(make_easymore, reference, tmp_path):
+    make_easymore(save_parquet=True).nc_remapper()
+    output = tmp_path / 'output'
+    assert os.path.isfile(output / 'Mapping_bow_remapped.parquet')
+    table = pq.read_table(output / 'bow_remapped_ERA5_NA_19790101.nc.parquet')
+    assert table.schema.field('airtemp').metadata[b'units'] == b'K'
+    df = table.to_pandas()
+    assert len(df) == 24 * len(reference['ID'])
+    # the fill values are null
+    assert df['airtemp'].isna().sum() == int(reference['airtemp'].isel(time=slice(0, 24)).isnull().sum())
+    for var_name in ('airtemp', 'pptrate'):
+        values = df.pivot(index='time', columns='ID', values=var_name)
+        values = values[reference['ID'].values]
+        np.testing.assert_allclose(values.values, reference[var_name].values[:24], rtol=1e-6, equal_nan=True)
+
+
+def test_wide_parquet_per_variable(make_easymore, reference, tmp_path):
+    make_easymore(save_parquet=True, parquet_layout='wide', parquet_compression='snappy').nc_remapper()
+    df = pd.read_parquet(tmp_path / 'output' / 'bow_remapped_pptrate_ERA5_NA_19790103.nc.parquet')
+    assert list(df.columns[1:]) == ['ID_'+str(ID) for ID in pq.read_table(
+        tmp_path / 'output' / 'Mapping_bow_remapped.parquet').column('ID').to_pylist()]
+    np.testing.assert_allclose(df.iloc[:, 1:].values, reference['pptrate'].values[48:], rtol=1e-6, equal_nan=True)
+    with pytest.raises(SystemExit):
+        make_easymore(save_parquet=True, parquet_compression=['zstd', 'zstd', 'zstd']).nc_remapper()
@@ -0,0 +1,61 @@
+"""
+Tests of locating the target points directly in the source grid
+"""
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import xarray as xr
+from shapely.geometry import MultiPoint
+
+from conftest import make_points, read_remapped, read_source
+
+
+def test_points_take_the_value_of_their_cell(make_easymore, source_dir, tmp_path):
+    # a point off the center and a point close to the edges of its cell
+    points = make_points(tmp_path / 'points.shp', [51.1, 51.87], [-119.6, -119.88])
+    make_easymore(remap_nc=None, attr_nc=None, target_shp=points, target_shp_ID='ID',
+                  point_method='cell').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    np.testing.assert_array_equal(ds['ID'].values, [1, 2])
+    for var_name in ('airtemp', 'pptrate'):
+        source = read_source(source_dir, var_name)
+        expected = np.stack([source.sel(latitude=51.0, longitude=-119.5).values,
+                             source.sel(latitude=51.75, longitude=-120.0).values], axis=1)
+        np.testing.assert_allclose(ds[var_name].values, expected, rtol=1e-6)
+
+
+def test_points_outside_of_the_grid_are_missing(make_easymore, source_dir, tmp_path):
+    # the second point is outside and the third is on the missing values of the source
+    points = make_points(tmp_path / 'points.shp', [50.6, 40.0, 50.75], [-117.1, -100.0, -114.0])
+    make_easymore(remap_nc=None, attr_nc=None, target_shp=points, target_shp_ID='ID',
+                  point_method='cell').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    source = read_source(source_dir, 'airtemp')
+    np.testing.assert_allclose(ds['airtemp'].sel(ID=1).values,
+                               source.sel(latitude=50.5, longitude=-117.0).values, rtol=1e-6)
+    assert ds['airtemp'].sel(ID=2).isnull().all()
+    np.testing.assert_array_equal(ds['airtemp'].sel(ID=3).isnull().values,
+                                  source.sel(latitude=50.75, longitude=-114.0).isnull().values)
+    with pytest.raises(SystemExit):
+        make_easymore(remap_nc=None, attr_nc=None, point_method='nearest').nc_remapper()
+
+
+def test_multipoints_average_their_parts(make_easymore, source_dir, tmp_path):
+    # a multipoint in two cells and a multipoint with a part outside of the grid
+    multipoints = gpd.GeoDataFrame({'ID': [1, 2]},
+                                   geometry=[MultiPoint([(-119.6, 51.1), (-117.1, 50.6)]),
+                                             MultiPoint([(-119.6, 51.1), (-100.0, 40.0)])], crs='EPSG:4326')
+    multipoints.to_file(str(tmp_path / 'multipoints.shp'))
+    esmr = make_easymore(remap_nc=None, attr_nc=None, target_shp=str(tmp_path / 'multipoints.shp'),
+                         target_shp_ID='ID', point_method='cell')
+    esmr.nc_remapper()
+    with xr.open_dataset(esmr.remap_nc) as ds_remap:
+        weight = ds_remap['weight'].to_series().groupby(ds_remap['ID_t'].values).sum()
+    np.testing.assert_allclose(weight.values, 1)
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    source = read_source(source_dir, 'pptrate')
+    first = source.sel(latitude=51.0, longitude=-119.5).values
+    second = source.sel(latitude=50.5, longitude=-117.0).values
+    np.testing.assert_allclose(ds['pptrate'].sel(ID=1).values, (first + second) / 2, rtol=1e-5)
+    np.testing.assert_allclose(ds['pptrate'].sel(ID=2).values, first, rtol=1e-5)
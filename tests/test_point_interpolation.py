@@ -0,0 +1,40 @@
+"""
+Tests of the bilinear and inverse distance interpolation of the target points
+"""
+
+import numpy as np
+import pytest
+
+from conftest import make_points, read_remapped, read_source
+
+
+def test_bilinear_points_between_the_grid_centers(make_easymore, source_dir, tmp_path):
+    # the middle of four centers, a quarter between two centers and a center
+    points = make_points(tmp_path / 'points.shp', [51.125, 51.0, 51.0], [-119.625, -119.6875, -119.5])
+    make_easymore(remap_nc=None, attr_nc=None, target_shp=points, target_shp_ID='ID',
+                  point_method='bilinear').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    source = read_source(source_dir, 'pptrate')
+    middle = source.sel(latitude=[51.0, 51.25], longitude=[-119.75, -119.5]).mean(['latitude', 'longitude'])
+    quarter = 0.75 * source.sel(latitude=51.0, longitude=-119.75) + 0.25 * source.sel(latitude=51.0, longitude=-119.5)
+    center = source.sel(latitude=51.0, longitude=-119.5)
+    np.testing.assert_allclose(ds['pptrate'].values, np.stack([middle, quarter, center], axis=1), rtol=1e-5)
+
+
+def test_idw_points_and_missing_neighbours(make_easymore, source_dir, tmp_path):
+    # a point half way between two centers along the meridian and a point next to the missing values
+    points = make_points(tmp_path / 'points.shp', [51.125, 50.75], [-119.5, -114.1])
+    make_easymore(remap_nc=None, attr_nc=None, target_shp=points, target_shp_ID='ID',
+                  point_method='idw', idw_neighbours=2).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    source = read_source(source_dir, 'airtemp')
+    np.testing.assert_allclose(ds['airtemp'].sel(ID=1).values,
+                               source.sel(latitude=[51.0, 51.25], longitude=-119.5).mean('latitude').values, rtol=1e-6)
+    # the weights are rescaled to the neighbour with a value when the nearest is missing
+    value = ds['airtemp'].sel(ID=2).values
+    missing = source.sel(latitude=50.75, longitude=-114.0).isnull().values
+    assert missing.any() and not np.isnan(value).any()
+    np.testing.assert_allclose(value[missing], source.sel(latitude=50.75, longitude=-114.25).values[missing], rtol=1e-6)
+    with pytest.raises(SystemExit):
+        make_easymore(remap_nc=None, attr_nc=None, target_shp=points, target_shp_ID='ID',
+                      point_method='idw', idw_neighbours=0).nc_remapper()
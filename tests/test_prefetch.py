@@ -0,0 +1,39 @@
+"""
+Tests of the prefetch of the next source files on a background thread
+"""
+
+import glob
+
+import numpy as np
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+def test_prefetch_yields_the_files_in_order(make_easymore, source_dir):
+    nc_names = sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))
+    sources = {}
+    for prefetch_depth in (0, 2):
+        esmr = make_easymore(prefetch_depth=prefetch_depth)
+        esmr.check_easymore_input()
+        esmr.check_source_nc()
+        sources[prefetch_depth] = list(esmr.iter_source_nc(nc_names))
+    assert [source['nc_name'] for source in sources[2]] == nc_names
+    for source_0, source_2 in zip(sources[0], sources[2]):
+        np.testing.assert_array_equal(source_0['time'], source_2['time'])
+        for var_name in ('airtemp', 'pptrate'):
+            np.testing.assert_array_equal(source_0['data'][var_name][0], source_2['data'][var_name][0])
+
+
+def test_prefetch_passes_errors_to_the_caller(make_easymore, source_dir, reference, tmp_path):
+    nc_names = sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))
+    esmr = make_easymore(prefetch_depth=1)
+    esmr.check_easymore_input()
+    esmr.check_source_nc()
+    sources = esmr.iter_source_nc([nc_names[0], str(tmp_path / 'missing.nc'), nc_names[1]])
+    assert next(sources)['nc_name'] == nc_names[0]
+    with pytest.raises(OSError):
+        next(sources)
+    # the remapped values without prefetch are the same
+    make_easymore(prefetch_depth=0).nc_remapper()
+    assert_remapped_equal(read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc')), reference)
@@ -0,0 +1,53 @@
+"""
+Tests of the quantization of the remapped values
+"""
+
+import glob
+import os
+import re
+
+import netCDF4 as nc4
+import numpy as np
+import pytest
+
+from conftest import read_remapped
+
+
+def test_quantized_values_keep_their_digits(make_easymore, reference, tmp_path):
+    make_easymore(significant_digits=[3, None], least_significant_digit=[None, None]).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    with nc4.Dataset(outputs[0]) as ncid:
+        assert ncid.variables['airtemp'].quantization() is not None
+        assert ncid.variables['pptrate'].quantization() is None
+    ds = read_remapped(outputs)
+    # three significant digits of a temperature around 270 K
+    np.testing.assert_allclose(ds['airtemp'].values, reference['airtemp'].values, rtol=1e-3, equal_nan=True)
+    assert not np.array_equal(ds['airtemp'].values, reference['airtemp'].values, equal_nan=True)
+    np.testing.assert_allclose(ds['pptrate'].values, reference['pptrate'].values, rtol=1e-6)
+
+
+def test_least_significant_digit_and_conflicts(make_easymore, reference, tmp_path):
+    make_easymore(least_significant_digit=1).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    # the values are rounded to a power of two finer than 0.1
+    error = np.abs(ds['airtemp'].values - reference['airtemp'].values)
+    assert np.nanmax(error) <= 0.5 * 10.0**-1
+    assert np.nanmax(error) > 0
+    with pytest.raises(SystemExit):
+        make_easymore(significant_digits=2, least_significant_digit=2).nc_remapper()
+    with pytest.raises(SystemExit):
+        make_easymore(significant_digits=[2, 2, 2]).nc_remapper()
+
+
+def test_reduction_against_the_unquantized_values(make_easymore, tmp_path, capsys):
+    make_easymore(significant_digits=2).nc_remapper()
+    reductions = re.findall(r'The quantization reduces the remapped file from (\d+) to (\d+) bytes',
+                            capsys.readouterr().out)
+    assert len(reductions) == 3
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    for output, (unquantized_size, quantized_size) in zip(outputs, reductions):
+        assert int(quantized_size) == os.path.getsize(output)
+        assert int(quantized_size) < int(unquantized_size)
+    # the same file without quantization, up to the blocks of the HDF5 metadata
+    make_easymore().nc_remapper()
+    assert abs(os.path.getsize(outputs[0]) - int(reductions[0][0])) <= 4096
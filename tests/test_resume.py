@@ -0,0 +1,57 @@
+"""
+Tests of resuming a run from the completion manifest in output_dir
+"""
+
+import glob
+import json
+import os
+
+import geopandas as gpd
+
+from conftest import TARGET_SHP, assert_remapped_equal, read_remapped
+
+
+def test_resume_skips_complete_outputs(make_easymore, reference, tmp_path):
+    make_easymore().nc_remapper()
+    manifest = tmp_path / 'output' / 'bow_manifest.jsonl'
+    with open(manifest) as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 3
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    mtimes = [os.path.getmtime(output) for output in outputs]
+    make_easymore(resume=True).nc_remapper()
+    assert [os.path.getmtime(output) for output in outputs] == mtimes
+    assert_remapped_equal(read_remapped(outputs), reference)
+
+
+def test_resume_remaps_partial_outputs(make_easymore, reference, tmp_path):
+    make_easymore().nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    # a partial output of an interrupted run and a missing output
+    with open(outputs[1], 'r+b') as f:
+        f.truncate(100)
+    os.remove(outputs[2])
+    mtime = os.path.getmtime(outputs[0])
+    make_easymore(resume=True).nc_remapper()
+    assert os.path.getmtime(outputs[0]) == mtime
+    assert_remapped_equal(read_remapped(outputs), reference)
+    # other variables are not complete in the manifest
+    make_easymore(resume=True, var_names=['airtemp']).nc_remapper()
+    assert os.path.getmtime(outputs[0]) != mtime
+
+
+def test_resume_without_remap_nc(make_easymore, tmp_path):
+    # the remapping file is created again by every run with the hash of its inputs
+    make_easymore(remap_nc=None, attr_nc=None, resume=True).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    mtimes = [os.path.getmtime(output) for output in outputs]
+    esmr = make_easymore(remap_nc=None, attr_nc=None, resume=True)
+    esmr.nc_remapper()
+    assert [os.path.getmtime(output) for output in outputs] == mtimes
+    # another target shapefile gives another remapping file that is not complete
+    shp = gpd.read_file(TARGET_SHP).iloc[:10]
+    shp.to_file(str(tmp_path / 'target.shp'))
+    other = make_easymore(remap_nc=None, attr_nc=None, resume=True, target_shp=str(tmp_path / 'target.shp'))
+    other.nc_remapper()
+    assert other.easymore_hash != esmr.easymore_hash
+    assert [os.path.getmtime(output) for output in outputs] != mtimes
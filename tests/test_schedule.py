@@ -0,0 +1,39 @@
+"""
+Tests of the scheduling of the source files across workers by estimated cost
+"""
+
+import glob
+import os
+
+import xarray as xr
+
+
+def test_uniform_files_are_not_packed(make_easymore, source_dir):
+    esmr = make_easymore()
+    esmr.check_easymore_input()
+    nc_names = sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))
+    costs = esmr.get_source_nc_cost(nc_names, 100)
+    assert len(set(costs.values())) == 1
+    # many more files than workers: every file stays its own task
+    tasks = esmr.schedule_source_nc(nc_names * 4, 1, 100)
+    assert tasks == [[nc_name] for nc_name in nc_names * 4]
+
+
+def test_small_files_are_packed_largest_first(make_easymore, source_dir, tmp_path):
+    nc_names = sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc')))
+    # two hourly slices of the first file among the full days
+    small = []
+    with xr.open_dataset(nc_names[0], decode_times=False) as ds:
+        for hour in (0, 1):
+            small.append(str(tmp_path / ('ERA5_NA_small_%d.nc' % hour)))
+            ds.isel(time=slice(hour, hour+1)).to_netcdf(small[-1])
+    esmr = make_easymore()
+    esmr.check_easymore_input()
+    tasks = esmr.schedule_source_nc(nc_names + small, 2, 100)
+    assert tasks[:3] == [[nc_name] for nc_name in nc_names]
+    assert tasks[3] == small
+    # no packing
+    esmr.pack_cost_fraction = 0
+    tasks = esmr.schedule_source_nc(nc_names + small, 2, 100)
+    assert len(tasks) == 5
+    assert [os.path.basename(task[0]) for task in tasks[3:]] == ['ERA5_NA_small_0.nc', 'ERA5_NA_small_1.nc']
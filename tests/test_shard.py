@@ -0,0 +1,48 @@
+"""
+Tests of the sharding of the source files for SLURM job arrays
+"""
+
+import glob
+import json
+import os
+import stat
+
+import pytest
+
+from easymore.scripts.main import submit_hpc_job
+
+from conftest import assert_remapped_equal, easymore_settings, read_remapped
+
+
+def test_shards_cover_the_files_once(make_easymore, reference, tmp_path):
+    for shard_index in range(2):
+        make_easymore(shard_index=shard_index, shard_count=2).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    assert len(outputs) == 3
+    assert_remapped_equal(read_remapped(outputs), reference)
+    with pytest.raises(SystemExit):
+        make_easymore(shard_index=2, shard_count=2).nc_remapper()
+
+
+def test_submit_job_array(source_dir, tmp_path):
+    # a stand-in for sbatch that records its arguments
+    calls = tmp_path / 'calls.txt'
+    sbatch = tmp_path / 'sbatch'
+    sbatch.write_text('#!/bin/bash\necho "$@" >> '+str(calls)+'\necho "$((100 + $(wc -l < '+str(calls)+')));cluster"\n')
+    sbatch.chmod(sbatch.stat().st_mode | stat.S_IEXEC)
+    conf = tmp_path / 'conf.json'
+    conf.write_text(json.dumps(easymore_settings(source_dir, tmp_path / 'temp', tmp_path / 'output')))
+    job_ids = submit_hpc_job(str(tmp_path / 'jobs'), str(conf), 'assets/default.slurm', array=3, sbatch=str(sbatch))
+    assert job_ids == ['101', '102']
+    lines = calls.read_text().splitlines()
+    assert lines[0].endswith('easymore_remap.slurm')
+    assert '--dependency=afterok:101' in lines[1]
+    with open(os.path.join(tmp_path / 'jobs', 'easymore_array.slurm')) as f:
+        job = f.read()
+    assert '#SBATCH --array=0-2' in job
+    assert '--shard-index $SLURM_ARRAY_TASK_ID --shard-count 3' in job
+    # with a remapping file only the job array is submitted
+    conf.write_text(json.dumps(easymore_settings(source_dir, tmp_path / 'temp', tmp_path / 'output',
+                                                 remap_nc=str(tmp_path / 'remapping.nc'))))
+    job_ids = submit_hpc_job(str(tmp_path / 'jobs'), str(conf), 'assets/default.slurm', array=3, sbatch=str(sbatch))
+    assert job_ids == ['103']
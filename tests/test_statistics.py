@@ -0,0 +1,62 @@
+"""
+Tests of the statistics of the source values over the target shapes
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from conftest import assert_remapped_equal, read_remapped, read_source
+
+
+def test_statistics_are_saved_with_their_suffix(make_easymore, reference, tmp_path):
+    make_easymore(statistics=['mean', 'max', 'min', 'std', 'valid_frac']).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    assert_remapped_equal(ds, reference)
+    for var_name in ('airtemp', 'pptrate'):
+        mean, maximum, minimum = (ds[var_name].values, ds[var_name+'_max'].values, ds[var_name+'_min'].values)
+        valid = ~np.isnan(mean)
+        assert np.all(maximum[valid] >= mean[valid] - 1e-3 * np.abs(mean[valid]))
+        assert np.all(minimum[valid] <= mean[valid] + 1e-3 * np.abs(mean[valid]))
+        # the std is at most half of the range of the values
+        std = ds[var_name+'_std'].values[valid]
+        assert np.all((std >= 0) & (std <= (maximum - minimum)[valid] / 2 + 1e-3 * np.abs(mean[valid])))
+    valid_frac = ds['airtemp_valid_frac'].values
+    assert np.all((valid_frac >= 0) & (valid_frac <= 1))
+    np.testing.assert_array_equal(np.isnan(reference['airtemp'].values), valid_frac == 0)
+    np.testing.assert_allclose(ds['pptrate_valid_frac'].values, 1)
+
+
+def test_statistics_without_the_mean(make_easymore, tmp_path):
+    make_easymore(statistics='max', var_names=['pptrate']).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    assert set(ds.data_vars) == {'latitude', 'longitude', 'pptrate_max'}
+    with pytest.raises(SystemExit):
+        make_easymore(statistics=['median']).nc_remapper()
+    with pytest.raises(SystemExit):
+        make_easymore(statistics=['mean', 'max'], var_names_remapped=['airtemp', 'airtemp_max']).nc_remapper()
+
+
+def test_statistics_of_a_target_shape_by_hand(make_easymore, source_dir, remap, tmp_path):
+    make_easymore(statistics=['mean', 'max', 'min', 'std']).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc'))
+    with xr.open_dataset(remap['remap_nc']) as remapping:
+        remapping = remapping.to_dataframe()
+    # the target shapes with the most source cells
+    ID_ts = remapping.groupby('ID_t').size().sort_values(kind='stable').index[-3:]
+    for var_name in ('airtemp', 'pptrate'):
+        source = read_source(source_dir, var_name)
+        for ID_t in ID_ts:
+            rows = remapping[remapping['ID_t'] == ID_t]
+            values = np.stack([source.sel(latitude=lat, longitude=lon, method='nearest').values
+                               for lat, lon in zip(rows['lat_s'], rows['lon_s'])], axis=1)
+            weight = np.where(np.isnan(values), 0.0, rows['weight'].values)
+            values = np.where(np.isnan(values), 0.0, values)
+            mean = (weight * values).sum(axis=1) / weight.sum(axis=1)
+            std = np.sqrt((weight * (values - mean[:, np.newaxis])**2).sum(axis=1) / weight.sum(axis=1))
+            values = np.where(weight > 0, values, np.nan)
+            remapped = ds.sel(ID=ID_t)
+            np.testing.assert_allclose(remapped[var_name].values, mean, rtol=1e-6)
+            np.testing.assert_allclose(remapped[var_name+'_std'].values, std, rtol=1e-4, atol=1e-6 * np.abs(mean).max())
+            np.testing.assert_allclose(remapped[var_name+'_max'].values, np.nanmax(values, axis=1), rtol=1e-6)
+            np.testing.assert_allclose(remapped[var_name+'_min'].values, np.nanmin(values, axis=1), rtol=1e-6)
@@ -0,0 +1,45 @@
+"""
+Tests of remapping a subset of the target shapes and the window of the source grid
+"""
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely import affinity
+
+from conftest import TARGET_SHP, assert_remapped_equal, read_remapped
+
+
+def test_target_ids_remap_a_subset(make_easymore, reference, tmp_path):
+    esmr = make_easymore()
+    esmr.nc_remapper()
+    window = list(esmr.source_window)
+    target_ids = reference['ID'].values[[3, 50, 7]]
+    esmr = make_easymore(target_ids=list(target_ids), case_name='subset')
+    esmr.nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'subset_remapped_*.nc'))
+    assert sorted(ds['ID'].values) == sorted(target_ids)
+    assert_remapped_equal(ds, reference.sel(ID=ds['ID'].values))
+    # the window of the subset is inside of the window of all the shapes
+    assert all((start >= start_all) and (end <= end_all) for (start, end), (start_all, end_all)
+               in zip(esmr.source_window, window))
+    assert esmr.source_window != window
+    with pytest.raises(SystemExit):
+        make_easymore(target_ids=[-1.0]).nc_remapper()
+
+
+def test_window_skips_the_shapes_outside_of_the_source(make_easymore, source_dir, tmp_path):
+    # two HRUs and a copy of one of them moved far outside of the source grid
+    shp = gpd.read_file(TARGET_SHP).iloc[[0, 1, 1]].reset_index(drop=True)
+    shp.loc[2, 'HRU_ID'] = 999
+    shp.loc[2, 'geometry'] = affinity.translate(shp.loc[2, 'geometry'], xoff=40)
+    target_shp = str(tmp_path / 'target.shp')
+    shp.to_file(target_shp)
+    esmr = make_easymore(remap_nc=None, attr_nc=None, target_shp=target_shp, case_name='outside')
+    esmr.nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'outside_remapped_*.nc'))
+    assert ds['airtemp'].sel(ID=999).isnull().all()
+    assert not ds['pptrate'].sel(ID=shp.loc[0, 'HRU_ID']).isnull().any()
+    # the window covers the two HRUs only, a few cells of the grid of 9 by 41
+    (row_start, row_end), (col_start, col_end) = esmr.source_window
+    assert (row_end - row_start) * (col_end - col_start) < 9 * 41 // 4
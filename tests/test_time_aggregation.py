@@ -0,0 +1,31 @@
+"""
+Tests of the aggregation of the remapped values in time
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import VAR_NAMES, read_remapped
+
+
+def test_daily_mean_of_the_remapped_values(make_easymore, reference, tmp_path):
+    make_easymore(time_aggregation='day').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped.nc'))
+    expected = reference.resample(time='1D').mean()
+    np.testing.assert_array_equal(ds['time'].values, expected['time'].values)
+    for var_name in VAR_NAMES:
+        np.testing.assert_allclose(ds[var_name].values, expected[var_name].values, rtol=1e-5, equal_nan=True)
+
+
+def test_daily_max_with_an_offset(make_easymore, reference, tmp_path):
+    # with 6 hours the last 6 hours of a day go to the next day
+    make_easymore(time_aggregation='day', time_aggregation_stat='max', time_aggregation_offset=6).nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped.nc'))
+    shifted = reference.assign_coords(time=reference['time'] + pd.Timedelta(hours=6))
+    expected = shifted.resample(time='1D').max()
+    assert len(ds['time']) == 4
+    for var_name in VAR_NAMES:
+        np.testing.assert_allclose(ds[var_name].values, expected[var_name].values, rtol=1e-6, equal_nan=True)
+    with pytest.raises(SystemExit):
+        make_easymore(time_aggregation='day', output_format='zarr').nc_remapper()
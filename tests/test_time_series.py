@@ -0,0 +1,27 @@
+"""
+Tests of the ID-major time series output of the remapped values
+"""
+
+import numpy as np
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+def test_time_series_output_is_id_major(make_easymore, reference, tmp_path):
+    make_easymore(output_format='time_series').nc_remapper()
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_time_series.nc'))
+    assert ds['airtemp'].dims == ('ID', 'time')
+    np.testing.assert_array_equal(ds['time'].values, reference['time'].values)
+    assert_remapped_equal(ds.transpose('time', 'ID'), reference)
+
+
+def test_time_series_of_remapped_files_in_small_slabs(make_easymore, reference, tmp_path):
+    make_easymore().nc_remapper()
+    # a memory of 118 IDs by 2 variables by 5 time steps
+    esmr = make_easymore(time_series_memory=118*2*8*5)
+    esmr.remapped_to_time_series(str(tmp_path / 'output' / 'bow_remapped_ERA5_NA_*.nc'))
+    ds = read_remapped(str(tmp_path / 'output' / 'bow_remapped_time_series.nc'))
+    assert_remapped_equal(ds.transpose('time', 'ID'), reference)
+    with pytest.raises(SystemExit):
+        make_easymore(output_format='time_series', output_period='day').nc_remapper()
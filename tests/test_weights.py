@@ -0,0 +1,53 @@
+"""
+Tests of weighting the remapping by a field of the source grid
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from conftest import assert_remapped_equal, read_remapped, read_source
+
+
+def make_weight(source_dir, path, field):
+    """a weight field of the shape of the source grid"""
+    source = read_source(source_dir, 'pptrate').isel(time=0, drop=True)
+    xr.Dataset({'frac': (source.dims, field(source.shape))},
+               coords=source.coords).to_netcdf(str(path))
+    return str(path)
+
+
+def test_weights_scale_the_remapping(make_easymore, source_dir, remap, reference, tmp_path):
+    # a uniform field keeps the remapped values
+    uniform = make_weight(source_dir, tmp_path / 'uniform.nc', np.ones)
+    make_easymore(weight_nc=uniform, weight_var='frac', case_name='uniform').nc_remapper()
+    assert_remapped_equal(read_remapped(str(tmp_path / 'output' / 'uniform_remapped_*.nc')), reference, rtol=1e-5)
+    # a field that varies along the grid weights the source cells of every target shape
+    field = make_weight(source_dir, tmp_path / 'field.nc', lambda shape: np.arange(1.0, np.prod(shape)+1).reshape(shape))
+    esmr = make_easymore(weight_nc=field, weight_var='frac', case_name='field')
+    get_secondary_weights = esmr.get_secondary_weights
+    calls = []
+    esmr.get_secondary_weights = lambda remap: calls.append(1) or get_secondary_weights(remap)
+    esmr.nc_remapper()
+    # the weights are loaded once for all the source files
+    assert len(calls) == 1
+    ds = read_remapped(str(tmp_path / 'output' / 'field_remapped_*.nc'))
+    with xr.open_dataset(remap['remap_nc']) as ds_remap:
+        mapping = ds_remap[['ID_t', 'rows', 'cols', 'weight']].to_dataframe()
+    with xr.open_dataset(field) as ds_field:
+        frac = ds_field['frac'].values
+    pptrate = read_source(source_dir, 'pptrate').values
+    for ID in ds['ID'].values[:5]:
+        rows = mapping[mapping['ID_t'] == ID]
+        weight = rows['weight'].values * frac[rows['rows'].astype(int), rows['cols'].astype(int)]
+        expected = pptrate[:, rows['rows'].astype(int), rows['cols'].astype(int)] @ (weight / weight.sum())
+        np.testing.assert_allclose(ds['pptrate'].sel(ID=ID).values, expected, rtol=1e-5)
+
+
+def test_weights_of_another_grid_are_rejected(make_easymore, source_dir, tmp_path):
+    xr.Dataset({'frac': (('y', 'x'), np.ones((3, 4)))}).to_netcdf(str(tmp_path / 'small.nc'))
+    with pytest.raises(SystemExit):
+        make_easymore(weight_nc=str(tmp_path / 'small.nc'), weight_var='frac').nc_remapper()
+    uniform = make_weight(source_dir, tmp_path / 'uniform.nc', np.ones)
+    with pytest.raises(SystemExit):
+        make_easymore(weight_nc=uniform, weight_var='fraction').nc_remapper()
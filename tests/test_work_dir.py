@@ -0,0 +1,120 @@
+"""
+Tests of the distribution of the source files through a shared work directory
+"""
+
+import glob
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from easymore import Easymore
+
+from conftest import assert_remapped_equal, easymore_settings, read_remapped
+
+
+def test_work_dir_remaps_and_marks_done(make_easymore, reference, tmp_path):
+    esmr = make_easymore(work_dir=str(tmp_path / 'work'))
+    esmr.nc_remapper()
+    assert os.path.dirname(esmr.work_dir_case) == str(tmp_path / 'work')
+    assert len(glob.glob(os.path.join(esmr.work_dir_case, 'done', '*.done'))) == 3
+    assert_remapped_equal(read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc')), reference)
+    # the done files are not remapped again by another process with the same settings
+    threads = threading.active_count()
+    other = make_easymore(work_dir=str(tmp_path / 'work'))
+    other.nc_remapper()
+    assert other.work_dir_case == esmr.work_dir_case
+    assert threading.active_count() == threads
+    # other settings do not share the done files
+    other = make_easymore(work_dir=str(tmp_path / 'work'), var_names=['airtemp'], case_name='bow_airtemp')
+    other.nc_remapper()
+    assert other.work_dir_case != esmr.work_dir_case
+    assert len(glob.glob(str(tmp_path / 'output' / 'bow_airtemp_remapped_*.nc'))) == 3
+
+
+def test_stale_claims_are_taken_over(make_easymore, reference, tmp_path):
+    esmr = make_easymore(work_dir=str(tmp_path / 'work'), claim_timeout=60)
+    esmr.nc_remapper()
+    for name in glob.glob(os.path.join(esmr.work_dir_case, 'done', '*.done')) + \
+                glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')):
+        os.remove(name)
+    # claims of a killed process; the last is fresh and goes stale during the run
+    claims = sorted(glob.glob(os.path.join(esmr.work_dir_case, 'claims', '*.claim')))
+    assert len(claims) == 3
+    stale = time.time() - 3600
+    for claim in claims[:2]:
+        os.utime(claim, (stale, stale))
+    os.utime(claims[2])
+    start = time.time()
+    make_easymore(work_dir=str(tmp_path / 'work'), claim_timeout=2).nc_remapper()
+    assert time.time() - start >= 2
+    assert len(glob.glob(os.path.join(esmr.work_dir_case, 'done', '*.done'))) == 3
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    assert len(outputs) == 3
+    assert_remapped_equal(read_remapped(outputs), reference)
+
+
+def test_live_claims_are_waited_for(make_easymore, tmp_path):
+    esmr = make_easymore(work_dir=str(tmp_path / 'work'), claim_timeout=2)
+    esmr.nc_remapper()
+    for name in glob.glob(os.path.join(esmr.work_dir_case, 'done', '*.done')) + \
+                glob.glob(os.path.join(esmr.work_dir_case, 'claims', '*.claim')) + \
+                glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')):
+        os.remove(name)
+    # another process holds the claim of the last file and marks it done after 3 seconds
+    claim_name = os.path.join(esmr.work_dir_case, 'claims', 'ERA5_NA_19790103.nc.claim')
+    done_name = os.path.join(esmr.work_dir_case, 'done', 'ERA5_NA_19790103.nc.done')
+    open(claim_name, 'w').close()
+    heartbeat = esmr.start_heartbeat(claim_name)
+    def finish():
+        time.sleep(3)
+        open(done_name, 'w').close()
+        esmr.stop_heartbeat(heartbeat)
+    other = threading.Thread(target=finish)
+    other.start()
+    start = time.time()
+    make_easymore(work_dir=str(tmp_path / 'work'), claim_timeout=2).nc_remapper()
+    other.join()
+    # the process returns once the other process is done, without remapping its file
+    assert time.time() - start >= 3
+    assert len(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc'))) == 2
+
+
+def run_work_dir(settings):
+    Easymore(**settings).nc_remapper()
+
+
+def test_concurrent_processes_remap_every_file_once(source_dir, remap, reference, tmp_path):
+    settings = easymore_settings(source_dir, tmp_path / 'temp', tmp_path / 'output',
+                                 work_dir=str(tmp_path / 'work'), claim_timeout=4, **remap)
+    processes = [multiprocessing.get_context('fork').Process(target=run_work_dir, args=(settings,))
+                 for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    # one record in the manifest and one done file for every source file
+    with open(tmp_path / 'output' / 'bow_manifest.jsonl') as f:
+        sources = sorted(json.loads(line)['source'] for line in f)
+    assert sources == ['ERA5_NA_1979010%d.nc' % day for day in (1, 2, 3)]
+    done = glob.glob(str(tmp_path / 'work' / '*' / 'done' / '*.done'))
+    assert len(done) == 3
+    assert_remapped_equal(read_remapped(str(tmp_path / 'output' / 'bow_remapped_*.nc')), reference)
+
+
+def test_stale_remap_lock_is_taken_over(source_dir, tmp_path):
+    settings = easymore_settings(source_dir, tmp_path / 'temp', tmp_path / 'output',
+                                 work_dir=str(tmp_path / 'work'), claim_timeout=60, only_create_remap_nc=True)
+    esmr = Easymore(**settings)
+    esmr.nc_remapper()
+    # the lock of a process that was killed while creating the remapping file
+    os.remove(os.path.join(esmr.work_dir_case, 'remap.json'))
+    lock_name = os.path.join(esmr.work_dir_case, 'remap.lock')
+    stale = time.time() - 3600
+    os.utime(lock_name, (stale, stale))
+    esmr = Easymore(**settings)
+    esmr.nc_remapper()
+    assert os.path.isfile(os.path.join(esmr.work_dir_case, 'remap.json'))
+    assert os.path.getmtime(lock_name) > stale
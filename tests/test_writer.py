@@ -0,0 +1,39 @@
+"""
+Tests of the background writer thread of the remapped files
+"""
+
+import glob
+import os
+
+import pytest
+
+from conftest import assert_remapped_equal, read_remapped
+
+
+@pytest.mark.parametrize('write_queue_depth', [0, 2])
+def test_writer_writes_the_remapped_files(make_easymore, reference, tmp_path, write_queue_depth):
+    make_easymore(write_queue_depth=write_queue_depth).nc_remapper()
+    outputs = sorted(glob.glob(str(tmp_path / 'output' / 'bow_remapped_*.nc')))
+    assert [os.path.basename(output) for output in outputs] == \
+           ['bow_remapped_ERA5_NA_1979010%d.nc' % day for day in (1, 2, 3)]
+    assert_remapped_equal(read_remapped(outputs), reference)
+
+
+def test_writer_runs_jobs_in_order_and_raises_errors(make_easymore):
+    esmr = make_easymore(write_queue_depth=1)
+    submit, close = esmr.start_nc_writer()
+    done = []
+    for i in range(5):
+        submit(lambda i=i: done.append(i))
+    close()
+    assert done == [0, 1, 2, 3, 4]
+    # the error of a job is raised and the later jobs are skipped
+    submit, close = esmr.start_nc_writer()
+    def fail():
+        raise ValueError('disk is full')
+    done = []
+    submit(fail)
+    submit(lambda: done.append(0))
+    with pytest.raises(ValueError):
+        close()
+    assert done == []
@@ -0,0 +1,38 @@
+"""
+Tests of the Zarr output backend
+"""
+
+import glob
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from conftest import assert_remapped_equal
+
+zarr = pytest.importorskip('zarr')
+
+
+def test_zarr_store_has_the_remapped_values(make_easymore, reference, tmp_path):
+    make_easymore(output_format='zarr').nc_remapper()
+    ds = xr.open_zarr(str(tmp_path / 'output' / 'bow_remapped.zarr'), chunks=None).load()
+    np.testing.assert_array_equal(ds['time'].values, reference['time'].values)
+    for var_name in ('airtemp', 'pptrate'):
+        ds[var_name] = ds[var_name].where(ds[var_name] != -9999)
+    assert_remapped_equal(ds, reference)
+    assert ds['airtemp'].attrs['units'] == 'K'
+
+
+def test_zarr_time_chunks_align_to_files_only_for_workers(make_easymore, source_dir, reference, tmp_path):
+    esmr = make_easymore(output_format='zarr', chunk_access='time_series')
+    esmr.nc_remapper()
+    store = str(tmp_path / 'output' / 'bow_remapped.zarr')
+    # written one file after the other the chunks run over the files
+    assert zarr.open_group(store, mode='r')['airtemp'].chunks == (72, 118)
+    # written by worker processes the chunks divide the files of 24 time steps
+    esmr.target_zarr_creation(sorted(glob.glob(str(source_dir / 'ERA5_NA_*.nc'))), num_processes=2)
+    assert zarr.open_group(store, mode='r')['airtemp'].chunks == (24, 118)
+    ds = xr.open_zarr(store, chunks=None).load()
+    assert_remapped_equal(ds.where(ds != -9999), reference)
+    with pytest.raises(SystemExit):
+        make_easymore(output_format='zarr', resume=True).nc_remapper()